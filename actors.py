@@ -1,11 +1,25 @@
 from __future__ import annotations
-from typing import Optional, Set, List, TYPE_CHECKING
-from utils import Vec, add, cheb, legal_neighbors
+from typing import Optional, Set, List, Dict, Iterable, TYPE_CHECKING
+from utils import Vec, add, cheb, legal_neighbors, PathFinder
+from search import EvaderSearch
 
 if TYPE_CHECKING:
     from game import Game
+    from powerups import PowerUp
+
+def chase_step(pos: Vec, target: Vec, w: int, h: int, obstacles: Set[Vec], obstacles_enabled: bool) -> Vec:
+    """Greedy chaser move: the first neighbour (or stay) closest to `target`."""
+    options = legal_neighbors(pos, w, h, obstacles, obstacles_enabled)
+    options.append(pos)  # stay if blocked
+    best_dist = min(cheb(q, target) for q in options)
+    # all best moves toward target
+    best = [q for q in options if cheb(q, target) == best_dist]
+    return best[0]
 
 class Actor:
+    __slots__ = ('name', 'color', 'pos', 'deaths', 'dead', 'respawn_ticks', 'last_death_pos',
+                 'speed_turns', 'skip_turns', 'powerups_collected')
+
     def __init__(self, name: str, color: tuple[int,int,int], pos: Vec):
         self.name = name
         self.color = color
@@ -18,6 +32,7 @@ class Actor:
         # power-up effects
         self.speed_turns: int = 0   # number of upcoming turns with double-step
         self.skip_turns: int = 0    # number of upcoming turns to skip
+        self.powerups_collected: int = 0
 
     @property
     def alive(self) -> bool:
@@ -29,14 +44,18 @@ class Actor:
     def move(self, p: Vec, game: 'Game') -> None:
         """Move to a new position and check for power-up collisions."""
         self.pos = p
-        for pu in list(getattr(game, 'powerups', [])):
-            if pu.pos == self.pos and pu.active:
-                pu.apply(self, game)
-                if not pu.active and pu in game.powerups:
-                    game.powerups.remove(pu)
+        powerups = getattr(game, 'powerups', None)
+        pu = powerups.at(p) if powerups else None
+        if pu is not None and pu.active:
+            pu.apply(self, game)
+            self.powerups_collected += 1
+            if not pu.active:
+                powerups.remove(pu)
 
 class HumanPlayer(Actor):
     """Human-controlled via key mapping handled by Game; this class validates moves."""
+    __slots__ = ()
+
     def try_move(self, delta: Optional[Vec], w: int, h: int, obstacles: Set[Vec], obstacles_enabled: bool) -> bool:
         if delta is None:
             return True  # skip turn
@@ -48,16 +67,39 @@ class HumanPlayer(Actor):
         return False
 
 class HunterCPU(Actor):
-    def decide(self, target: Vec, w: int, h: int, obstacles: Set[Vec], obstacles_enabled: bool) -> Vec:
-        options = legal_neighbors(self.pos, w, h, obstacles, obstacles_enabled)
-        options.append(self.pos)  # stay if blocked
-        best_dist = min(cheb(q, target) for q in options)
-        # all best moves toward target
-        best = [q for q in options if cheb(q, target) == best_dist]
-        return best[0]
+    """Chases the target along shortest paths around obstacles."""
+    __slots__ = ('paths',)
+
+    def __init__(self, name: str, color: tuple[int,int,int], pos: Vec, budget_ms: float = 2.0,
+                 node_budget: int = 0):
+        super().__init__(name, color, pos)
+        self.paths = PathFinder(budget_ms, node_budget=node_budget)
+
+    def decide(self, target: Vec, w: int, h: int, obstacles: Set[Vec], obstacles_enabled: bool,
+               obstacles_rev: Optional[int] = None) -> Vec:
+        nxt = self.paths.next_step(self.pos, target, w, h, obstacles, obstacles_enabled, obstacles_rev)
+        if nxt is None:
+            # path not resolved within the budget (or unreachable): greedy step
+            return chase_step(self.pos, target, w, h, obstacles, obstacles_enabled)
+        return nxt
 
 class TargetCPU(Actor):
-    def decide(self, human: Vec, hunter: Vec, w: int, h: int, obstacles: Set[Vec], obstacles_enabled: bool) -> Vec:
+    """Evades both chasers with a time-boxed lookahead search (see search.py)."""
+    __slots__ = ('search',)
+
+    def __init__(self, name: str, color: tuple[int,int,int], pos: Vec, budget_ms: float = 2.0,
+                 node_budget: int = 0):
+        super().__init__(name, color, pos)
+        self.search = EvaderSearch(budget_ms, node_budget=node_budget)
+
+    def decide(self, human: Optional[Vec], hunter: Optional[Vec], w: int, h: int, obstacles: Set[Vec],
+               obstacles_enabled: bool, fires: Optional[Dict[Vec, int]] = None,
+               powerups: Iterable['PowerUp'] = ()) -> Vec:
+        """`human`/`hunter` are None while dead; `fires` maps burning cells to sub-turns left."""
+        return self.search.best_move(self.pos, human, hunter, w, h, obstacles, obstacles_enabled, fires, powerups)
+
+    def decide_greedy(self, human: Vec, hunter: Vec, w: int, h: int, obstacles: Set[Vec], obstacles_enabled: bool) -> Vec:
+        """One-ply fallback: maximise distance to the nearer chaser."""
         options = legal_neighbors(self.pos, w, h, obstacles, obstacles_enabled)
         if not options:
             return self.pos
@@ -0,0 +1,172 @@
+"""Headless batch runner for balance sweeps.
+
+Plays complete CPU-vs-CPU rounds on a process pool and streams one JSON line
+per round to stdout, e.g.:
+
+    python batch.py --rounds 2000 --set fire_spawn_chance=0.2,0.33 --set obstacle_density=0.1,0.2
+
+Each `--set` takes a comma-separated list of values; every combination of the
+given values is played for `--rounds` rounds. A per-combination summary is
+printed to stderr at the end. With `--events DIR` every worker also appends
+the events of its rounds to DIR/events-<pid>.ndjson (see events.py).
+
+The CPU searches are budgeted in nodes (`ai_node_budget`, or NODE_BUDGET
+when the config has none) rather than milliseconds, so a seed plays the same
+round on any machine and under any load.
+"""
+from __future__ import annotations
+import argparse, itertools, json, os, sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, asdict, fields
+from typing import Dict, Iterator, List, Optional, Any
+
+from config import Config
+from engine import Engine, SKIP
+from events import EventBus, EventLog
+from actors import chase_step
+
+# node budget for the built-in searches when the config has none
+NODE_BUDGET = 2000
+
+
+@dataclass
+class RoundResult:
+    seed: int
+    winner: Optional[str]       # None when the round hit max_steps
+    steps: int
+    deaths: Dict[str, int]
+    fires_spawned: int
+    powerups_collected: Dict[str, int]
+    params: Dict[str, Any]
+
+
+def apply_overrides(cfg: Config, overrides: Dict[str, Any]) -> Config:
+    """Set simple Config fields, coercing values to the field's current type."""
+    known = {f.name for f in fields(Config)}
+    for k, v in overrides.items():
+        if k not in known or k == "colors":
+            raise ValueError(f"unknown config field: {k}")
+        cur = getattr(cfg, k)
+        if isinstance(cur, bool):
+            v = v if isinstance(v, bool) else str(v).lower() in ("1", "true", "yes", "on")
+        else:
+            v = type(cur)(v)
+        setattr(cfg, k, v)
+    return cfg
+
+
+def batch_config(config_path: str, params: Dict[str, Any]) -> Config:
+    """The config a worker plays with: overrides applied, searches budgeted in nodes."""
+    cfg = apply_overrides(Config.load(config_path), params)
+    cfg.ai_node_budget = cfg.ai_node_budget or NODE_BUDGET
+    return cfg
+
+
+def human_action(world: Engine):
+    """CPU stand-in for the human seat: greedy chase of the target."""
+    assert world.human and world.target
+    cfg = world.cfg
+    pos = world.human.pos
+    nxt = chase_step(pos, world.target.pos, cfg.grid_w, cfg.grid_h, world.obstacles, world.obstacles_enabled)
+    if nxt == pos:
+        return SKIP
+    return (nxt[0] - pos[0], nxt[1] - pos[1])
+
+
+def play_round(cfg: Config, seed: int, max_steps: int, params: Optional[Dict[str, Any]] = None,
+               events: Optional[EventBus] = None) -> RoundResult:
+    world = Engine(cfg)
+    world.events = events
+    world.init_world(seed)
+    while world.winner is None and world.step_counter < max_steps:
+        world.step(human_action(world) if world.awaiting_human() else None)
+    assert world.human and world.hunter and world.target and world.fire
+    actors = (world.human, world.hunter, world.target)
+    return RoundResult(
+        seed=seed,
+        winner=world.winner,
+        steps=world.step_counter,
+        deaths={a.name: a.deaths for a in actors},
+        fires_spawned=world.fire.spawned,
+        powerups_collected={a.name: a.powerups_collected for a in actors},
+        params=dict(params or {}),
+    )
+
+
+def _play_chunk(config_path: str, params: Dict[str, Any], seeds: List[int], max_steps: int,
+                events_dir: Optional[str] = None) -> List[RoundResult]:
+    # runs in a worker process; every round has its own seed and a node
+    # budget, so results do not depend on which worker picked the chunk up
+    cfg = batch_config(config_path, params)
+    if not events_dir:
+        return [play_round(cfg, s, max_steps, params) for s in seeds]
+    log = EventLog(os.path.join(events_dir, f"events-{os.getpid()}.ndjson"))
+    bus = EventBus()
+    bus.subscribe(log)
+    try:
+        return [play_round(cfg, s, max_steps, params, bus) for s in seeds]
+    finally:
+        log.close()
+
+
+def run_batch(rounds: int, sweep: Dict[str, List[Any]] | None = None, *, config_path: str = "config.json",
+              seed: int = 0, max_steps: int = 20000, workers: Optional[int] = None,
+              chunk: int = 16, events_dir: Optional[str] = None) -> Iterator[RoundResult]:
+    """Yield RoundResults as workers finish them (completion order)."""
+    sweep = sweep or {}
+    if events_dir:
+        os.makedirs(events_dir, exist_ok=True)
+    keys = list(sweep)
+    combos = [dict(zip(keys, vals)) for vals in itertools.product(*(sweep[k] for k in keys))]
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = []
+        for ci, params in enumerate(combos):
+            base = seed + ci * rounds
+            for i in range(0, rounds, chunk):
+                seeds = list(range(base + i, base + min(i + chunk, rounds)))
+                futures.append(pool.submit(_play_chunk, config_path, params, seeds, max_steps, events_dir))
+        for fut in as_completed(futures):
+            yield from fut.result()
+
+
+def _parse_sweep(items: List[str]) -> Dict[str, List[str]]:
+    sweep: Dict[str, List[str]] = {}
+    for item in items:
+        key, _, vals = item.partition("=")
+        if not vals:
+            raise SystemExit(f"--set expects key=v1,v2,... (got {item!r})")
+        sweep[key.strip()] = [v.strip() for v in vals.split(",")]
+    return sweep
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rounds", type=int, default=100, help="rounds per parameter combination")
+    ap.add_argument("--set", action="append", default=[], metavar="KEY=V1,V2", help="config field to sweep")
+    ap.add_argument("--config", default="config.json")
+    ap.add_argument("--seed", type=int, default=0, help="seed of the first round")
+    ap.add_argument("--max-steps", type=int, default=20000, help="sub-turn cap per round (winner=null)")
+    ap.add_argument("--workers", type=int, default=None, help="default: all cores")
+    ap.add_argument("--events", default=None, metavar="DIR", help="append round events to DIR/events-<pid>.ndjson")
+    args = ap.parse_args(argv)
+
+    # coerce sweep values up front so bad keys fail fast and results carry typed params
+    sweep = {k: [getattr(apply_overrides(Config(), {k: v}), k) for v in vals]
+             for k, vals in _parse_sweep(args.set).items()}
+    summary: Dict[str, Dict[str, int]] = {}
+    for res in run_batch(args.rounds, sweep, config_path=args.config, seed=args.seed,
+                         max_steps=args.max_steps, workers=args.workers, events_dir=args.events):
+        sys.stdout.write(json.dumps(asdict(res)) + "\n")
+        key = json.dumps(res.params, sort_keys=True)
+        s = summary.setdefault(key, {"rounds": 0, "HUMAN": 0, "HUNTER": 0, "none": 0, "steps": 0})
+        s["rounds"] += 1
+        s[res.winner or "none"] += 1
+        s["steps"] += res.steps
+    sys.stdout.flush()
+    for key, s in summary.items():
+        print(f"{key}: rounds={s['rounds']} human={s['HUMAN']} hunter={s['HUNTER']} "
+              f"unfinished={s['none']} avg_steps={s['steps'] / s['rounds']:.1f}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+"""Micro-benchmarks for the engine and renderer hot paths.
+
+Writes one JSON document (run metadata plus one entry per case) so results
+can be stored per commit and compared later:
+
+    python bench.py > bench-$(git rev-parse --short HEAD).json
+    python bench.py --filter fire --repeat 9
+    python bench.py --compare bench-abc1234.json > bench-new.json
+
+Every case is timed `--repeat` times on fresh fixtures, each run calling it
+`number` times (picked like timeit's autorange); times are microseconds per
+call. Fixtures are seeded, so runs on one machine are comparable. CPU moves
+are budgeted in search nodes (`--node-budget`) so the AI cases do the same
+work on every machine. Drawing uses the SDL dummy video driver.
+"""
+from __future__ import annotations
+import argparse, itertools, json, os, platform, random, statistics, subprocess, sys, time, timeit
+from dataclasses import dataclass, asdict, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from config import Config
+from utils import Vec, pick_start_positions, generate_obstacles
+from fire import FireSystem
+from engine import Engine
+from actors import chase_step
+
+SIZES = (40, 200, 1000)
+SEED = 1234
+
+
+@dataclass
+class Case:
+    name: str
+    params: Dict[str, Any]
+    make: Callable[[], Callable[[], Any]]   # builds a fresh fixture, returns the timed call
+
+
+@dataclass
+class Result:
+    name: str
+    params: Dict[str, Any]
+    number: int
+    min_us: float
+    median_us: float
+    mean_us: float
+    runs_us: List[float] = field(default_factory=list)
+
+
+def _cycle(items: List[Any]) -> Callable[[], Any]:
+    return itertools.cycle(items).__next__
+
+
+def _cells(w: int, h: int, n: int, rng: random.Random) -> List[Vec]:
+    return [(rng.randrange(w), rng.randrange(h)) for _ in range(n)]
+
+
+def _world(cfg: Config, size: int, seed: int = SEED, **overrides: Any) -> Engine:
+    cfg = Config(**{**asdict(cfg), "grid_w": size, "grid_h": size, **overrides})
+    world = Engine(cfg)
+    world.init_world(seed)
+    return world
+
+
+def _burn(world: Engine, steps: int) -> None:
+    """Advance a world with the greedy chaser in the human seat."""
+    assert world.human and world.target
+    cfg = world.cfg
+    for _ in range(steps):
+        if world.winner is not None:
+            world.init_world(world.seed + 1)
+        if world.awaiting_human():
+            pos = world.human.pos
+            nxt = chase_step(pos, world.target.pos, cfg.grid_w, cfg.grid_h, world.obstacles, world.obstacles_enabled)
+            world.step((nxt[0] - pos[0], nxt[1] - pos[1]))
+        else:
+            world.step()
+
+
+# ------------ cases ------------
+def world_cases(cfg: Config) -> Iterator[Case]:
+    for n in SIZES:
+        def gen(n: int = n) -> Callable[[], Any]:
+            rng = random.Random(SEED)
+            exclude = {(1, 1), (n - 2, n - 2), (n // 2, n // 2)}
+            return lambda: generate_obstacles(n, n, cfg.obstacle_density, exclude, cfg.tree_ratio, rng)
+        yield Case("generate_obstacles", {"size": n, "density": cfg.obstacle_density}, gen)
+
+        def starts(n: int = n) -> Callable[[], Any]:
+            rng = random.Random(SEED)
+            return lambda: pick_start_positions(n, n, cfg.min_start_dist, rng)
+        yield Case("pick_start_positions", {"size": n, "min_start_dist": cfg.min_start_dist}, starts)
+
+
+def fire_cases(cfg: Config, size: int = 200, density: float = 0.3) -> Iterator[Case]:
+    # a forest: every obstacle is a tree, so most anchors are candidates
+    def forest(fire_max: int = cfg.fire_max) -> Tuple[FireSystem, set, dict]:
+        c = Config(**{**asdict(cfg), "grid_w": size, "grid_h": size, "fire_max": fire_max,
+                      "fire_spawn_chance": 1.0})
+        obstacles, styles = generate_obstacles(size, size, density, set(), 1.0, random.Random(SEED))
+        fire = FireSystem(c, size, size, random.Random(SEED))
+        fire.set_trees(styles)
+        return fire, obstacles, styles
+    params = {"size": size, "tree_density": density}
+
+    def set_trees() -> Callable[[], Any]:
+        fire, _, styles = forest()
+        return lambda: fire.set_trees(styles)
+    yield Case("fire.set_trees", params, set_trees)
+
+    def can_place() -> Callable[[], Any]:
+        fire, _, styles = forest()
+        anchors = _cycle(_cells(size - 1, size - 1, 4096, random.Random(SEED)))
+        return lambda: fire.can_place_fire(anchors(), styles)
+    yield Case("fire.can_place_fire", params, can_place)
+
+    def maybe_spawn() -> Callable[[], Any]:
+        fire, obstacles, styles = forest()
+        steps = itertools.count()
+
+        def call() -> None:
+            step = next(steps)
+            fire.update(step)
+            fire.maybe_spawn(step, obstacles, styles)
+        return call
+    yield Case("fire.maybe_spawn", {**params, "fire_max": cfg.fire_max}, maybe_spawn)
+
+    for fire_max in (cfg.fire_max, 64):
+        def in_fire(fire_max: int = fire_max) -> Callable[[], Any]:
+            fire, _, _ = forest(fire_max)
+            rng = random.Random(SEED)
+            while len(fire.fires) < fire_max:
+                a = (rng.randrange(size - 1), rng.randrange(size - 1))
+                if not any(fire.cell_in_fire(c) for c in fire.rect_cells(a)):
+                    fire.place(a, 10**9)
+            cells = _cycle(_cells(size, size, 4096, rng))
+            return lambda: fire.cell_in_fire(cells())
+        yield Case("fire.cell_in_fire", {"size": size, "fires": fire_max}, in_fire)
+
+
+def spawn_cases(cfg: Config) -> Iterator[Case]:
+    # crowded: dense obstacles and the board full of fire
+    for size in (40, 200, 1000):
+        def safe_spawn(size: int = size) -> Callable[[], Any]:
+            world = _world(cfg, size, obstacle_density=0.4, tree_ratio=1.0, fire_max=size * size // 40)
+            assert world.fire
+            rng = random.Random(SEED)
+            for _ in range(world.cfg.fire_max * 4):
+                a = (rng.randrange(size - 1), rng.randrange(size - 1))
+                if not any(world.fire.cell_in_fire(c) for c in world.fire.rect_cells(a)):
+                    world.fire.place(a, 10**9)
+            around = _cycle(_cells(size, size, 1024, rng))
+            return lambda: world.find_safe_spawn(around())
+        yield Case("engine.find_safe_spawn", {"size": size, "obstacle_density": 0.4}, safe_spawn)
+
+
+def ai_cases(cfg: Config, node_budget: int, size: int = 40, samples: int = 256) -> Iterator[Case]:
+    """Each decide() replays the arguments seen during real play, in order."""
+    def record(kind: str) -> Tuple[Engine, List[tuple]]:
+        world = _world(cfg, size, ai_node_budget=node_budget)
+        assert world.human and world.hunter and world.target
+        seen: List[tuple] = []
+        while len(seen) < samples:
+            if world.winner is not None:
+                world.init_world(world.seed + 1)
+            actor = {"hunter": world.hunter, "target": world.target}.get(kind, world.human)
+            if world.current is actor and actor.alive and actor.skip_turns == 0:
+                fires = {c: f.expires_at - world.step_counter
+                         for f in (world.fire.fires.values() if world.fire else ()) for c in f.cells}
+                seen.append((actor.pos, world.human.pos, world.hunter.pos, world.target.pos,
+                             set(world.obstacles), world.obstacles_rev, fires, list(world.powerups)))
+            _burn(world, 1)
+        return world, seen
+
+    w = h = size
+    params = {"size": size, "node_budget": node_budget}
+
+    def hunter() -> Callable[[], Any]:
+        world, seen = record("hunter")
+        actor, args = world.hunter, _cycle(seen)
+        assert actor
+
+        def call() -> Vec:
+            pos, _, _, target, obstacles, rev, _, _ = args()
+            actor.pos = pos
+            return actor.decide(target, w, h, obstacles, True, rev)
+        return call
+    yield Case("HunterCPU.decide", params, hunter)
+
+    def target() -> Callable[[], Any]:
+        world, seen = record("target")
+        actor, args = world.target, _cycle(seen)
+        assert actor
+
+        def call() -> Vec:
+            pos, human, hunter, _, obstacles, _, fires, powerups = args()
+            actor.pos = pos
+            return actor.decide(human, hunter, w, h, obstacles, True, fires, powerups)
+        return call
+    yield Case("TargetCPU.decide", params, target)
+
+    def greedy() -> Callable[[], Any]:
+        _, seen = record("human")
+        args = _cycle(seen)
+
+        def call() -> Vec:
+            pos, _, _, target, obstacles, _, _, _ = args()
+            return chase_step(pos, target, w, h, obstacles, True)
+        return call
+    yield Case("chase_step", {"size": size}, greedy)
+
+
+def draw_cases(cfg: Config) -> Iterator[Case]:
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    from game import Game
+
+    def frame(cold: bool) -> Callable[[], Callable[[], Any]]:
+        def make() -> Callable[[], Any]:
+            game = Game(Config(**{**asdict(cfg), "fire_spawn_chance": 1.0}))
+            game.fullscreen = False
+            game.init_pygame()
+            game.engine.init_world(SEED)
+            _burn(game.engine, 50)  # some fires and power-ups on the board
+
+            def call() -> None:
+                if cold:
+                    game._background = None
+                game.draw_frame()
+            return call
+        return make
+    params = {"size": cfg.grid_w, "cell": cfg.cell}
+    yield Case("Game.draw_frame", params, frame(False))
+    yield Case("Game.draw_frame", {**params, "background": "rebuilt"}, frame(True))
+
+
+def all_cases(cfg: Config, node_budget: int) -> Iterator[Case]:
+    yield from world_cases(cfg)
+    yield from fire_cases(cfg)
+    yield from spawn_cases(cfg)
+    yield from ai_cases(cfg, node_budget)
+    yield from draw_cases(cfg)
+
+
+# ------------ timing ------------
+def measure(case: Case, repeat: int, min_time: float) -> Result:
+    fn = case.make()
+    number, _ = timeit.Timer(fn).autorange()
+    # autorange stops at >= 0.2 s; scale down for the requested run length
+    number = max(1, int(number * min_time / 0.2))
+    runs: List[float] = []
+    for r in range(repeat):
+        if r:
+            fn = case.make()
+        runs.append(timeit.Timer(fn).timeit(number) / number * 1e6)
+    return Result(case.name, case.params, number, min(runs), statistics.median(runs),
+                  statistics.fmean(runs), runs)
+
+
+def _key(r: Dict[str, Any]) -> str:
+    return r["name"] + json.dumps(r["params"], sort_keys=True)
+
+
+def _commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--config", default="config.json")
+    ap.add_argument("--filter", default="", help="only cases whose name contains this")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--min-time", type=float, default=0.1, help="seconds per timed run (roughly)")
+    ap.add_argument("--node-budget", type=int, default=2000, help="search nodes per CPU move")
+    ap.add_argument("--out", help="write JSON here instead of stdout")
+    ap.add_argument("--compare", metavar="JSON", help="print the change against an earlier run to stderr")
+    args = ap.parse_args(argv)
+
+    cfg = Config.load(args.config)
+    results: List[Dict[str, Any]] = []
+    for case in all_cases(cfg, args.node_budget):
+        if args.filter not in case.name:
+            continue
+        res = measure(case, args.repeat, args.min_time)
+        results.append(asdict(res))
+        print(f"{res.name} {json.dumps(res.params)}: {res.median_us:.2f} us", file=sys.stderr)
+
+    doc = {
+        "meta": {
+            "commit": _commit(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "node_budget": args.node_budget,
+        },
+        "results": results,
+    }
+    text = json.dumps(doc, indent=1)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            base = {_key(r): r for r in json.load(f)["results"]}
+        for r in results:
+            old = base.get(_key(r))
+            if old:
+                change = (r["median_us"] / old["median_us"] - 1) * 100
+                print(f"{r['name']} {json.dumps(r['params'])}: {old['median_us']:.2f} -> "
+                      f"{r['median_us']:.2f} us ({change:+.1f}%)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
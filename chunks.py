@@ -0,0 +1,121 @@
+"""Lazily generated obstacle layer for large worlds.
+
+With `chunk_size` > 0 the board is cut into square chunks that are generated
+on first access (membership test, iteration over a rectangle, or `ensure`),
+each from its own random stream derived from the layer seed. Nothing is
+allocated for chunks nobody has looked at, so memory follows the explored
+area, and the same seed always yields the same layout whatever order the
+chunks are visited in.
+"""
+from __future__ import annotations
+import random
+from collections.abc import MutableSet
+from typing import Dict, Iterable, Iterator, Set, Tuple
+
+from utils import Vec, bernoulli_indices, clear_ring
+
+Chunk = Tuple[int, int]
+
+
+class ChunkedObstacles(MutableSet):
+    """
+    Set of obstacle cells, generated chunk by chunk. `styles` is an ordinary
+    dict ('tree'/'rock') that fills in as chunks are generated; callers test
+    membership before reading it, as they do with generate_obstacles output.
+    `version(chunk)` changes whenever a generated chunk is edited (burned
+    trees), so renderers can cache per chunk.
+    """
+
+    def __init__(self, w: int, h: int, density: float, tree_ratio: float, seed: int,
+                 exclude: Iterable[Vec] = (), chunk: int = 32) -> None:
+        self.w, self.h = w, h
+        self.density = density
+        self.tree_ratio = tree_ratio
+        self.seed = seed
+        self.chunk = chunk
+        self.styles: Dict[Vec, str] = {}
+        self._chunks: Dict[Chunk, Set[Vec]] = {}
+        self._versions: Dict[Chunk, int] = {}
+        self._clear = clear_ring(exclude)
+
+    def chunk_of(self, p: Vec) -> Chunk:
+        return (p[0] // self.chunk, p[1] // self.chunk)
+
+    @property
+    def generated(self) -> int:
+        return len(self._chunks)
+
+    def version(self, key: Chunk) -> int:
+        return self._versions.get(key, 0)
+
+    def _cells(self, key: Chunk) -> Set[Vec]:
+        cells = self._chunks.get(key)
+        if cells is None:
+            cells = self._chunks[key] = self._generate(key)
+        return cells
+
+    def _generate(self, key: Chunk) -> Set[Vec]:
+        cx, cy = key
+        c = self.chunk
+        rng = random.Random(f"{self.seed}:chunk:{cx}:{cy}")
+        cells: Set[Vec] = set()
+        styles = self.styles
+        tree_ratio, clear = self.tree_ratio, self._clear
+        x0, y0 = cx * c, cy * c
+        cw, ch = min(self.w, x0 + c) - x0, min(self.h, y0 + c) - y0
+        for i in bernoulli_indices(cw * ch, self.density, rng):
+            style = 'tree' if rng.random() < tree_ratio else 'rock'
+            p = (x0 + i % cw, y0 + i // cw)
+            if p not in clear:
+                cells.add(p)
+                styles[p] = style
+        return cells
+
+    def ensure(self, x0: int, y0: int, x1: int, y1: int) -> None:
+        """Generate every chunk overlapping the cell rect [x0, x1) × [y0, y1)."""
+        for key in self.chunks_in(x0, y0, x1, y1):
+            self._cells(key)
+
+    def chunks_in(self, x0: int, y0: int, x1: int, y1: int) -> Iterator[Chunk]:
+        c = self.chunk
+        x0, y0 = max(0, x0), max(0, y0)
+        x1, y1 = min(self.w, x1), min(self.h, y1)
+        for cy in range(y0 // c, (y1 - 1) // c + 1):
+            for cx in range(x0 // c, (x1 - 1) // c + 1):
+                yield (cx, cy)
+
+    def in_chunk(self, key: Chunk) -> Set[Vec]:
+        """Obstacles of one chunk (generated if needed); do not modify."""
+        return self._cells(key)
+
+    # ------------ set protocol ------------
+    def __contains__(self, p: object) -> bool:
+        x, y = p  # type: ignore[misc]
+        if not (0 <= x < self.w and 0 <= y < self.h):
+            return False
+        key = (x // self.chunk, y // self.chunk)
+        cells = self._chunks.get(key)
+        if cells is None:
+            cells = self._chunks[key] = self._generate(key)
+        return p in cells
+
+    def __iter__(self) -> Iterator[Vec]:
+        """Obstacles of the generated chunks only."""
+        for cells in list(self._chunks.values()):
+            yield from cells
+
+    def __len__(self) -> int:
+        return sum(len(cells) for cells in self._chunks.values())
+
+    def add(self, p: Vec) -> None:
+        key = self.chunk_of(p)
+        self._cells(key).add(p)
+        self._versions[key] = self.version(key) + 1
+
+    def discard(self, p: Vec) -> None:
+        key = self.chunk_of(p)
+        cells = self._cells(key)
+        if p in cells:
+            cells.discard(p)
+            self.styles.pop(p, None)
+            self._versions[key] = self.version(key) + 1
@@ -28,6 +28,20 @@ class Config:
     powerup_max: int = 3
     powerup_length: int = 2          # effect duration in turns
     powerup_lifetime: int = 20       # sub-turns a power-up stays on the map
+    # AI
+    ai_budget_ms: float = 2.0        # per-move search time budget for CPU actors
+    ai_node_budget: int = 0          # >0: budget CPU moves in search nodes instead (reproducible)
+    # Replays
+    replay_dir: str = ""             # save a replay of every round here ("" = off)
+    # Large worlds
+    chunk_size: int = 0              # >0: obstacles generated lazily in chunks of this size, camera follows the human
+    view_w: int = 40                 # visible cells (window size) in large-world mode
+    view_h: int = 40
+    # Profiling
+    profile_overlay: bool = False    # show phase timings on screen (F3 toggles)
+    metrics_path: str = ""           # write the timing report (JSON) here every few seconds
+    # Analytics
+    event_log: str = ""              # append every round event here as NDJSON ("" = off)
 
     # Colors
     colors: Dict[str, Color] = field(default_factory=lambda: {
@@ -61,7 +75,9 @@ class Config:
                 for k in ("grid_w","grid_h","cell","margin","fps","min_start_dist",
                           "obstacles_enabled_default","obstacle_density","tree_ratio",
                           "fire_max","fire_lifetime","fire_spawn_chance","respawn_delay",
-                          "powerup_spawn_chance","powerup_max","powerup_length","powerup_lifetime"):
+                          "powerup_spawn_chance","powerup_max","powerup_length","powerup_lifetime",
+                          "ai_budget_ms","ai_node_budget","replay_dir","chunk_size","view_w","view_h",
+                          "profile_overlay","metrics_path","event_log"):
                     if k in data:
                         setattr(cfg, k, data[k])
                 # colors
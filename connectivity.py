@@ -0,0 +1,194 @@
+"""Which cells can reach which, and keeping the actors able to meet.
+
+Actors move to any of the 8 neighbouring cells that are on the board and free
+of obstacles, so the open cells split into 8-connected regions. `Components`
+labels them on a flat grid: each row is cut into runs of open cells, and runs
+touching a run of the row above (diagonals included) are joined with
+union-find, which costs one union per touching pair of runs rather than one
+per cell. Obstacles only ever disappear during a round (trees burn), and
+`open_cells` merges regions in place when they do.
+
+`repair` is used when a round starts: it removes the fewest obstacles that
+let each actor reach the target, so no round is lost to a sealed-off start.
+"""
+from __future__ import annotations
+import heapq, re
+from bisect import bisect_right
+from typing import Container, Dict, Iterable, List, MutableMapping, Optional
+
+from utils import Vec, DIRS_8, cheb
+
+_OPEN_RUN = re.compile(rb"\x00+")
+
+
+class Components:
+    """8-connected regions of the open cells of a w×h board."""
+
+    def __init__(self, w: int, h: int, obstacles: Iterable[Vec]) -> None:
+        self.w, self.h = w, h
+        grid = bytearray(w * h)
+        for x, y in obstacles:
+            grid[y * w + x] = 1
+        self._parent: List[int] = []
+        # per row: sorted run starts, run ends (exclusive) and union-find nodes
+        self._starts: List[List[int]] = []
+        self._ends: List[List[int]] = []
+        self._ids: List[List[int]] = []
+        parent = self._parent
+        prev_e: List[int] = []
+        prev_ids: List[int] = []
+        for y in range(h):
+            base = y * w
+            starts, ends, ids = [], [], []
+            for m in _OPEN_RUN.finditer(grid, base, base + w):
+                starts.append(m.start() - base)
+                ends.append(m.end() - base)
+                ids.append(len(parent))
+                parent.append(len(parent))
+            # runs [a, b) and [c, d) of adjacent rows touch iff a <= d and c <= b
+            prev_s = self._starts[-1] if y else []
+            i = j = 0
+            while i < len(starts) and j < len(prev_s):
+                if starts[i] <= prev_e[j] and prev_s[j] <= ends[i]:
+                    self._union(ids[i], prev_ids[j])
+                if ends[i] < prev_e[j]:
+                    i += 1
+                else:
+                    j += 1
+            self._starts.append(starts)
+            self._ends.append(ends)
+            self._ids.append(ids)
+            prev_e, prev_ids = ends, ids
+
+    def _root(self, i: int) -> int:
+        parent = self._parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def _union(self, a: int, b: int) -> None:
+        ra, rb = self._root(a), self._root(b)
+        if ra != rb:
+            # the older node stays the root, so region labels are stable
+            if ra < rb:
+                self._parent[rb] = ra
+            else:
+                self._parent[ra] = rb
+
+    def _run(self, x: int, y: int) -> int:
+        """Index of the run holding (x, y) in row y, or -1."""
+        i = bisect_right(self._starts[y], x) - 1
+        return i if i >= 0 and x < self._ends[y][i] else -1
+
+    def find(self, p: Vec) -> int:
+        """Region label of `p`; -1 for obstacles and cells off the board."""
+        x, y = p
+        if not (0 <= x < self.w and 0 <= y < self.h):
+            return -1
+        i = self._run(x, y)
+        return self._root(self._ids[y][i]) if i >= 0 else -1
+
+    def same(self, a: Vec, b: Vec) -> bool:
+        ra = self.find(a)
+        return ra >= 0 and ra == self.find(b)
+
+    def open_cells(self, cells: Iterable[Vec]) -> None:
+        """Mark obstacle cells as open (burned trees), merging the regions they join."""
+        for x, y in cells:
+            if self._run(x, y) >= 0:
+                continue
+            starts, ends, ids = self._starts[y], self._ends[y], self._ids[y]
+            i = bisect_right(starts, x)
+            left = i > 0 and ends[i - 1] == x
+            right = i < len(starts) and starts[i] == x + 1
+            if left and right:
+                ends[i - 1] = ends[i]
+                self._union(ids[i - 1], ids[i])
+                del starts[i], ends[i], ids[i]
+                node = ids[i - 1]
+            elif left:
+                ends[i - 1] = x + 1
+                node = ids[i - 1]
+            elif right:
+                starts[i] = x
+                node = ids[i]
+            else:
+                node = len(self._parent)
+                self._parent.append(node)
+                starts.insert(i, x)
+                ends.insert(i, x + 1)
+                ids.insert(i, node)
+            # runs of the rows above and below covering x-1..x+1
+            for ny in (y - 1, y + 1):
+                if 0 <= ny < self.h:
+                    row_s, row_e, row_ids = self._starts[ny], self._ends[ny], self._ids[ny]
+                    j = bisect_right(row_s, x + 1) - 1
+                    while j >= 0 and row_e[j] >= x:
+                        self._union(node, row_ids[j])
+                        j -= 1
+
+
+def blocking_path(w: int, h: int, obstacles: Container[Vec], start: Vec, goal: Vec,
+                  limit: Optional[int] = None) -> Optional[List[Vec]]:
+    """
+    Obstacles on a path from `start` to `goal` that crosses as few of them as
+    possible (the shortest such path); [] when `start` already reaches `goal`.
+    None if every path crosses more than `limit` obstacles.
+    """
+    # A* on (obstacles crossed, steps): Chebyshev distance bounds the steps
+    best: Dict[Vec, tuple] = {start: (0, 0)}
+    parent: Dict[Vec, Vec] = {}
+    # ties go to the deepest entry, which keeps the search near a straight line
+    heap = [(0, cheb(start, goal), 0, start)]
+    while heap:
+        k, _, neg_g, p = heapq.heappop(heap)
+        g = -neg_g
+        if p == goal:
+            break
+        if best[p] != (k, g):
+            continue  # stale entry
+        if limit is not None and k > limit:
+            return None
+        for dx, dy in DIRS_8:
+            q = (p[0] + dx, p[1] + dy)
+            if not (0 <= q[0] < w and 0 <= q[1] < h):
+                continue
+            cost = (k + (q in obstacles), g + 1)
+            old = best.get(q)
+            if old is None or cost < old:
+                best[q] = cost
+                parent[q] = p
+                heapq.heappush(heap, (cost[0], cost[1] + cheb(q, goal), -cost[1], q))
+    else:
+        return None
+    if limit is not None and best[goal][0] > limit:
+        return None
+    cells: List[Vec] = []
+    p = goal
+    while p != start:
+        if p in obstacles:
+            cells.append(p)
+        p = parent[p]
+    return cells
+
+
+def reachable(w: int, h: int, obstacles: Container[Vec], a: Vec, b: Vec) -> bool:
+    """Whether an actor at `a` can walk to `b` (a path search; see Components for many queries)."""
+    return blocking_path(w, h, obstacles, a, b, 0) is not None
+
+
+def repair(w: int, h: int, obstacles, styles: MutableMapping[Vec, str],
+           goal: Vec, starts: Iterable[Vec]) -> List[Vec]:
+    """
+    Remove from `obstacles` (and `styles`) the fewest obstacles that let each
+    of `starts` reach `goal`, one start at a time so later ones can use cells
+    cleared for earlier ones. Returns the removed cells.
+    """
+    removed: List[Vec] = []
+    for s in starts:
+        for p in blocking_path(w, h, obstacles, s, goal) or ():
+            obstacles.discard(p)
+            styles.pop(p, None)
+            removed.append(p)
+    return removed
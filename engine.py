@@ -0,0 +1,553 @@
+from __future__ import annotations
+import random
+from typing import Optional, Set, Dict, List, Tuple
+
+from config import Config
+from utils import Vec, cheb, in_bounds, pick_start_positions, generate_obstacles, rng_stream, view_origin
+from chunks import ChunkedObstacles
+from connectivity import Components, reachable, repair
+from fire import FireSystem
+from freecells import FreeCells, column_ring_offsets
+from actors import Actor, HumanPlayer, HunterCPU, TargetCPU
+from powerups import PowerUpRegistry, SpeedPowerUp, TimeStopPowerUp
+from state import WorldState, WINNERS, FIELDS, TREE, SPEED_UP
+from profiler import Profiler, NO_PHASE
+from policies import Policy
+from events import (EventBus, RoundStart, Move, Kill, Respawn, FireSpawned, FireExpired, TreesBurned,
+                    PowerUpSpawned, PowerUpCollected, PowerUpExpired, Winner)
+
+# Human action meaning "skip this sub-turn" (the S key)
+SKIP: Vec = (0, 0)
+# The nine human actions in keyboard order: QWE / ASD / ZXC (S = SKIP)
+ACTIONS: List[Vec] = [
+    (-1, -1), (0, -1), (1, -1),
+    (-1,  0), SKIP,    (1,  0),
+    (-1,  1), (0,  1), (1,  1),
+]
+ACTION_INDEX: Dict[Vec, int] = {a: i for i, a in enumerate(ACTIONS)}
+# input code of the obstacle toggle (the O key); actions are 0..8
+TOGGLE = len(ACTIONS)
+
+
+class Engine:
+    """Pygame-free world state and sub-turn resolution.
+
+    `step` resolves exactly one sub-turn of `turn_order`. On the human's
+    sub-turn it needs an action (a delta from DIRS_8 or SKIP); CPU sub-turns
+    ignore it. No display or frame clock is involved, so headless callers can
+    run rounds as fast as the CPU allows.
+
+    Each round has a seed; world generation, fires and power-ups draw from
+    their own streams derived from it, and `inputs` records the human's
+    accepted actions and toggles (one byte each, see replay.py). With
+    `ai_node_budget` set, the same seed and inputs replay the same round.
+
+    With `chunk_size` > 0 the board is a large world: obstacles come from a
+    lazily generated ChunkedObstacles layer, the actors start in a
+    view-sized area at the centre, and fires and power-ups appear only in
+    the view-sized window around the human (`active_rect`), so per-step
+    cost does not grow with the board.
+    """
+
+    def __init__(self, cfg: Optional[Config] = None) -> None:
+        self.cfg = cfg or Config.load()
+
+        # actors & state
+        self.human: HumanPlayer | None = None
+        self.hunter: HunterCPU | None = None
+        self.target: TargetCPU | None = None
+
+        self.turn_order: list = []
+        self.turn_idx: int = 0
+        self.winner: Optional[str] = None
+        self.step_counter: int = 0
+
+        # round seed, per-subsystem random streams and the recorded human inputs
+        self.seed: int = 0
+        self.world_rng = self.fire_rng = self.powerup_rng = random.Random()
+        self.inputs = bytearray()
+
+        # obstacles
+        self.obstacles_enabled: bool = self.cfg.obstacles_enabled_default
+        self.obstacles: Set[Vec] = set()
+        self.obstacles_styles: Dict[Vec, str] = {}
+        # bumped whenever the obstacle layout changes (regenerated, toggled, burned)
+        self.obstacles_rev: int = 0
+        # open regions of a classic board, built on first use (see `components`)
+        self._components: Optional[Components] = None
+        # obstacle and fire cover for respawn searches, built on first use (see `free_cells`)
+        self._free: Optional[FreeCells] = None
+        # fires
+        self.fire: FireSystem | None = None
+
+        # power-ups
+        self.powerups = PowerUpRegistry()
+
+        # optional per-phase timings (decide, post_step parts); see profiler.py
+        self.profiler: Optional[Profiler] = None
+        # optional typed events of everything that happens in a round; see events.py
+        self.events: Optional[EventBus] = None
+        # seats (actor names) played by a plugged-in policy; see policies.py
+        self.policies: Dict[str, Policy] = {}
+
+    # ------------ lifecycle ------------
+    def init_world(self, seed: Optional[int] = None) -> None:
+        """Start a new round; without a seed one is drawn from `random`."""
+        self.seed = random.getrandbits(63) if seed is None else seed
+        self.world_rng = rng_stream(self.seed, "world")
+        self.fire_rng = rng_stream(self.seed, "fire")
+        self.powerup_rng = rng_stream(self.seed, "powerups")
+        self.inputs = bytearray()
+
+        if self.cfg.chunk_size:
+            vw, vh = self.view_size()
+            ox, oy = (self.cfg.grid_w - vw) // 2, (self.cfg.grid_h - vh) // 2
+            starts = pick_start_positions(vw, vh, self.cfg.min_start_dist, self.world_rng)
+            human_p, hunter_p, target_p = ((x + ox, y + oy) for (x, y) in starts)
+        else:
+            human_p, hunter_p, target_p = pick_start_positions(self.cfg.grid_w, self.cfg.grid_h, self.cfg.min_start_dist,
+                                                               self.world_rng)
+        budget, nodes = self.cfg.ai_budget_ms, self.cfg.ai_node_budget
+        self.human  = HumanPlayer("HUMAN",  self.cfg.colors["human"],  human_p)
+        self.hunter = HunterCPU  ("HUNTER", self.cfg.colors["hunter"], hunter_p, budget, nodes)
+        self.target = TargetCPU  ("TARGET", self.cfg.colors["target"], target_p, budget, nodes)
+
+        if self.obstacles_enabled:
+            self.obstacles, self.obstacles_styles = self._make_obstacles({human_p, hunter_p, target_p})
+        else:
+            self.obstacles = set()
+            self.obstacles_styles = {}
+        self._connect_actors()
+
+        # init fires (clears any prior fires)
+        self.fire = FireSystem(self.cfg, self.cfg.grid_w, self.cfg.grid_h, self.fire_rng)
+        self.fire.on_burn = self._on_trees_burned
+        self.fire.clear()
+        if not self.cfg.chunk_size:
+            # now rather than on the first respawn, which should stay quick
+            self._index_free_cells()
+        self.obstacles_rev += 1
+
+        # clear power-ups
+        self.powerups.clear(0)
+
+        # Human → Hunter → Human → Hunter → Target
+        self.turn_order = [self.human, self.hunter, self.human, self.hunter, self.target]
+        self.turn_idx = 0
+        self.winner = None
+        self.step_counter = 0
+        for seat, policy in self.policies.items():
+            policy.reset(self, seat)
+        if self.events:
+            self.events.emit(RoundStart(0, self.seed, self.cfg.grid_w, self.cfg.grid_h))
+
+    def toggle_obstacles(self) -> None:
+        """Toggle obstacles; replays apply it before the next human action."""
+        assert self.human and self.hunter and self.target
+        if self.winner is None:
+            self.inputs.append(TOGGLE)
+        self.obstacles_enabled = not self.obstacles_enabled
+        # re-generate to avoid covering actors
+        if self.obstacles_enabled:
+            self.obstacles, self.obstacles_styles = self._make_obstacles({self.human.pos, self.hunter.pos, self.target.pos})
+        else:
+            self.obstacles = set()
+            self.obstacles_styles = {}
+        self._connect_actors()
+        self.obstacles_rev += 1
+
+    def _make_obstacles(self, exclude: Set[Vec]) -> Tuple[Set[Vec], Dict[Vec, str]]:
+        cfg = self.cfg
+        if cfg.chunk_size:
+            layer = ChunkedObstacles(cfg.grid_w, cfg.grid_h, cfg.obstacle_density, cfg.tree_ratio,
+                                     self.world_rng.getrandbits(63), exclude, cfg.chunk_size)
+            return layer, layer.styles
+        return generate_obstacles(cfg.grid_w, cfg.grid_h, cfg.obstacle_density, exclude, cfg.tree_ratio,
+                                  self.world_rng)
+
+    def _connect_actors(self) -> None:
+        """After a new layout: clear the fewest obstacles that let the human and
+        the hunter reach the target, so every round can be won."""
+        assert self.human and self.hunter and self.target
+        self._components = None
+        self._free = None
+        if not self.obstacles_enabled:
+            return
+        goal = self.target.pos
+        starts = [self.human.pos, self.hunter.pos]
+        if not self.cfg.chunk_size:
+            # one labelling pass answers this for the usual, already connected board
+            starts = [p for p in starts if not self.components.same(p, goal)]
+        removed = repair(self.cfg.grid_w, self.cfg.grid_h, self.obstacles, self.obstacles_styles, goal, starts)
+        if self._components is not None:
+            self._components.open_cells(removed)
+
+    @property
+    def components(self) -> Components:
+        """Open regions of the current (classic) layout, kept up to date as trees burn."""
+        if self._components is None:
+            self._components = Components(self.cfg.grid_w, self.cfg.grid_h, self.obstacles)
+        return self._components
+
+    @property
+    def free_cells(self) -> Optional[FreeCells]:
+        """Obstacle and fire cover of a classic board, kept up to date by the fire
+        system; None for large worlds."""
+        if self.cfg.chunk_size or not self.fire:
+            return None
+        if self._free is None or self.fire.free_cells is not self._free:
+            self._index_free_cells()
+        return self._free
+
+    def _index_free_cells(self) -> None:
+        assert self.fire
+        covered = list(self.obstacles) if self.obstacles_enabled else []
+        for f in self.fire.fires.values():
+            covered += f.cells
+        self._free = FreeCells(self.cfg.grid_w, self.cfg.grid_h, covered)
+        self.fire.free_cells = self._free
+
+    def reaches_target(self, p: Vec) -> bool:
+        """Whether an actor standing on `p` could walk to the target."""
+        assert self.target
+        if not self.obstacles_enabled:
+            return True
+        if self.cfg.chunk_size:
+            # a large world cannot be labelled up front; search instead
+            return reachable(self.cfg.grid_w, self.cfg.grid_h, self.obstacles, p, self.target.pos)
+        return self.components.same(p, self.target.pos)
+
+    def _on_trees_burned(self, cells: List[Vec]) -> None:
+        if self._components is not None:
+            self._components.open_cells(cells)
+        if self._free is not None:
+            self._free.uncover(cells)
+        self.obstacles_rev += 1
+        if self.events:
+            self.events.emit(TreesBurned(self.step_counter, list(cells)))
+
+    def snapshot(self) -> WorldState:
+        """Packed copy of the world for search/rollouts (see state.py)."""
+        return WorldState.from_engine(self)
+
+    def load_state(self, s: WorldState) -> None:
+        """Make the world show `s` (the inverse of snapshot, e.g. for replay viewing)."""
+        assert self.human and self.hunter and self.target and self.fire
+        w = s.w
+        obstacles: Set[Vec] = set()
+        styles: Dict[Vec, str] = {}
+        for i, v in enumerate(s.obstacles):
+            if v:
+                p = (i % w, i // w)
+                obstacles.add(p)
+                styles[p] = 'tree' if v == TREE else 'rock'
+        if not self.obstacles_enabled or obstacles != self.obstacles or styles != self.obstacles_styles:
+            self.obstacles_enabled = True
+            self.obstacles, self.obstacles_styles = obstacles, styles
+            self._components = None
+            self._free = None
+            self.obstacles_rev += 1
+
+        self.step_counter, self.turn_idx, self.winner = s.step, s.turn_idx, WINNERS[s.winner]
+        self.fire.clear()
+        for i, exp in enumerate(s.fire):
+            if exp > s.step:
+                self.fire.place((i % w, i // w), exp)
+        self.powerups.clear(s.step)
+        for i, kind in enumerate(s.pu_type):
+            if kind and s.pu_expiry[i] > s.step:
+                cls = SpeedPowerUp if kind == SPEED_UP else TimeStopPowerUp
+                self.powerups.add(cls((i % w, i // w), s.pu_expiry[i] - s.step))
+        for slot, a in enumerate((self.human, self.hunter, self.target)):
+            x, y, dead, respawn, deaths, speed, skip, lx, ly = s.actors[slot*FIELDS:(slot+1)*FIELDS]
+            a.pos, a.dead, a.respawn_ticks, a.deaths = (x, y), bool(dead), respawn, deaths
+            a.speed_turns, a.skip_turns = speed, skip
+            a.last_death_pos = (lx, ly) if lx >= 0 else None
+
+    # ------------ helpers ------------
+    def _phase(self, name: str):
+        return self.profiler.phase(name) if self.profiler else NO_PHASE
+
+    def view_size(self) -> Tuple[int, int]:
+        """Visible cells: the whole board, or the view window of a large world."""
+        cfg = self.cfg
+        if cfg.chunk_size:
+            return min(cfg.view_w, cfg.grid_w), min(cfg.view_h, cfg.grid_h)
+        return cfg.grid_w, cfg.grid_h
+
+    def active_rect(self) -> Tuple[int, int, int, int]:
+        """Cells (x0, y0, x1, y1) where fires and power-ups may appear."""
+        cfg = self.cfg
+        if not cfg.chunk_size or not self.human:
+            return (0, 0, cfg.grid_w, cfg.grid_h)
+        vw, vh = self.view_size()
+        x0, y0 = view_origin(self.human.pos, vw, vh, cfg.grid_w, cfg.grid_h)
+        return (x0, y0, x0 + vw, y0 + vh)
+
+    def in_bounds(self, p: Vec) -> bool:
+        return 0 <= p[0] < self.cfg.grid_w and 0 <= p[1] < self.cfg.grid_h
+
+    def occupied_same(self, a: Vec, b: Vec) -> bool:
+        return a == b
+
+    @property
+    def current(self) -> Actor:
+        return self.turn_order[self.turn_idx]
+
+    def awaiting_human(self) -> bool:
+        """True when the next sub-turn cannot resolve without a human action."""
+        return (self.winner is None and self.current is self.human
+                and self.human.alive and self.human.skip_turns == 0)
+
+    def kill_actor(self, actor) -> None:
+        if actor.dead:
+            return
+        actor.deaths += 1
+        actor.dead = True
+        actor.respawn_ticks = self.cfg.respawn_delay
+        actor.last_death_pos = actor.pos
+        if self.events:
+            self.events.emit(Kill(self.step_counter, actor.name, *actor.pos))
+
+    def find_safe_spawn(self, around: Vec) -> Vec:
+        """
+        Nearest cell to `around`, ring by ring (each in dx, then dy order), that
+        is free of obstacles, fire and live actors and reaches the target.
+        """
+        live_positions = {a.pos for a in (self.human, self.hunter, self.target) if a and a.alive}
+        free = self.free_cells
+        w, h = self.cfg.grid_w, self.cfg.grid_h
+        cx, cy = around
+        for r in range(max(cx, w - 1 - cx, cy, h - 1 - cy) + 1):
+            if free is not None and free.ring_covered(around, r):
+                continue
+            for dx, dy in column_ring_offsets(r):
+                q = (cx + dx, cy + dy)
+                if not (0 <= q[0] < w and 0 <= q[1] < h):
+                    continue
+                if self.obstacles_enabled and q in self.obstacles:
+                    continue
+                if self.fire and self.fire.cell_in_fire(q):
+                    continue
+                if q in live_positions:
+                    continue
+                if not self.reaches_target(q):
+                    continue
+                return q
+        # fallback center
+        return (w // 2, h // 2)
+
+    def decrement_respawns(self) -> None:
+        for a in [self.human, self.hunter, self.target]:
+            if a and a.dead and a.respawn_ticks > 0:
+                a.respawn_ticks -= 1
+                if a.respawn_ticks <= 0:
+                    where = a.last_death_pos or a.pos
+                    a.set_pos(self.find_safe_spawn(where))
+                    a.dead = False
+                    a.respawn_ticks = 0
+                    if self.events:
+                        self.events.emit(Respawn(self.step_counter, a.name, *a.pos))
+
+    def check_fire_kills(self) -> None:
+        if not self.fire:
+            return
+        for a in [self.human, self.hunter, self.target]:
+            if a and a.alive and self.fire.cell_in_fire(a.pos):
+                self.kill_actor(a)
+
+    def update_powerups(self) -> None:
+        """Remove the power-ups that expire on this step."""
+        expired = self.powerups.expire(self.step_counter)
+        if self.events:
+            for pu in expired:
+                self.events.emit(PowerUpExpired(self.step_counter, type(pu).__name__, *pu.pos))
+
+    def maybe_spawn_powerup(self) -> None:
+        if len(self.powerups) >= self.cfg.powerup_max:
+            return
+        rng = self.powerup_rng
+        if rng.random() >= self.cfg.powerup_spawn_chance:
+            return
+        occupied = [a.pos for a in (self.human, self.hunter, self.target) if a]
+        x0, y0, x1, y1 = self.active_rect()
+        for _ in range(20):
+            x = rng.randrange(x0, x1)
+            y = rng.randrange(y0, y1)
+            pos = (x, y)
+            if pos in occupied or self.powerups.at(pos) or (self.obstacles_enabled and pos in self.obstacles):
+                continue
+            if self.fire and self.fire.cell_in_fire(pos):
+                continue
+            cls = rng.choice([SpeedPowerUp, TimeStopPowerUp])
+            pu = cls(pos, self.cfg.powerup_lifetime)
+            self.powerups.add(pu)
+            if self.events:
+                self.events.emit(PowerUpSpawned(self.step_counter, cls.__name__, x, y, pu.expires_at))
+            break
+
+    def post_step(self) -> None:
+        # Fires expire, perhaps spawn one, then check for any immediate kills
+        if self.fire:
+            with self._phase("post_step.fire"):
+                expired = self.fire.update(self.step_counter)
+                if self.cfg.chunk_size:
+                    spawned = self.fire.maybe_spawn_in(self.active_rect(), self.step_counter, self.obstacles,
+                                                       self.obstacles_styles)
+                else:
+                    spawned = self.fire.maybe_spawn(self.step_counter, self.obstacles, self.obstacles_styles)
+                if self.events:
+                    self._emit_fires(expired, spawned)
+                self.check_fire_kills()
+        with self._phase("post_step.powerups"):
+            self.update_powerups()
+            self.maybe_spawn_powerup()
+        # handle respawn countdowns
+        with self._phase("post_step.respawns"):
+            self.decrement_respawns()
+
+    def _emit_fires(self, expired, spawned: bool) -> None:
+        assert self.events and self.fire
+        step = self.step_counter
+        for f in expired:
+            self.events.emit(FireExpired(step, *f.top_left))
+        if spawned:
+            # the newest fire is the last one inserted
+            f = next(reversed(self.fire.fires.values()))
+            self.events.emit(FireSpawned(step, *f.top_left, f.expires_at))
+
+    # ------------ turn logic ------------
+    def advance_turn(self) -> None:
+        self.turn_idx = (self.turn_idx + 1) % len(self.turn_order)
+        self.step_counter += 1
+
+    def check_win_after_move(self) -> None:
+        assert self.human and self.hunter and self.target
+        if self.human.alive and self.occupied_same(self.human.pos, self.target.pos):
+            self.winner = "HUMAN"
+        elif self.hunter.alive and self.occupied_same(self.hunter.pos, self.target.pos):
+            self.winner = "HUNTER"
+        if self.winner is not None and self.events:
+            self.events.emit(Winner(self.step_counter, self.winner))
+
+    def move_actor(self, actor: Actor, p: Vec) -> None:
+        """Move `actor` to `p`, collecting power-ups and burning in fire."""
+        if self.events:
+            self._emit_move(actor, p)
+        actor.move(p, self)
+        if self.fire and self.fire.cell_in_fire(actor.pos):
+            self.kill_actor(actor)
+
+    def _emit_move(self, actor: Actor, p: Vec) -> None:
+        assert self.events
+        self.events.emit(Move(self.step_counter, actor.name, *p))
+        pu = self.powerups.at(p)
+        if pu is not None and pu.active:
+            self.events.emit(PowerUpCollected(self.step_counter, type(pu).__name__, actor.name, *p))
+
+    def fire_timers(self) -> Dict[Vec, int]:
+        """Burning cells and the sub-turns until each goes out."""
+        fires = {}
+        if self.fire:
+            for f in self.fire.fires.values():
+                for c in f.cells:
+                    fires[c] = f.expires_at - self.step_counter
+        return fires
+
+    def policy_move(self, actor: Actor) -> Vec:
+        """The move of the policy playing `actor`'s seat; staying put if it is not legal."""
+        p = self.policies[actor.name].decide(self, actor)
+        if p == actor.pos or (cheb(p, actor.pos) == 1 and in_bounds(p, self.cfg.grid_w, self.cfg.grid_h)
+                              and not (self.obstacles_enabled and p in self.obstacles)):
+            return p
+        return actor.pos
+
+    def hunter_decide(self) -> Vec:
+        assert self.hunter and self.target
+        with self._phase("decide.hunter"):
+            if "HUNTER" in self.policies:
+                return self.policy_move(self.hunter)
+            return self.hunter.decide(self.target.pos, self.cfg.grid_w, self.cfg.grid_h, self.obstacles,
+                                      self.obstacles_enabled, self.obstacles_rev)
+
+    def target_decide(self) -> Vec:
+        with self._phase("decide.target"):
+            if "TARGET" in self.policies:
+                assert self.target
+                return self.policy_move(self.target)
+            return self._target_decide()
+
+    def _target_decide(self) -> Vec:
+        assert self.human and self.hunter and self.target
+        return self.target.decide(self.human.pos if self.human.alive else None,
+                                  self.hunter.pos if self.hunter.alive else None,
+                                  self.cfg.grid_w, self.cfg.grid_h, self.obstacles, self.obstacles_enabled,
+                                  self.fire_timers(), self.powerups)
+
+    def step(self, action: Optional[Vec] = None) -> bool:
+        """Resolve one sub-turn; returns False if nothing happened.
+
+        `action` is only consulted on the human's sub-turn, where None means
+        "no input yet" (or "ask the HUMAN policy", if one is plugged in) and
+        SKIP passes the turn.
+        """
+        if self.winner is not None:
+            return False
+        assert self.human and self.hunter and self.target
+        current = self.current
+        if current.skip_turns > 0:
+            current.skip_turns -= 1
+            if current.speed_turns > 0:
+                current.speed_turns -= 1
+            self.advance_turn(); self.post_step()
+        elif current is self.human:
+            if not self.human.alive:
+                # human is dead; turns auto-advance while respawning
+                self.advance_turn(); self.post_step()
+            elif action is None and "HUMAN" not in self.policies:
+                return False
+            else:
+                if action is None:
+                    p = self.policy_move(self.human)
+                    action = (p[0] - self.human.pos[0], p[1] - self.human.pos[1])
+                code = ACTION_INDEX.get(action)
+                if code is None:
+                    raise ValueError(f"not a human action: {action!r}")
+                if not self._human_turn(None if action == SKIP else action):
+                    return False
+                self.inputs.append(code)
+        elif current is self.hunter:
+            if self.hunter.alive:
+                self.move_actor(self.hunter, self.hunter_decide())
+                if self.hunter.alive and self.hunter.speed_turns > 0:
+                    self.move_actor(self.hunter, self.hunter_decide())
+                if self.hunter.speed_turns > 0:
+                    self.hunter.speed_turns -= 1
+            self.advance_turn(); self.check_win_after_move(); self.post_step()
+        elif current is self.target:
+            if self.target.alive:
+                nxt = self.target_decide()
+                self.move_actor(self.target, nxt)
+                if self.target.alive and self.target.speed_turns > 0:
+                    nxt = self.target_decide()
+                    self.move_actor(self.target, nxt)
+                if self.target.speed_turns > 0:
+                    self.target.speed_turns -= 1
+            self.advance_turn(); self.check_win_after_move(); self.post_step()
+        return True
+
+    def _human_turn(self, delta: Optional[Vec]) -> bool:
+        assert self.human
+        w, h = self.cfg.grid_w, self.cfg.grid_h
+        if not self.human.try_move(delta, w, h, self.obstacles, self.obstacles_enabled):
+            return False
+        self.move_actor(self.human, self.human.pos)
+        if self.human.alive and self.human.speed_turns > 0 and delta is not None:
+            if self.human.try_move(delta, w, h, self.obstacles, self.obstacles_enabled):
+                self.move_actor(self.human, self.human.pos)
+        if self.human.speed_turns > 0:
+            self.human.speed_turns -= 1
+        self.advance_turn()
+        self.check_win_after_move()
+        self.post_step()
+        return True
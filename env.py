@@ -0,0 +1,241 @@
+"""Reinforcement-learning environment for the human seat.
+
+`HumanEnv` wraps Engine so that one `step(action)` is one human decision:
+the action (an index into engine.ACTIONS, i.e. the QWE/ASD/ZXC keys) is
+applied, then the CPU sub-turns run until the human has to act again or the
+round ends. The reward is +1 when the human catches the target and -1 when
+the hunter does. The API follows gymnasium (`reset` → (obs, info), `step` →
+(obs, reward, terminated, truncated, info)); if gymnasium is installed the
+env is a real `gymnasium.Env` with spaces.
+
+Observations are (PLANES, grid_h, grid_w) uint8 0/1 planes.
+
+`SyncVectorEnv` steps n copies in-process. `AsyncVectorEnv` spreads them
+over worker processes that write observations straight into one
+shared-memory block, so only actions, rewards and flags cross the pipes.
+Both restart finished copies automatically; the observation returned for a
+finished copy is already the first one of its next round.
+"""
+from __future__ import annotations
+import multiprocessing as mp
+import os, random
+from multiprocessing import shared_memory
+from multiprocessing.connection import Connection
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+from config import Config
+from engine import Engine, ACTIONS, SKIP
+from powerups import SpeedPowerUp
+
+try:
+    import gymnasium as gym
+    from gymnasium import spaces
+except ImportError:  # optional: same API without the base class and spaces
+    gym = None
+
+# observation planes
+(OBS_ROCK, OBS_TREE, OBS_FIRE, OBS_SPEED_UP, OBS_TIME_STOP,
+ OBS_HUMAN, OBS_HUNTER, OBS_TARGET) = range(8)
+PLANES = 8
+
+REWARDS = {"HUMAN": 1.0, "HUNTER": -1.0}
+
+
+class HumanEnv(gym.Env if gym else object):  # type: ignore[misc]
+    """
+    The human seat of one Engine. A blocked move is played as SKIP (info
+    "illegal" is set) so every step advances the round. Rounds longer than
+    `max_steps` sub-turns are truncated.
+    """
+    metadata: Dict[str, Any] = {"render_modes": []}
+
+    def __init__(self, cfg: Optional[Config] = None, max_steps: int = 20000) -> None:
+        self.cfg = cfg or Config.load()
+        self.max_steps = max_steps
+        self.world = Engine(self.cfg)
+        self._seeds: Optional[random.Random] = None
+        self.shape = (PLANES, self.cfg.grid_h, self.cfg.grid_w)
+        if gym:
+            self.observation_space = spaces.Box(0, 1, self.shape, np.uint8)
+            self.action_space = spaces.Discrete(len(ACTIONS))
+
+    def reset(self, *, seed: Optional[int] = None, options: Optional[dict] = None,
+              out: Optional[np.ndarray] = None) -> Tuple[np.ndarray, Dict[str, Any]]:
+        # a seed fixes this round and the seeds of the rounds that follow
+        if seed is not None:
+            self._seeds = random.Random(seed)
+        self.world.init_world(self._seeds.getrandbits(63) if self._seeds else None)
+        self._run_cpu()
+        return self.observe(out), self._info()
+
+    def step(self, action: int, out: Optional[np.ndarray] = None
+             ) -> Tuple[np.ndarray, float, bool, bool, Dict[str, Any]]:
+        world = self.world
+        illegal = False
+        if world.awaiting_human():
+            illegal = not world.step(ACTIONS[int(action)])
+            if illegal:
+                world.step(SKIP)
+        self._run_cpu()
+        terminated = world.winner is not None
+        truncated = not terminated and world.step_counter >= self.max_steps
+        info = self._info()
+        info["illegal"] = illegal
+        return self.observe(out), REWARDS.get(world.winner or "", 0.0), terminated, truncated, info
+
+    def _run_cpu(self) -> None:
+        # CPU sub-turns, and the human's own while dead or frozen
+        world = self.world
+        while world.winner is None and not world.awaiting_human() and world.step_counter < self.max_steps:
+            world.step()
+
+    def _info(self) -> Dict[str, Any]:
+        world = self.world
+        return {"steps": world.step_counter, "winner": world.winner}
+
+    def observe(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Fill `out` (or a new array) with the current observation planes."""
+        world = self.world
+        obs = np.zeros(self.shape, np.uint8) if out is None else out
+        obs.fill(0)
+        if world.obstacles_enabled:
+            for (x, y) in world.obstacles:
+                obs[OBS_TREE if world.obstacles_styles.get((x, y)) == 'tree' else OBS_ROCK, y, x] = 1
+        if world.fire:
+            for (x, y) in world.fire.burning_cells():
+                obs[OBS_FIRE, y, x] = 1
+        for pu in world.powerups:
+            if pu.active:
+                obs[OBS_SPEED_UP if isinstance(pu, SpeedPowerUp) else OBS_TIME_STOP, pu.pos[1], pu.pos[0]] = 1
+        for plane, a in ((OBS_HUMAN, world.human), (OBS_HUNTER, world.hunter), (OBS_TARGET, world.target)):
+            if a and a.alive:
+                obs[plane, a.pos[1], a.pos[0]] = 1
+        return obs
+
+
+class SyncVectorEnv:
+    """n HumanEnvs stepped in turn; observations land in one (n, ...) array."""
+    def __init__(self, n: int, cfg: Optional[Config] = None, max_steps: int = 20000,
+                 out: Optional[np.ndarray] = None) -> None:
+        self.envs = [HumanEnv(cfg, max_steps) for _ in range(n)]
+        self.num_envs = n
+        self.obs = np.zeros((n, *self.envs[0].shape), np.uint8) if out is None else out
+
+    def reset(self, seed: Optional[int] = None) -> Tuple[np.ndarray, List[Dict[str, Any]]]:
+        infos = []
+        for i, env in enumerate(self.envs):
+            infos.append(env.reset(seed=None if seed is None else seed + i, out=self.obs[i])[1])
+        return self.obs, infos
+
+    def step(self, actions: Sequence[int]
+             ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, List[Dict[str, Any]]]:
+        n = self.num_envs
+        rewards = np.zeros(n, np.float32)
+        terminated = np.zeros(n, bool)
+        truncated = np.zeros(n, bool)
+        infos = []
+        for i, env in enumerate(self.envs):
+            _, rewards[i], terminated[i], truncated[i], info = env.step(actions[i], out=self.obs[i])
+            if terminated[i] or truncated[i]:
+                # the finished round's result stays in info; obs is the next round's
+                env.reset(out=self.obs[i])
+            infos.append(info)
+        return self.obs, rewards, terminated, truncated, infos
+
+    def close(self) -> None:
+        pass
+
+
+def _worker(conn: Connection, cfg: Config, max_steps: int, shm_name: str,
+            shape: Tuple[int, ...], lo: int, hi: int) -> None:
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        obs = np.ndarray(shape, np.uint8, buffer=shm.buf)
+        envs = SyncVectorEnv(hi - lo, cfg, max_steps, out=obs[lo:hi])
+        while True:
+            cmd, arg = conn.recv()
+            if cmd == "step":
+                conn.send(envs.step(arg)[1:])
+            elif cmd == "reset":
+                conn.send(envs.reset(arg)[1])
+            else:
+                break
+        del obs, envs  # release views of shm.buf before closing it
+    finally:
+        shm.close()
+        conn.close()
+
+
+class AsyncVectorEnv:
+    """
+    n HumanEnvs split over `workers` processes. `step_async`/`step_wait`
+    let the caller overlap its own work (e.g. the next forward pass) with
+    the simulation; `step` does both. The observation array is shared with
+    the workers and overwritten by every step.
+    """
+    def __init__(self, n: int, cfg: Optional[Config] = None, max_steps: int = 20000,
+                 workers: Optional[int] = None) -> None:
+        cfg = cfg or Config.load()
+        self.num_envs = n
+        shape = (n, PLANES, cfg.grid_h, cfg.grid_w)
+        self._shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)))
+        self.obs = np.ndarray(shape, np.uint8, buffer=self._shm.buf)
+        workers = max(1, min(n, workers or os.cpu_count() or 1))
+        bounds = [n * k // workers for k in range(workers + 1)]
+        self._slices = list(zip(bounds, bounds[1:]))
+        self._conns: List[Connection] = []
+        self._procs: List[mp.Process] = []
+        for lo, hi in self._slices:
+            parent, child = mp.Pipe()
+            p = mp.Process(target=_worker, args=(child, cfg, max_steps, self._shm.name, shape, lo, hi), daemon=True)
+            p.start()
+            child.close()
+            self._conns.append(parent)
+            self._procs.append(p)
+
+    def reset(self, seed: Optional[int] = None) -> Tuple[np.ndarray, List[Dict[str, Any]]]:
+        for conn, (lo, _) in zip(self._conns, self._slices):
+            conn.send(("reset", None if seed is None else seed + lo))
+        infos: List[Dict[str, Any]] = []
+        for conn in self._conns:
+            infos += conn.recv()
+        return self.obs, infos
+
+    def step_async(self, actions: Sequence[int]) -> None:
+        actions = [int(a) for a in actions]
+        for conn, (lo, hi) in zip(self._conns, self._slices):
+            conn.send(("step", actions[lo:hi]))
+
+    def step_wait(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, List[Dict[str, Any]]]:
+        parts = [conn.recv() for conn in self._conns]
+        rewards = np.concatenate([p[0] for p in parts])
+        terminated = np.concatenate([p[1] for p in parts])
+        truncated = np.concatenate([p[2] for p in parts])
+        infos = [info for p in parts for info in p[3]]
+        return self.obs, rewards, terminated, truncated, infos
+
+    def step(self, actions: Sequence[int]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, List[Dict[str, Any]]]:
+        self.step_async(actions)
+        return self.step_wait()
+
+    def close(self) -> None:
+        if not self._procs:
+            return
+        for conn in self._conns:
+            try:
+                conn.send(("close", None))
+            except (BrokenPipeError, OSError):
+                pass
+        for p in self._procs:
+            p.join(timeout=5)
+        self._procs.clear()
+        del self.obs
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self) -> 'AsyncVectorEnv':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
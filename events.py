@@ -0,0 +1,191 @@
+"""Typed round events, the engine's event bus and an append-only event log.
+
+An Engine with `events` set emits one event per thing that happens in a
+round (moves, deaths, respawns, fires, burned trees, power-ups, the winner);
+with `events` left at None nothing is built. `EventLog` subscribes to a bus
+and appends the events to a newline-delimited JSON file, e.g.
+
+    {"t": "move", "round": 42, "step": 17, "actor": "HUNTER", "x": 3, "y": 9}
+
+`round` is the seed of the round the event belongs to, so logs of many
+rounds (and of many batch workers) can be concatenated and grouped. Events
+are collected in batches on the game's thread; encoding and writing happen
+on a background thread, and at most `max_pending` batches wait for it, so a
+slow disk holds the turn loop back instead of growing the buffer.
+"""
+from __future__ import annotations
+import json, queue, threading
+from dataclasses import dataclass
+from typing import Callable, ClassVar, List, Optional
+
+from utils import Vec
+
+
+@dataclass
+class Event:
+    kind: ClassVar[str] = "event"
+    step: int
+
+
+@dataclass
+class RoundStart(Event):
+    kind: ClassVar[str] = "round_start"
+    seed: int
+    w: int
+    h: int
+
+
+@dataclass
+class Move(Event):
+    kind: ClassVar[str] = "move"
+    actor: str
+    x: int
+    y: int
+
+
+@dataclass
+class Kill(Event):
+    kind: ClassVar[str] = "kill"
+    actor: str
+    x: int
+    y: int
+
+
+@dataclass
+class Respawn(Event):
+    kind: ClassVar[str] = "respawn"
+    actor: str
+    x: int
+    y: int
+
+
+@dataclass
+class FireSpawned(Event):
+    kind: ClassVar[str] = "fire_spawned"
+    x: int                  # top-left of the 2×2 block
+    y: int
+    expires_at: int
+
+
+@dataclass
+class FireExpired(Event):
+    kind: ClassVar[str] = "fire_expired"
+    x: int
+    y: int
+
+
+@dataclass
+class TreesBurned(Event):
+    kind: ClassVar[str] = "trees_burned"
+    cells: List[Vec]
+
+
+@dataclass
+class PowerUpSpawned(Event):
+    kind: ClassVar[str] = "powerup_spawned"
+    powerup: str            # class name, e.g. "SpeedPowerUp"
+    x: int
+    y: int
+    expires_at: int
+
+
+@dataclass
+class PowerUpCollected(Event):
+    kind: ClassVar[str] = "powerup_collected"
+    powerup: str
+    actor: str
+    x: int
+    y: int
+
+
+@dataclass
+class PowerUpExpired(Event):
+    kind: ClassVar[str] = "powerup_expired"
+    powerup: str
+    x: int
+    y: int
+
+
+@dataclass
+class Winner(Event):
+    kind: ClassVar[str] = "winner"
+    winner: str
+
+
+Subscriber = Callable[[Event], None]
+
+
+class EventBus:
+    """Calls every subscriber with each emitted event, in subscription order."""
+
+    def __init__(self) -> None:
+        self._subscribers: List[Subscriber] = []
+
+    def subscribe(self, fn: Subscriber) -> None:
+        self._subscribers.append(fn)
+
+    def unsubscribe(self, fn: Subscriber) -> None:
+        self._subscribers.remove(fn)
+
+    def emit(self, ev: Event) -> None:
+        for fn in self._subscribers:
+            fn(ev)
+
+
+class EventLog:
+    """
+    Bus subscriber appending events to `path` as NDJSON (gzip-compressed if
+    the name ends in .gz). A batch is handed to the writer thread when it
+    holds `batch_size` events and at the end of every round; `close` writes
+    what is left and waits for the thread.
+    """
+
+    def __init__(self, path: str, batch_size: int = 4096, max_pending: int = 8) -> None:
+        self.path = path
+        self.batch_size = batch_size
+        if path.endswith(".gz"):
+            import gzip
+            self._file = gzip.open(path, "at", encoding="utf-8")
+        else:
+            self._file = open(path, "a", encoding="utf-8")
+        self._batch: List[Event] = []
+        self._pending: "queue.Queue[Optional[List[Event]]]" = queue.Queue(max_pending)
+        self._writer = threading.Thread(target=self._write_batches, name="event-log", daemon=True)
+        self._writer.start()
+        self.closed = False
+
+    def __call__(self, ev: Event) -> None:
+        self._batch.append(ev)
+        if len(self._batch) >= self.batch_size or isinstance(ev, Winner):
+            self.flush()
+
+    def flush(self) -> None:
+        """Hand the collected events to the writer (blocks while it is `max_pending` batches behind)."""
+        if self._batch:
+            self._pending.put(self._batch)
+            self._batch = []
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self.flush()
+        self._pending.put(None)
+        self._writer.join()
+        self._file.close()
+
+    def _write_batches(self) -> None:
+        rnd = None
+        dumps = json.dumps
+        while True:
+            batch = self._pending.get()
+            if batch is None:
+                return
+            lines = []
+            for ev in batch:
+                if type(ev) is RoundStart:
+                    rnd = ev.seed
+                lines.append(dumps({"t": ev.kind, "round": rnd, **ev.__dict__}))
+            lines.append("")
+            self._file.write("\n".join(lines))
+            self._file.flush()
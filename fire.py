@@ -1,8 +1,19 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import List, Set, Dict
-import random
-from utils import Vec, cheb
+from typing import Callable, KeysView, List, Optional, Set, Dict, Tuple, TYPE_CHECKING
+from collections import OrderedDict
+from itertools import accumulate, compress, count, repeat
+from operator import add, or_, sub
+from array import array
+import heapq, random
+from utils import Vec
+
+# fires may only start within this Chebyshev distance of a tree
+TREE_REACH = 8
+
+if TYPE_CHECKING:
+    import pygame
+    from freecells import FreeCells
 
 @dataclass
 class Fire:
@@ -11,176 +22,367 @@ class Fire:
     expires_at: int
 
 class FireSystem:
-    def __init__(self, cfg, w: int, h: int):
+    def __init__(self, cfg, w: int, h: int, rng: Optional[random.Random] = None):
         self.cfg = cfg
         self.w = w
         self.h = h
-        self.fires: List[Fire] = []
+        self.rng = rng or random
+        # live fires by anchor (insertion ordered), plus a cell → fire index and
+        # a min-heap of (expires_at, anchor) so lookups and expiry stay O(1)/O(log n)
+        self.fires: Dict[Vec, Fire] = {}
+        self._burning: Dict[Vec, Fire] = {}
+        self._expiry: List[Tuple[int, Vec]] = []
+        self.spawned: int = 0   # fires started since construction
+        # Tree proximity: _tree_cover[y*w+x] counts trees within TREE_REACH of
+        # (x, y). Anchors whose 2×2 block touches a covered cell are kept in an
+        # indexable set (_anchors + _anchor_idx) so maybe_spawn can sample them.
+        self._trees_src: Optional[Dict[Vec, str]] = None
+        self._tree_cover = array('H')
+        self._anchors: List[Vec] = []
+        self._anchor_idx: Dict[Vec, int] = {}
+        # called with the cells of trees destroyed by a new fire
+        self.on_burn: Optional[Callable[[List[Vec]], None]] = None
+        # the engine's spawn index, kept in step with the burning cells when set
+        self.free_cells: Optional[FreeCells] = None
+        # sprite cache for draw calls that do not pass their own
+        self._sprites: Optional[FlameSprites] = None
 
     def clear(self) -> None:
+        if self.free_cells is not None:
+            self.free_cells.uncover(self._burning)
         self.fires.clear()
+        self._burning.clear()
+        self._expiry.clear()
 
-    def update(self, step_counter: int) -> None:
-        self.fires = [f for f in self.fires if step_counter < f.expires_at]
+    def update(self, step_counter: int) -> List[Fire]:
+        """Put out the fires due by `step_counter`; returns them."""
+        # anchors are unique among live fires, so every heap entry is current
+        expired: List[Fire] = []
+        while self._expiry and self._expiry[0][0] <= step_counter:
+            _, top_left = heapq.heappop(self._expiry)
+            f = self.fires.pop(top_left)
+            for c in f.cells:
+                del self._burning[c]
+            if self.free_cells is not None:
+                self.free_cells.uncover(f.cells)
+            expired.append(f)
+        return expired
 
     def rect_cells(self, top_left: Vec) -> List[Vec]:
         x, y = top_left
         return [(x, y), (x+1, y), (x, y+1), (x+1, y+1)]
 
     def cell_in_fire(self, p: Vec) -> bool:
-        for f in self.fires:
-            if p in f.cells:
-                return True
-        return False
+        return p in self._burning
+
+    def fire_at(self, p: Vec) -> Optional[Fire]:
+        return self._burning.get(p)
+
+    def burning_cells(self) -> KeysView[Vec]:
+        """Every cell covered by a live fire (a live view; copy it to keep it)."""
+        return self._burning.keys()
 
     def can_place_fire(self, top_left: Vec, obstacles_styles: Dict[Vec, str]) -> bool:
+        if not self._free_block(top_left):
+            return False
+        # must be within 8 cells (Chebyshev) of at least one tree
+        self._sync_trees(obstacles_styles)
+        return top_left in self._anchor_idx
+
+    def _free_block(self, top_left: Vec) -> bool:
         x, y = top_left
         if x < 0 or y < 0 or x+1 >= self.w or y+1 >= self.h:
             return False
-        cells = self.rect_cells(top_left)
         # avoid overlapping existing fires
-        for f in self.fires:
-            if any(c in f.cells for c in cells):
-                return False
-        # must be within 8 cells (Chebyshev) of at least one tree
-        tree_cells = [p for p, sty in obstacles_styles.items() if sty == 'tree']
-        if not tree_cells:
-            return False
-        for c in cells:
-            if any(cheb(c, t) <= 8 for t in tree_cells):
-                return True
+        return not any(c in self._burning for c in self.rect_cells(top_left))
+
+    def _near_tree(self, top_left: Vec, obstacles: Set[Vec], obstacles_styles: Dict[Vec, str]) -> bool:
+        # the tree-cover rule of can_place_fire, checked on the spot
+        x, y, r = top_left[0], top_left[1], TREE_REACH
+        for ty in range(y - r, y + r + 2):
+            for tx in range(x - r, x + r + 2):
+                t = (tx, ty)
+                if t in obstacles and obstacles_styles.get(t) == 'tree':
+                    return True
         return False
 
+    # ------------ tree proximity ------------
+    def _sync_trees(self, obstacles_styles: Dict[Vec, str]) -> None:
+        # The engine swaps in a new styles dict whenever obstacles are
+        # regenerated; in-place changes only come from spawn_at's burning.
+        if obstacles_styles is not self._trees_src:
+            self.set_trees(obstacles_styles)
+
+    def set_trees(self, obstacles_styles: Dict[Vec, str]) -> None:
+        """Rebuild the tree cover field with a separable box count (two passes)."""
+        w, h, r = self.w, self.h, TREE_REACH
+        self._trees_src = obstacles_styles
+        rows = [[0] * w for _ in range(h)]
+        for (x, y), sty in obstacles_styles.items():
+            if sty == 'tree':
+                rows[y][x] = 1
+        # horizontal pass: trees within r columns, as whole-row slices of the prefix sums
+        for y in range(h):
+            pre = [0, *accumulate(rows[y])]
+            hi = (pre[r+1:] + [pre[w]] * r)[:w]          # pre[min(w, x + r + 1)]
+            lo = ([0] * r + pre[:max(0, w - r)])[:w]      # pre[max(0, x - r)]
+            rows[y] = list(map(sub, hi, lo))
+        # vertical pass over running column sums
+        col = [[0] * w]
+        for row in rows:
+            col.append(list(map(add, col[-1], row)))
+        cover = array('H')
+        for y in range(h):
+            cover.extend(map(sub, col[min(h, y + r + 1)], col[max(0, y - r)]))
+        self._tree_cover = cover
+
+        # anchors in row-major order: a covered cell in the 2×2 block
+        anchors: List[Vec] = []
+        for y in range(h - 1):
+            rows_or = list(map(or_, cover[y*w:(y+1)*w], cover[(y+1)*w:(y+2)*w]))
+            ok = map(or_, rows_or[:-1], rows_or[1:])
+            anchors.extend(zip(compress(range(w - 1), ok), repeat(y)))
+        self._anchors = anchors
+        self._anchor_idx = dict(zip(anchors, count()))
+
+    def _remove_tree(self, t: Vec) -> None:
+        w, h, r = self.w, self.h, TREE_REACH
+        cover = self._tree_cover
+        uncovered: List[Vec] = []
+        for y in range(max(0, t[1] - r), min(h, t[1] + r + 1)):
+            for x in range(max(0, t[0] - r), min(w, t[0] + r + 1)):
+                i = y * w + x
+                cover[i] -= 1
+                if not cover[i]:
+                    uncovered.append((x, y))
+        # anchors touching a newly uncovered cell may have lost eligibility
+        for (cx, cy) in uncovered:
+            for a in ((cx-1, cy-1), (cx, cy-1), (cx-1, cy), (cx, cy)):
+                if a in self._anchor_idx:
+                    i = a[1] * w + a[0]
+                    if not (cover[i] or cover[i+1] or cover[i+w] or cover[i+w+1]):
+                        self._drop_anchor(a)
+
+    def _drop_anchor(self, a: Vec) -> None:
+        i = self._anchor_idx.pop(a)
+        last = self._anchors.pop()
+        if last != a:
+            self._anchors[i] = last
+            self._anchor_idx[last] = i
+
     def spawn_at(self, top_left: Vec, step_counter: int, obstacles: Set[Vec], obstacles_styles: Dict[Vec, str]) -> bool:
         if not self.can_place_fire(top_left, obstacles_styles):
             return False
+        self._ignite(top_left, step_counter, obstacles, obstacles_styles)
+        return True
+
+    def _ignite(self, top_left: Vec, step_counter: int, obstacles: Set[Vec], obstacles_styles: Dict[Vec, str]) -> None:
         cells = self.rect_cells(top_left)
         # destroy trees inside the fire area (rocks survive)
+        burned: List[Vec] = []
         for c in cells:
             if c in obstacles and obstacles_styles.get(c) == 'tree':
                 obstacles.remove(c)
                 obstacles_styles.pop(c, None)
+                if self._trees_src is not None:
+                    self._remove_tree(c)
+                burned.append(c)
+        if burned and self.on_burn:
+            self.on_burn(burned)
+        self.place(top_left, step_counter + self.cfg.fire_lifetime)
+        self.spawned += 1
+
+    def place(self, top_left: Vec, expires_at: int) -> Fire:
+        """Add a fire as-is (no placement rules, no burning); used to restore states."""
         # store as ONE fire instance
-        self.fires.append(Fire(top_left=top_left, cells=cells, expires_at=step_counter + self.cfg.fire_lifetime))
-        return True
+        fire = Fire(top_left=top_left, cells=self.rect_cells(top_left), expires_at=expires_at)
+        self.fires[top_left] = fire
+        for c in fire.cells:
+            self._burning[c] = fire
+        if self.free_cells is not None:
+            self.free_cells.cover(fire.cells)
+        heapq.heappush(self._expiry, (expires_at, top_left))
+        return fire
 
     def maybe_spawn(self, step_counter: int, obstacles: Set[Vec], obstacles_styles: Dict[Vec, str]) -> bool:
         if len(self.fires) >= self.cfg.fire_max:
             return False
-        if random.random() > self.cfg.fire_spawn_chance:
+        if self.rng.random() > self.cfg.fire_spawn_chance:
             return False
-        # try a handful of random locations
+        # try a handful of anchors near trees (only overlap with fires can fail)
+        self._sync_trees(obstacles_styles)
         for _ in range(30):
-            x = random.randrange(0, self.w-1)
-            y = random.randrange(0, self.h-1)
-            if self.spawn_at((x, y), step_counter, obstacles, obstacles_styles):
+            if not self._anchors:
+                break
+            if self.spawn_at(self.rng.choice(self._anchors), step_counter, obstacles, obstacles_styles):
                 return True
         return False
 
-    def draw(self, screen, cfg, step_counter: int) -> None:
+    def maybe_spawn_in(self, rect: Tuple[int, int, int, int], step_counter: int, obstacles: Set[Vec],
+                       obstacles_styles: Dict[Vec, str]) -> bool:
+        """
+        maybe_spawn for large worlds: anchors are drawn inside `rect`
+        (x0, y0, x1, y1) and checked for a nearby tree on the spot, so no
+        board-sized tree index is built.
+        """
+        if len(self.fires) >= self.cfg.fire_max:
+            return False
+        if self.rng.random() > self.cfg.fire_spawn_chance:
+            return False
+        x0, y0, x1, y1 = rect
+        for _ in range(30):
+            a = (self.rng.randrange(x0, x1 - 1), self.rng.randrange(y0, y1 - 1))
+            if self._free_block(a) and self._near_tree(a, obstacles, obstacles_styles):
+                self._ignite(a, step_counter, obstacles, obstacles_styles)
+                return True
+        return False
+
+    def draw(self, screen, cfg, step_counter: int, sprites: Optional[FlameSprites] = None,
+             origin: Vec = (0, 0)) -> None:
         """
         Draw ONE large flame per 2×2 fire, with a soft dark drop-shadow.
+        Without a `sprites` cache, the fire system's own (bounded) one is used.
+        `origin` is the board cell at the screen's top-left; fires off
+        screen are skipped.
         """
-        import pygame
         cell = cfg.cell
-        # Palette with sensible fallbacks
-        col_orange = cfg.colors.get('fire_orange', cfg.colors.get('fire_core', (255, 120, 40)))
-        col_yellow = cfg.colors.get('fire_yellow', cfg.colors.get('fire_glow', (255, 200, 60)))
-        col_red    = cfg.colors.get('fire_red',    (220, 70, 50))
-        col_white  = cfg.colors.get('fire_white',  (255, 245, 220))
-        col_shadow = cfg.colors.get('fire_shadow', (0, 0, 0))
-
-        def flame_surface(size: int, seedx: int, seedy: int, t: int) -> pygame.Surface:
-            # Off-screen surface sized to cover the full 2×2 area
-            surf = pygame.Surface((size, size), pygame.SRCALPHA)
-            # Deterministic flicker so each fire has a stable, lively motion
-            h = (seedx*73856093 ^ seedy*19349663 ^ t*83492791) & 0xffffffff
-            def rand01():
-                nonlocal h
-                h ^= (h << 13) & 0xffffffff
-                h ^= (h >> 17) & 0xffffffff
-                h ^= (h << 5)  & 0xffffffff
-                return (h & 0xffff) / 65535.0
-
-            # Base geometry scaled to the 2x2 size
-            wobble = int(rand01() * (size * 0.06))
-            base_w = max(4, int(size * 0.55) - wobble)
-            base_h = max(4, int(size * 0.35) - wobble // 2)
-
-            # 1) Soft radial glow
-            glow_r = int(max(size * 0.45, base_w * 0.55))
-            pygame.draw.circle(surf, (*col_yellow, 120), (size // 2, size // 2), glow_r)
-
-            # 2) Ember base (red ellipse at bottom)
-            pygame.draw.ellipse(
-                surf, (*col_red, 220),
-                (size // 2 - base_w // 2, size - base_h - 4, base_w, base_h)
-            )
-
-            # 3) Outer flame body (teardrop-ish polygon)
-            tip_x = size // 2 + int((rand01() - 0.5) * (size * 0.06))
-            tip_y = 4 + int(rand01() * 4)
-            left   = (size // 2 - base_w // 2, size - base_h - 4)
-            right  = (size // 2 + base_w // 2, size - base_h - 4)
-            midL   = (left[0]  + int(base_w * 0.16), size - int(base_h * 0.60))
-            midR   = (right[0] - int(base_w * 0.16), size - int(base_h * 0.60))
-            body   = [ (tip_x, tip_y), midR, right, (size // 2, size - 4), left, midL ]
-            pygame.draw.polygon(surf, (*col_orange, 255), body)
-
-            # 4) Inner bright flame (smaller teardrop)
-            inner_w = int(base_w * 0.50)
-            inner_h = int(base_h * 0.70)
-            inner_tip   = (tip_x, tip_y + 3)
-            inner_left  = (size // 2 - inner_w // 2, size - inner_h - 6)
-            inner_right = (size // 2 + inner_w // 2, size - inner_h - 6)
-            inner_midL  = (inner_left[0]  + int(inner_w * 0.18), size - int(inner_h * 0.58))
-            inner_midR  = (inner_right[0] - int(inner_w * 0.18), size - int(inner_h * 0.58))
-            inner       = [ inner_tip, inner_midR, inner_right, (size // 2, size - 6), inner_left, inner_midL ]
-            pygame.draw.polygon(surf, (*col_yellow, 255), inner)
-
-            # 5) White-hot core
-            core_w = max(3, int(inner_w * 0.35))
-            core_h = max(3, int(inner_h * 0.35))
-            pygame.draw.ellipse(
-                surf, (*col_white, 230),
-                (size // 2 - core_w // 2, size - inner_h - core_h, core_w, core_h)
-            )
-            return surf
-
-        def shadow_surface(size: int, seedx: int, seedy: int, t: int) -> pygame.Surface:
-            """
-            Soft drop-shadow roughly matching the flame silhouette.
-            Slightly larger and lower, drawn with high transparency.
-            """
-            import pygame
-            surf = pygame.Surface((size, size), pygame.SRCALPHA)
-            # light “breathing” jitter tied to time
-            h = (seedx*2654435761 ^ seedy*974634777 ^ t*19349663) & 0xffffffff
-            def rand01():
-                nonlocal h
-                h ^= (h << 13) & 0xffffffff; h ^= (h >> 17) & 0xffffffff; h ^= (h << 5) & 0xffffffff
-                return (h & 0xffff) / 65535.0
-
-            base_w = max(4, int(size * 0.62))
-            base_h = max(4, int(size * 0.40))
-            glow_r = int(max(size * 0.48, base_w * 0.58))
-            pygame.draw.circle(surf, (*col_shadow, 90), (size // 2, size // 2 + 2), glow_r)
-            pygame.draw.ellipse(surf, (*col_shadow, 110),
-                (size // 2 - base_w // 2, size - base_h, base_w, base_h))
-            tip_x = size // 2 + int((rand01() - 0.5) * (size * 0.04)); tip_y = 6
-            left  = (size // 2 - base_w // 2, size - base_h)
-            right = (size // 2 + base_w // 2, size - base_h)
-            midL  = (left[0]  + int(base_w * 0.16), size - int(base_h * 0.65))
-            midR  = (right[0] - int(base_w * 0.16), size - int(base_h * 0.65))
-            body  = [ (tip_x, tip_y), midR, right, (size // 2, size - 2), left, midL ]
-            pygame.draw.polygon(surf, (*col_shadow, 80), body)
-            return surf
-
-        for f in self.fires:
+        if sprites is None:
+            if self._sprites is None:
+                self._sprites = FlameSprites(cfg, maxsize=max(16, 4 * cfg.fire_max))
+            sprites = self._sprites
+        sw, sh = screen.get_size()
+        for f in self.fires.values():
             # Draw a single, large flame covering the whole 2×2 area
             size = cell * 2
-            rx, ry = f.top_left[0] * cell, f.top_left[1] * cell
+            rx, ry = (f.top_left[0] - origin[0]) * cell, (f.top_left[1] - origin[1]) * cell
+            if rx >= sw or ry >= sh or rx + 2 * size <= 0 or ry + 2 * size <= 0:
+                continue
+            shadow, flame = sprites.get(size, f.top_left, step_counter)
             # Shadow first (slight offset), then flame
-            screen.blit(shadow_surface(size, f.top_left[0], f.top_left[1], step_counter),
-                        (rx + max(1, cell // 6), ry + max(1, cell // 5)))
-            screen.blit(flame_surface(size, f.top_left[0], f.top_left[1], step_counter), (rx, ry))
+            screen.blit(shadow, (rx + max(1, cell // 6), ry + max(1, cell // 5)))
+            screen.blit(flame, (rx, ry))
+
+
+class FlameSprites:
+    """
+    Bounded LRU cache of (shadow, flame) surfaces. A sprite depends only on
+    (size, top_left, step_counter), so frames between sub-turns are pure hits.
+    `hits`/`misses` count lookups; `maxsize=0` disables caching.
+    """
+    def __init__(self, cfg, maxsize: int = 0):
+        # Palette with sensible fallbacks
+        self.col_orange = cfg.colors.get('fire_orange', cfg.colors.get('fire_core', (255, 120, 40)))
+        self.col_yellow = cfg.colors.get('fire_yellow', cfg.colors.get('fire_glow', (255, 200, 60)))
+        self.col_red    = cfg.colors.get('fire_red',    (220, 70, 50))
+        self.col_white  = cfg.colors.get('fire_white',  (255, 245, 220))
+        self.col_shadow = cfg.colors.get('fire_shadow', (0, 0, 0))
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._cache: OrderedDict[Tuple[int, Vec, int], Tuple[pygame.Surface, pygame.Surface]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def get(self, size: int, top_left: Vec, t: int) -> Tuple[pygame.Surface, pygame.Surface]:
+        key = (size, top_left, t)
+        pair = self._cache.get(key)
+        if pair is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return pair
+        self.misses += 1
+        pair = (self.shadow_surface(size, top_left[0], top_left[1], t),
+                self.flame_surface(size, top_left[0], top_left[1], t))
+        if self.maxsize > 0:
+            self._cache[key] = pair
+            if len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return pair
+
+    def flame_surface(self, size: int, seedx: int, seedy: int, t: int) -> pygame.Surface:
+        import pygame
+        # Off-screen surface sized to cover the full 2×2 area
+        surf = pygame.Surface((size, size), pygame.SRCALPHA)
+        # Deterministic flicker so each fire has a stable, lively motion
+        h = (seedx*73856093 ^ seedy*19349663 ^ t*83492791) & 0xffffffff
+        def rand01():
+            nonlocal h
+            h ^= (h << 13) & 0xffffffff
+            h ^= (h >> 17) & 0xffffffff
+            h ^= (h << 5)  & 0xffffffff
+            return (h & 0xffff) / 65535.0
+
+        # Base geometry scaled to the 2x2 size
+        wobble = int(rand01() * (size * 0.06))
+        base_w = max(4, int(size * 0.55) - wobble)
+        base_h = max(4, int(size * 0.35) - wobble // 2)
+
+        # 1) Soft radial glow
+        glow_r = int(max(size * 0.45, base_w * 0.55))
+        pygame.draw.circle(surf, (*self.col_yellow, 120), (size // 2, size // 2), glow_r)
+
+        # 2) Ember base (red ellipse at bottom)
+        pygame.draw.ellipse(
+            surf, (*self.col_red, 220),
+            (size // 2 - base_w // 2, size - base_h - 4, base_w, base_h)
+        )
+
+        # 3) Outer flame body (teardrop-ish polygon)
+        tip_x = size // 2 + int((rand01() - 0.5) * (size * 0.06))
+        tip_y = 4 + int(rand01() * 4)
+        left   = (size // 2 - base_w // 2, size - base_h - 4)
+        right  = (size // 2 + base_w // 2, size - base_h - 4)
+        midL   = (left[0]  + int(base_w * 0.16), size - int(base_h * 0.60))
+        midR   = (right[0] - int(base_w * 0.16), size - int(base_h * 0.60))
+        body   = [ (tip_x, tip_y), midR, right, (size // 2, size - 4), left, midL ]
+        pygame.draw.polygon(surf, (*self.col_orange, 255), body)
+
+        # 4) Inner bright flame (smaller teardrop)
+        inner_w = int(base_w * 0.50)
+        inner_h = int(base_h * 0.70)
+        inner_tip   = (tip_x, tip_y + 3)
+        inner_left  = (size // 2 - inner_w // 2, size - inner_h - 6)
+        inner_right = (size // 2 + inner_w // 2, size - inner_h - 6)
+        inner_midL  = (inner_left[0]  + int(inner_w * 0.18), size - int(inner_h * 0.58))
+        inner_midR  = (inner_right[0] - int(inner_w * 0.18), size - int(inner_h * 0.58))
+        inner       = [ inner_tip, inner_midR, inner_right, (size // 2, size - 6), inner_left, inner_midL ]
+        pygame.draw.polygon(surf, (*self.col_yellow, 255), inner)
+
+        # 5) White-hot core
+        core_w = max(3, int(inner_w * 0.35))
+        core_h = max(3, int(inner_h * 0.35))
+        pygame.draw.ellipse(
+            surf, (*self.col_white, 230),
+            (size // 2 - core_w // 2, size - inner_h - core_h, core_w, core_h)
+        )
+        return surf
+
+    def shadow_surface(self, size: int, seedx: int, seedy: int, t: int) -> pygame.Surface:
+        """
+        Soft drop-shadow roughly matching the flame silhouette.
+        Slightly larger and lower, drawn with high transparency.
+        """
+        import pygame
+        surf = pygame.Surface((size, size), pygame.SRCALPHA)
+        # light “breathing” jitter tied to time
+        h = (seedx*2654435761 ^ seedy*974634777 ^ t*19349663) & 0xffffffff
+        def rand01():
+            nonlocal h
+            h ^= (h << 13) & 0xffffffff; h ^= (h >> 17) & 0xffffffff; h ^= (h << 5) & 0xffffffff
+            return (h & 0xffff) / 65535.0
+
+        base_w = max(4, int(size * 0.62))
+        base_h = max(4, int(size * 0.40))
+        glow_r = int(max(size * 0.48, base_w * 0.58))
+        pygame.draw.circle(surf, (*self.col_shadow, 90), (size // 2, size // 2 + 2), glow_r)
+        pygame.draw.ellipse(surf, (*self.col_shadow, 110),
+            (size // 2 - base_w // 2, size - base_h, base_w, base_h))
+        tip_x = size // 2 + int((rand01() - 0.5) * (size * 0.04)); tip_y = 6
+        left  = (size // 2 - base_w // 2, size - base_h)
+        right = (size // 2 + base_w // 2, size - base_h)
+        midL  = (left[0]  + int(base_w * 0.16), size - int(base_h * 0.65))
+        midR  = (right[0] - int(base_w * 0.16), size - int(base_h * 0.65))
+        body  = [ (tip_x, tip_y), midR, right, (size // 2, size - 2), left, midL ]
+        pygame.draw.polygon(surf, (*self.col_shadow, 80), body)
+        return surf
@@ -0,0 +1,71 @@
+"""Which cells of a board are covered by an obstacle or a fire.
+
+`FreeCells` answers "is this whole Chebyshev ring covered?" with a handful of
+bitmask operations, so a nearest-free-cell search (Engine.find_safe_spawn)
+skips crowded rings without visiting their cells. Each cell keeps a count of
+what covers it, since a rock can sit under a fire, and every row and column
+a bitmask of the covered cells.
+"""
+from __future__ import annotations
+from functools import lru_cache
+from typing import Iterable, List, Tuple
+
+from utils import Vec, ring_offsets
+
+# byte -> '0' (uncovered) or '1' (covered), for turning count rows into masks
+_TO_BIT = bytes([48] + [49] * 255)
+
+
+@lru_cache(maxsize=None)
+def column_ring_offsets(r: int) -> Tuple[Vec, ...]:
+    """ring_offsets(r) ordered by dx, then dy: the order respawns are tried in."""
+    return tuple(sorted(ring_offsets(r)))
+
+
+def _mask(bits: bytes) -> int:
+    # bit i of the result is bits[i] != 0
+    return int(bits.translate(_TO_BIT)[::-1], 2) if bits else 0
+
+
+class FreeCells:
+    def __init__(self, w: int, h: int, covered: Iterable[Vec] = ()) -> None:
+        self.w, self.h = w, h
+        count = self._count = bytearray(w * h)
+        for x, y in covered:
+            count[y * w + x] += 1
+        self._rows: List[int] = [_mask(count[y * w:(y + 1) * w]) for y in range(h)]
+        self._cols: List[int] = [_mask(count[x::w]) for x in range(w)]
+
+    def cover(self, cells: Iterable[Vec]) -> None:
+        count, w = self._count, self.w
+        for x, y in cells:
+            i = y * w + x
+            count[i] += 1
+            if count[i] == 1:
+                self._rows[y] |= 1 << x
+                self._cols[x] |= 1 << y
+
+    def uncover(self, cells: Iterable[Vec]) -> None:
+        count, w = self._count, self.w
+        for x, y in cells:
+            i = y * w + x
+            count[i] -= 1
+            if not count[i]:
+                self._rows[y] ^= 1 << x
+                self._cols[x] ^= 1 << y
+
+    def ring_covered(self, center: Vec, r: int) -> bool:
+        """True if every on-board cell at Chebyshev distance r from `center` is covered."""
+        cx, cy = center
+        x0, x1 = max(0, cx - r), min(self.w - 1, cx + r)
+        span = ((1 << (x1 - x0 + 1)) - 1) << x0
+        for y in (cy - r, cy + r):
+            if 0 <= y < self.h and self._rows[y] & span != span:
+                return False
+        y0, y1 = max(0, cy - r + 1), min(self.h - 1, cy + r - 1)
+        if r and y0 <= y1:
+            span = ((1 << (y1 - y0 + 1)) - 1) << y0
+            for x in (cx - r, cx + r):
+                if 0 <= x < self.w and self._cols[x] & span != span:
+                    return False
+        return True
@@ -1,213 +1,267 @@
 from __future__ import annotations
-import sys, random
-from typing import Optional, Set, Dict
+import json, os, sys, time
+from collections import OrderedDict
+from typing import Optional, Dict, Hashable, List, Set, Tuple
 
 import pygame
 
 from config import Config
-from utils import Vec, add, cheb, DIRS_8, pick_start_positions, generate_obstacles
-from fire import FireSystem
-from actors import HumanPlayer, HunterCPU, TargetCPU
-from powerups import PowerUp, SpeedPowerUp, TimeStopPowerUp
+from utils import Vec, view_origin
+from chunks import ChunkedObstacles, Chunk
+from engine import Engine, ACTIONS
+from fire import FlameSprites
+from render import RenderScheduler, Rect
+from replay import Replay, ReplayError, TraceReader, TraceWriter
+from profiler import Profiler, StartupTimer, NO_PHASE
+from events import EventBus, EventLog
 
 CAPTION = (
     "Board Rock Chess • QWE/ASD/ZXC • S=Skip • O=Obstacles • H=Fullscreen • B=Restart • ESC=Quit"
 )
+# window events after which the whole screen must be presented again
+EXPOSE_EVENTS = (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, pygame.WINDOWRESTORED)
+# seconds between profiling overlay refreshes / metrics file writes
+OVERLAY_REFRESH = 0.25
+METRICS_INTERVAL = 5.0
+HUD_FONT = ("consolas", 18)
+# font files resolved by name; looking one up scans the system fonts, which is slow
+FONT_CACHE = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+                          "boardrockchess", "fonts.json")
+
+
+def load_font(name: str, size: int) -> pygame.font.Font:
+    """pygame.font.SysFont(name, size), remembering the font file across launches."""
+    try:
+        with open(FONT_CACHE, encoding="utf-8") as f:
+            paths = json.load(f)
+    except (OSError, ValueError):
+        paths = {}
+    path = paths.get(name)
+    if name not in paths or (path and not os.path.exists(path)):
+        # None (not installed) selects pygame's default font, as SysFont does
+        path = paths[name] = pygame.font.match_font(name)
+        try:
+            os.makedirs(os.path.dirname(FONT_CACHE), exist_ok=True)
+            with open(FONT_CACHE, "w", encoding="utf-8") as f:
+                json.dump(paths, f)
+        except OSError:
+            pass
+    return pygame.font.Font(path, size)
 
 
 class Game:
-    def __init__(self, cfg: Optional[Config] = None) -> None:
+    """Pygame front-end: input, pacing and drawing over an `Engine`."""
+
+    def __init__(self, cfg: Optional[Config] = None, startup: Optional[StartupTimer] = None) -> None:
         self.cfg = cfg or Config.load()
+        # launch timings, finished once the first frame is on screen
+        self.startup = startup
         self.screen = None
         self.font = None
         self.clock = None
         self.fullscreen = True
-
-        # actors & state
-        self.human: HumanPlayer | None = None
-        self.hunter: HunterCPU | None = None
-        self.target: TargetCPU | None = None
-
-        self.turn_order: list = []
-        self.turn_idx: int = 0
-        self.winner: Optional[str] = None
-        self.step_counter: int = 0
-
-        # obstacles
-        self.obstacles_enabled: bool = self.cfg.obstacles_enabled_default
-        self.obstacles: Set[Vec] = set()
-        self.obstacles_styles: Dict[Vec, str] = {}
-        # fires
-        self.fire: FireSystem | None = None
-
-        # power-ups
-        self.powerups: list[PowerUp] = []
-
-        # Controls: qwe/ asd / zxc ; S=skip
-        self.key_to_dir: Dict[int, Optional[Vec]] = {
-            pygame.K_q: (-1, -1), pygame.K_w: (0, -1),  pygame.K_e: (1, -1),
-            pygame.K_a: (-1,  0), pygame.K_s: None,      pygame.K_d: (1,  0),
-            pygame.K_z: (-1,  1), pygame.K_x: (0,  1),  pygame.K_c: (1,  1),
-        }
+        # pre-rendered grid + obstacles, keyed on (obstacles_rev, obstacles_enabled)
+        self._background = None
+        self._background_rev: Optional[tuple] = None
+        # large worlds: board cell at the screen's top-left, and pre-rendered
+        # chunks as {chunk: (layer version, surface)} in LRU order
+        self.origin: Vec = (0, 0)
+        self._chunk_cache: OrderedDict[Chunk, tuple] = OrderedDict()
+        self._chunk_layer: Optional[ChunkedObstacles] = None
+        self._chunk_grid = None   # empty chunk (grid lines only) to copy from
+        # flame/shadow sprites survive restarts; room for a few sub-turns of fires
+        self.fire_sprites = FlameSprites(self.cfg, maxsize=max(16, 4 * self.cfg.fire_max))
+        self.scheduler = RenderScheduler()
+
+        # world state & turn resolution live in the engine
+        self.engine = Engine(self.cfg)
+        # O waits for the human's turn so replays can place it between inputs
+        self._toggle_pending = False
+        self._replay_saved = False
+        self._trace: Optional[TraceWriter] = None
+        # replaces the controls line of the HUD while viewing a trace
+        self._view_status: Optional[str] = None
+
+        # phase timings, shared with the engine; created on demand (F3)
+        self.profiler: Optional[Profiler] = None
+        self.show_profile = self.cfg.profile_overlay
+        if self.show_profile or self.cfg.metrics_path:
+            self._enable_profiler()
+        self._overlay_at = self._metrics_at = 0.0
+
+        # round events appended to cfg.event_log by a background writer
+        self.event_log: Optional[EventLog] = None
+        if self.cfg.event_log:
+            self.event_log = EventLog(self.cfg.event_log)
+            self.engine.events = EventBus()
+            self.engine.events.subscribe(self.event_log)
+
+        # Controls: qwe/ asd / zxc ; S=skip (same order as engine.ACTIONS)
+        keys = (pygame.K_q, pygame.K_w, pygame.K_e,
+                pygame.K_a, pygame.K_s, pygame.K_d,
+                pygame.K_z, pygame.K_x, pygame.K_c)
+        self.key_to_dir: Dict[int, Vec] = dict(zip(keys, ACTIONS))
 
     # ------------ lifecycle ------------
     def init_pygame(self) -> None:
-        pygame.init()
+        # only the modules the game uses; pygame.init() would also open audio and joysticks
+        with self._startup("pygame.init"):
+            pygame.display.init()
+            pygame.font.init()
         pygame.key.set_repeat(0)  # KEYDOWN only (no held-key repeat)
-        self._apply_display_mode()
-        self.font = pygame.font.SysFont("consolas", 18)
+        with self._startup("display"):
+            self._apply_display_mode()
+        with self._startup("font"):
+            self.font = load_font(*HUD_FONT)
         self.clock = pygame.time.Clock()
 
+    def _startup(self, name: str):
+        return self.startup.phase(name) if self.startup else NO_PHASE
+
+    def _startup_done(self) -> None:
+        if self.startup:
+            self.startup.done()
+            if self.profiler:
+                self.profiler.startup = self.startup.report()
+            self.startup = None
+
     def _apply_display_mode(self) -> None:
         flags = pygame.FULLSCREEN if self.fullscreen else 0
-        self.screen = pygame.display.set_mode(
-            (self.cfg.grid_w * self.cfg.cell, self.cfg.grid_h * self.cfg.cell),
-            flags,
-        )
+        cols, rows = self.engine.view_size()
+        self.screen = pygame.display.set_mode((cols * self.cfg.cell, rows * self.cfg.cell), flags)
         pygame.display.set_caption(CAPTION)
+        self._background = None  # re-convert for the new display format
+        self._chunk_cache.clear()
+        self._chunk_grid = None
+
+    def _enable_profiler(self) -> None:
+        if self.profiler is None:
+            self.profiler = Profiler(budget_ms=1000 / self.cfg.fps)
+            self.engine.profiler = self.profiler
+
+    def _phase(self, name: str):
+        return self.profiler.phase(name) if self.profiler else NO_PHASE
+
+    def dump_metrics(self) -> None:
+        if self.profiler and self.cfg.metrics_path:
+            self.profiler.dump(self.cfg.metrics_path)
+            self._metrics_at = time.perf_counter()
+
+    def close_event_log(self) -> None:
+        if self.event_log:
+            self.event_log.close()
 
     def init_world(self) -> None:
-        human_p, hunter_p, target_p = pick_start_positions(self.cfg.grid_w, self.cfg.grid_h, self.cfg.min_start_dist)
-        self.human  = HumanPlayer("HUMAN",  self.cfg.colors["human"],  human_p)
-        self.hunter = HunterCPU  ("HUNTER", self.cfg.colors["hunter"], hunter_p)
-        self.target = TargetCPU  ("TARGET", self.cfg.colors["target"], target_p)
-
-        if self.obstacles_enabled:
-            self.obstacles, self.obstacles_styles = generate_obstacles(self.cfg.grid_w, self.cfg.grid_h, self.cfg.obstacle_density,
-                                                {human_p, hunter_p, target_p}, self.cfg.tree_ratio)
-        else:
-            self.obstacles.clear()
-            self.obstacles_styles = {}
-
-        # init fires (clears any prior fires)
-        self.fire = FireSystem(self.cfg, self.cfg.grid_w, self.cfg.grid_h)
-        self.fire.clear()
-
-        # clear power-ups
-        self.powerups.clear()
-
-        # Human → Hunter → Human → Hunter → Target
-        self.turn_order = [self.human, self.hunter, self.human, self.hunter, self.target]
-        self.turn_idx = 0
-        self.winner = None
-        self.step_counter = 0
-
-    # ------------ helpers ------------
-    def in_bounds(self, p: Vec) -> bool:
-        return 0 <= p[0] < self.cfg.grid_w and 0 <= p[1] < self.cfg.grid_h
-
-    def occupied_same(self, a: Vec, b: Vec) -> bool:
-        return a == b
-
-    def kill_actor(self, actor) -> None:
-        if actor.dead:
+        self.engine.init_world()
+        self._toggle_pending = False
+        self._replay_saved = False
+        if self.cfg.replay_dir:
+            os.makedirs(self.cfg.replay_dir, exist_ok=True)
+        # a trace frame is board-sized, too big to write every step of a large world
+        if self.cfg.replay_dir and not self.cfg.chunk_size:
+            self._trace = TraceWriter(os.path.join(self.cfg.replay_dir, f"{self.engine.seed}.hht"),
+                                      self.cfg.grid_w, self.cfg.grid_h)
+            self._record()
+
+    def _record(self) -> None:
+        if self._trace:
+            self._trace.append(self.engine.snapshot())
+
+    def save_replay(self) -> None:
+        """Write the round to cfg.replay_dir (once per round; no-op when unset)."""
+        world = self.engine
+        if not self.cfg.replay_dir or self._replay_saved:
             return
-        actor.deaths += 1
-        actor.dead = True
-        actor.respawn_ticks = self.cfg.respawn_delay
-        actor.last_death_pos = actor.pos
-
-    def find_safe_spawn(self, around: Vec) -> Vec:
-        # expanding Chebyshev ring search
-        live_positions = set()
-        for a in [self.human, self.hunter, self.target]:
-            if a and a.alive:
-                live_positions.add(a.pos)
-        for r in range(0, max(self.cfg.grid_w, self.cfg.grid_h)):
-            for dx in range(-r, r+1):
-                for dy in range(-r, r+1):
-                    if max(abs(dx), abs(dy)) != r:
-                        continue
-                    q = (around[0] + dx, around[1] + dy)
-                    if not self.in_bounds(q):
-                        continue
-                    if self.obstacles_enabled and q in self.obstacles:
-                        continue
-                    if self.fire and self.fire.cell_in_fire(q):
-                        continue
-                    if q in live_positions:
-                        continue
-                    return q
-        # fallback center
-        return (self.cfg.grid_w//2, self.cfg.grid_h//2)
-
-    def decrement_respawns(self) -> None:
-        for a in [self.human, self.hunter, self.target]:
-            if a and a.dead and a.respawn_ticks > 0:
-                a.respawn_ticks -= 1
-                if a.respawn_ticks <= 0:
-                    where = a.last_death_pos or a.pos
-                    a.set_pos(self.find_safe_spawn(where))
-                    a.dead = False
-                    a.respawn_ticks = 0
-
-    def check_fire_kills(self) -> None:
-        if not self.fire:
+        trace, self._trace = self._trace, None
+        if trace:
+            trace.close()
+        if world.step_counter == 0:
+            if trace:
+                os.remove(trace.path)
             return
-        for a in [self.human, self.hunter, self.target]:
-            if a and a.alive and self.fire.cell_in_fire(a.pos):
-                self.kill_actor(a)
-
-    def update_powerups(self) -> None:
-        """Tick power-ups and remove any that expired."""
-        for pu in list(self.powerups):
-            pu.tick()
-            if not pu.active:
-                self.powerups.remove(pu)
-
-    def maybe_spawn_powerup(self) -> None:
-        if len(self.powerups) >= self.cfg.powerup_max:
-            return
-        if random.random() >= self.cfg.powerup_spawn_chance:
-            return
-        occupied = {a.pos for a in [self.human, self.hunter, self.target] if a}
-        if self.obstacles_enabled:
-            occupied |= self.obstacles
-        occupied |= {pu.pos for pu in self.powerups}
-        for _ in range(20):
-            x = random.randrange(self.cfg.grid_w)
-            y = random.randrange(self.cfg.grid_h)
-            pos = (x, y)
-            if pos in occupied:
-                continue
-            if self.fire and self.fire.cell_in_fire(pos):
-                continue
-            cls = random.choice([SpeedPowerUp, TimeStopPowerUp])
-            self.powerups.append(cls(pos, self.cfg.powerup_lifetime))
-            break
-
-    def post_step(self) -> None:
-        # Fires expire, perhaps spawn one, then check for any immediate kills
-        if self.fire:
-            self.fire.update(self.step_counter)
-            self.fire.maybe_spawn(self.step_counter, self.obstacles, self.obstacles_styles)
-            self.check_fire_kills()
-        self.update_powerups()
-        self.maybe_spawn_powerup()
-        # handle respawn countdowns
-        self.decrement_respawns()
+        Replay.from_engine(world).save(os.path.join(self.cfg.replay_dir, f"{world.seed}.hhr"))
+        self._replay_saved = True
 
     # ------------ drawing ------------
-    def draw_grid(self) -> None:
+    def update_camera(self) -> None:
+        """Large worlds: keep the human centred (stops at the board edges)."""
+        world = self.engine
+        if not self.cfg.chunk_size or not world.human:
+            return
+        cols, rows = world.view_size()
+        origin = view_origin(world.human.pos, cols, rows, self.cfg.grid_w, self.cfg.grid_h)
+        if origin != self.origin:
+            self.origin = origin
+            self.scheduler.invalidate(full=True)
+
+    def draw_background(self) -> None:
+        """Blit the cached grid + obstacle layer, re-rendering it only when the
+        engine reports an obstacle change (init, O toggle, burned trees)."""
         assert self.screen
-        self.screen.fill(self.cfg.colors["bg"])
-        # subtle grid
-        for y in range(self.cfg.grid_h):
-            for x in range(self.cfg.grid_w):
-                rx = x * self.cfg.cell
-                ry = y * self.cfg.cell
-                pygame.draw.rect(self.screen, self.cfg.colors["grid"],
-                                 (rx, ry, self.cfg.cell - self.cfg.margin, self.cfg.cell - self.cfg.margin), 1)
-
-    def draw_obstacles(self) -> None:
-        if not self.obstacles_enabled or not self.obstacles:
+        if self.engine.obstacles_enabled and isinstance(self.engine.obstacles, ChunkedObstacles):
+            self.draw_chunks(self.engine.obstacles)
             return
+        rev = (self.engine.obstacles_rev, self.engine.obstacles_enabled)
+        if self._background is None or self._background_rev != rev:
+            self._background = pygame.Surface(self.screen.get_size()).convert()
+            self.draw_grid(self._background)
+            self.draw_obstacles(self._background)
+            self._background_rev = rev
+            self.scheduler.invalidate(full=True)
+        self.screen.blit(self._background, (0, 0))
+
+    def draw_chunks(self, layer: ChunkedObstacles) -> None:
+        """Blit the chunks under the view, rendering each once per layer version."""
         assert self.screen
+        cache = self._chunk_cache
+        if layer is not self._chunk_layer:
+            cache.clear()
+            self._chunk_layer = layer
+            self._chunk_grid = None
+        c, cell = layer.chunk, self.cfg.cell
+        ox, oy = self.origin
+        cols, rows = self.engine.view_size()
+        visible = list(layer.chunks_in(ox, oy, ox + cols, oy + rows))
+        for key in visible:
+            version = layer.version(key)
+            hit = cache.get(key)
+            if hit is None or hit[0] != version:
+                if self._chunk_grid is None:
+                    self._chunk_grid = pygame.Surface((c * cell, c * cell)).convert()
+                    self.draw_grid(self._chunk_grid)
+                surf = self._chunk_grid.copy()
+                self.draw_obstacles(surf, layer.in_chunk(key), (key[0] * c, key[1] * c))
+                cache[key] = hit = (version, surf)
+                self.scheduler.invalidate(full=True)
+            cache.move_to_end(key)
+            self.screen.blit(hit[1], ((key[0] * c - ox) * cell, (key[1] * c - oy) * cell))
+        # room for one view's worth of chunks besides the visible ones
+        while len(cache) > 2 * len(visible):
+            cache.popitem(last=False)
+
+    def draw_grid(self, surf) -> None:
+        surf.fill(self.cfg.colors["bg"])
+        # subtle grid: draw the first row of cells, then copy it down
+        cell = self.cfg.cell
+        rows = surf.get_height() // cell
+        if not rows:
+            return
+        for x in range(surf.get_width() // cell):
+            pygame.draw.rect(surf, self.cfg.colors["grid"],
+                             (x * cell, 0, cell - self.cfg.margin, cell - self.cfg.margin), 1)
+        strip = surf.subsurface((0, 0, surf.get_width(), cell)).copy()
+        surf.blits([(strip, (0, y * cell)) for y in range(1, rows)], doreturn=False)
+
+    def draw_obstacles(self, surf, cells: Optional[Set[Vec]] = None, origin: Vec = (0, 0)) -> None:
+        """Draw `cells` (default: every obstacle) with `origin` at the surface's top-left."""
+        world = self.engine
+        if not world.obstacles_enabled or not world.obstacles:
+            return
         cell = self.cfg.cell
-        for (x, y) in self.obstacles:
-            rx = x * cell
-            ry = y * cell
-            style = self.obstacles_styles.get((x, y), 'rock')
+        for (x, y) in (world.obstacles if cells is None else cells):
+            rx = (x - origin[0]) * cell
+            ry = (y - origin[1]) * cell
+            style = world.obstacles_styles.get((x, y), 'rock')
             if style == 'tree':
                 canopy_color = self.cfg.colors.get('tree_leaf', self.cfg.colors['obstacle'])
                 trunk_color  = self.cfg.colors.get('tree_trunk', self.cfg.colors['obstacle'])
@@ -216,34 +270,37 @@ class Game:
                 top = (cx, ry + 2)
                 left = (rx + 3, ry + cell // 2)
                 right = (rx + cell - 3, ry + cell // 2)
-                pygame.draw.polygon(self.screen, canopy_color, [top, left, right])
+                pygame.draw.polygon(surf, canopy_color, [top, left, right])
                 # Trunk
                 tw = max(3, cell // 6)
                 th = max(3, cell // 3)
                 tx = cx - tw // 2
                 ty = ry + cell // 2
-                pygame.draw.rect(self.screen, trunk_color, (tx, ty, tw, th), border_radius=2)
+                pygame.draw.rect(surf, trunk_color, (tx, ty, tw, th), border_radius=2)
             else:
                 # Boulder: circle
                 rock_color = self.cfg.colors.get('rock', self.cfg.colors['obstacle'])
                 cx = rx + cell // 2
                 cy = ry + cell // 2
                 r = max(3, cell // 3)
-                pygame.draw.circle(self.screen, rock_color, (cx, cy), r)
+                pygame.draw.circle(surf, rock_color, (cx, cy), r)
 
     def draw_powerups(self) -> None:
-        if not self.powerups:
+        if not self.engine.powerups:
             return
         assert self.screen
-        for pu in self.powerups:
-            pu.draw(self.screen, self.cfg)
+        for pu in self.engine.powerups:
+            if self.on_screen(pu.pos):
+                pu.draw(self.screen, self.cfg, self.origin)
 
-    
+    def on_screen(self, p: Vec) -> bool:
+        cols, rows = self.engine.view_size()
+        return 0 <= p[0] - self.origin[0] < cols and 0 <= p[1] - self.origin[1] < rows
 
     def draw_actor(self, pos: Vec, color: tuple[int,int,int]) -> None:
         assert self.screen
-        rx = pos[0] * self.cfg.cell + 2
-        ry = pos[1] * self.cfg.cell + 2
+        rx = (pos[0] - self.origin[0]) * self.cfg.cell + 2
+        ry = (pos[1] - self.origin[1]) * self.cfg.cell + 2
         size = self.cfg.cell - 4
         pygame.draw.rect(self.screen, color, (rx, ry, size, size), border_radius=4)
 
@@ -252,152 +309,262 @@ class Game:
         surf = self.font.render(text, True, self.cfg.colors["text"])
         self.screen.blit(surf, (10, y))
 
-    # ------------ turn logic ------------
-    def advance_turn(self) -> None:
-        self.turn_idx = (self.turn_idx + 1) % len(self.turn_order)
-        self.step_counter += 1
-
-    def check_win_after_move(self) -> None:
-        assert self.human and self.hunter and self.target
-        if self.human.alive and self.occupied_same(self.human.pos, self.target.pos):
-            self.winner = "HUMAN"
-        elif self.hunter.alive and self.occupied_same(self.hunter.pos, self.target.pos):
-            self.winner = "HUNTER"
+    def draw_profile(self) -> Dict[Hashable, Rect]:
+        """Profiler rows at the bottom left, on the background color so they stay legible."""
+        assert self.screen and self.font and self.profiler
+        items: Dict[Hashable, Rect] = {}
+        lines = self.profiler.lines()
+        step = self.font.get_linesize()
+        y = self.screen.get_height() - step * len(lines) - 8
+        for text in lines:
+            surf = self.font.render(text, True, self.cfg.colors["text"], self.cfg.colors["bg"])
+            self.screen.blit(surf, (10, y))
+            items[("profile", y, text)] = (10, y, surf.get_width(), surf.get_height())
+            y += step
+        return items
 
     # ------------ event handling ------------
     def handle_keydown(self, key: int) -> None:
-        assert self.human and self.hunter and self.target
+        world = self.engine
         # global controls
         if key == pygame.K_ESCAPE:
+            self.save_replay()
+            self.dump_metrics()
+            self.close_event_log()
             pygame.quit(); sys.exit()
         if key == pygame.K_h:
             self.fullscreen = not self.fullscreen
             self._apply_display_mode()
             return
+        if key == pygame.K_F3:
+            self._enable_profiler()
+            self.show_profile = not self.show_profile
+            self.scheduler.invalidate(full=True)
+            return
         if key == pygame.K_o:
-            self.obstacles_enabled = not self.obstacles_enabled
-            # re-generate to avoid covering actors
-            if self.obstacles_enabled:
-                self.obstacles, self.obstacles_styles = generate_obstacles(self.cfg.grid_w, self.cfg.grid_h, self.cfg.obstacle_density,
-                                                    {self.human.pos, self.hunter.pos, self.target.pos}, self.cfg.tree_ratio)
-            else:
-                self.obstacles.clear()
-                self.obstacles_styles = {}
+            self._toggle_pending = not self._toggle_pending
             return
         if key == pygame.K_b:
             # Restart a fresh world (actors, obstacles, turn order)
+            self.save_replay()
             self.init_world()
             return
 
         # turn-based controls: only on human’s sub-turn
-        current = self.turn_order[self.turn_idx]
-        if self.winner is None and current is self.human and self.human.alive and self.human.skip_turns == 0:
-            if key in self.key_to_dir:
-                delta = self.key_to_dir[key]
-                moved = False
-                if self.human.try_move(delta, self.cfg.grid_w, self.cfg.grid_h, self.obstacles, self.obstacles_enabled):
-                    moved = True
-                    self.human.move(self.human.pos, self)
-                    if self.fire and self.fire.cell_in_fire(self.human.pos):
-                        self.kill_actor(self.human)
-                    if self.human.alive and self.human.speed_turns > 0 and delta is not None:
-                        if self.human.try_move(delta, self.cfg.grid_w, self.cfg.grid_h, self.obstacles, self.obstacles_enabled):
-                            self.human.move(self.human.pos, self)
-                            if self.fire and self.fire.cell_in_fire(self.human.pos):
-                                self.kill_actor(self.human)
-                if moved:
-                    if self.human.speed_turns > 0:
-                        self.human.speed_turns -= 1
-                    self.advance_turn()
-                    self.check_win_after_move()
-                    self.post_step()
+        if world.awaiting_human() and key in self.key_to_dir:
+            if world.step(self.key_to_dir[key]):
+                self._record()
 
     # ------------ main loop ------------
+    def hud_lines(self) -> List[Tuple[str, int]]:
+        world = self.engine
+        human, hunter, target = world.human, world.hunter, world.target
+        assert human and hunter and target
+        status = f"Turn: {world.current.name}   Steps: {world.step_counter}"
+        if isinstance(world.obstacles, ChunkedObstacles):
+            status += f"   Chunks: {world.obstacles.generated}"
+        lines = [
+            (status, 8),
+            (self._view_status or "Move: QWE/ASD/ZXC • S=Skip • O=Toggle Obstacles • H=Fullscreen • B=Restart • ESC=Quit", 30),
+            (f"Deaths – H:{human.deaths}  Hun:{hunter.deaths}  T:{target.deaths}", 52),
+        ]
+        if human.dead:
+            lines.append((f"H respawns in {human.respawn_ticks}", 72))
+        if hunter.dead:
+            lines.append((f"Hun respawns in {hunter.respawn_ticks}", 92))
+        if target.dead:
+            lines.append((f"T respawns in {target.respawn_ticks}", 112))
+        if world.winner:
+            lines.append((f"WINNER: {world.winner}", 132))
+        return lines
+
+    def draw_frame(self) -> Dict[Hashable, Rect]:
+        """Compose the whole frame; returns {item key: screen rect} for dirty-rect diffing."""
+        assert self.font
+        world = self.engine
+        cell = self.cfg.cell
+        pad = cell // 2  # fire shadows and power-up sprites spill past their cells
+        items: Dict[Hashable, Rect] = {}
+        self.update_camera()
+        ox, oy = self.origin
+
+        with self._phase("draw.background"):
+            self.draw_background()
+        if world.fire:
+            with self._phase("draw.fire"):
+                world.fire.draw(self.screen, self.cfg, world.step_counter, self.fire_sprites, self.origin)
+            for f in world.fire.fires.values():
+                if self.on_screen(f.top_left) or self.on_screen(f.cells[-1]):
+                    items[("fire", f.top_left, world.step_counter)] = (
+                        (f.top_left[0] - ox) * cell, (f.top_left[1] - oy) * cell, 2 * cell + pad, 2 * cell + pad)
+        with self._phase("draw.powerups"):
+            self.draw_powerups()
+        for pu in world.powerups:
+            if self.on_screen(pu.pos):
+                items[("powerup", pu.pos, type(pu).__name__)] = (
+                    (pu.pos[0] - ox) * cell - pad, (pu.pos[1] - oy) * cell - pad, cell + 2 * pad, cell + 2 * pad)
+        # draw target first so chasers on top
+        with self._phase("draw.actors"):
+            for actor in (world.target, world.hunter, world.human):
+                assert actor
+                if actor.alive and self.on_screen(actor.pos):
+                    self.draw_actor(actor.pos, actor.color)
+                    items[("actor", actor.name, actor.pos)] = ((actor.pos[0] - ox) * cell, (actor.pos[1] - oy) * cell,
+                                                               cell, cell)
+
+        with self._phase("draw.hud"):
+            for text, y in self.hud_lines():
+                self.draw_text(text, y)
+                w, h = self.font.size(text)
+                items[("text", y, text)] = (10, y, w, h)
+        if self.show_profile and self.profiler:
+            items.update(self.draw_profile())
+        return items
+
+    def present(self) -> None:
+        """Draw the frame if anything changed and push the dirty parts to the display."""
+        sched = self.scheduler
+        if not sched.due:
+            return
+        rects = sched.dirty_rects(self.draw_frame())
+        with self._phase("present"):
+            if rects is None:
+                pygame.display.flip()
+            elif rects:
+                pygame.display.update(rects)
+
     def run(self) -> None:
         self.init_pygame()
-        self.init_world()
+        with self._startup("world"):
+            self.init_world()
+        world = self.engine
+        sched = self.scheduler
+        # show the board now rather than after the first event
+        with self._startup("first_frame"):
+            self.present()
+        self._startup_done()
 
         running = True
         while running:
             assert self.clock
-            self.clock.tick(self.cfg.fps)
+            if world.winner is not None or world.awaiting_human():
+                # idle: nothing changes until input arrives, so block instead of polling
+                events = [pygame.event.wait()]
+            else:
+                # AI sub-turns are paced at one per frame
+                self.clock.tick(self.cfg.fps)
+                events = []
+            # a profiled frame is the work between waits
+            prof = self.profiler
+            if prof:
+                prof.begin_frame()
+
+            with self._phase("events"):
+                for event in events + pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        running = False
+                    elif event.type == pygame.KEYDOWN:
+                        self.handle_keydown(event.key)
+                        sched.invalidate()
+                    elif event.type in EXPOSE_EVENTS:
+                        sched.invalidate(full=True)
+
+            if self._toggle_pending and (world.awaiting_human() or world.winner is not None):
+                world.toggle_obstacles()
+                self._toggle_pending = False
+                self._record()
+                sched.invalidate()
+
+            # AI sub-turns resolve automatically, one per frame
+            with self._phase("step"):
+                stepped = not world.awaiting_human() and world.step()
+            if stepped:
+                self._record()
+                sched.invalidate()
+            if world.winner is not None:
+                self.save_replay()
+
+            if prof:
+                now = time.perf_counter()
+                if self.show_profile and now - self._overlay_at >= OVERLAY_REFRESH:
+                    self._overlay_at = now
+                    sched.invalidate()
+                if self.cfg.metrics_path and now - self._metrics_at >= METRICS_INTERVAL:
+                    self.dump_metrics()
+            self.present()
+            if prof:
+                prof.end_frame()
+
+        self.save_replay()
+        self.dump_metrics()
+        self.close_event_log()
+        pygame.quit(); sys.exit()
 
-            # events
-            for event in pygame.event.get():
+    def view(self, path: str) -> None:
+        """
+        Play back a state trace (.hht). Left/Right step one frame, PageUp/
+        PageDown 100, Home/End jump to the ends, 0-9 to 0-90 %, Space plays.
+        """
+        reader = TraceReader(path)
+        n = len(reader)
+        if not n:
+            raise ReplayError(f"{path}: no frames")
+        self.cfg.grid_w, self.cfg.grid_h = reader.w, reader.h
+        self.init_pygame()
+        world = self.engine
+        world.init_world(0)  # actors and fire system for load_state to fill in
+        self._startup_done()
+        sched = self.scheduler
+        moves = {pygame.K_LEFT: -1, pygame.K_RIGHT: 1, pygame.K_PAGEUP: -100, pygame.K_PAGEDOWN: 100}
+        i, shown, playing = 0, -1, False
+
+        running = True
+        while running:
+            assert self.clock
+            if playing:
+                self.clock.tick(self.cfg.fps)
+                events = pygame.event.get()
+            else:
+                events = [pygame.event.wait()] + pygame.event.get()
+
+            for event in events:
                 if event.type == pygame.QUIT:
                     running = False
                 elif event.type == pygame.KEYDOWN:
-                    self.handle_keydown(event.key)
-
-            # AI sub-turns resolve automatically
-            if self.winner is None:
-                current = self.turn_order[self.turn_idx]
-                if getattr(current, 'skip_turns', 0) > 0:
-                    current.skip_turns -= 1
-                    if getattr(current, 'speed_turns', 0) > 0:
-                        current.speed_turns -= 1
-                    self.advance_turn(); self.post_step()
-                elif current is self.human:
-                    if self.human.alive:
-                        pass  # wait for keydown (one move per press)
-                    else:
-                        # human is dead; turns auto-advance while respawning
-                        self.advance_turn(); self.post_step()
-                elif current is self.hunter:
-                    if self.hunter.alive:
-                        nxt = self.hunter.decide(self.target.pos, self.cfg.grid_w, self.cfg.grid_h, self.obstacles, self.obstacles_enabled)
-                        self.hunter.move(nxt, self)
-                        if self.fire and self.fire.cell_in_fire(self.hunter.pos):
-                            self.kill_actor(self.hunter)
-                        if self.hunter.alive and self.hunter.speed_turns > 0:
-                            nxt = self.hunter.decide(self.target.pos, self.cfg.grid_w, self.cfg.grid_h, self.obstacles, self.obstacles_enabled)
-                            self.hunter.move(nxt, self)
-                            if self.fire and self.fire.cell_in_fire(self.hunter.pos):
-                                self.kill_actor(self.hunter)
-                        if self.hunter.speed_turns > 0:
-                            self.hunter.speed_turns -= 1
-                    self.advance_turn(); self.check_win_after_move(); self.post_step()
-                elif current is self.target:
-                    if self.target.alive:
-                        nxt = self.target.decide(self.human.pos, self.hunter.pos, self.cfg.grid_w, self.cfg.grid_h, self.obstacles, self.obstacles_enabled)
-                        self.target.move(nxt, self)
-                        if self.fire and self.fire.cell_in_fire(self.target.pos):
-                            self.kill_actor(self.target)
-                        if self.target.alive and self.target.speed_turns > 0:
-                            nxt = self.target.decide(self.human.pos, self.hunter.pos, self.cfg.grid_w, self.cfg.grid_h, self.obstacles, self.obstacles_enabled)
-                            self.target.move(nxt, self)
-                            if self.fire and self.fire.cell_in_fire(self.target.pos):
-                                self.kill_actor(self.target)
-                        if self.target.speed_turns > 0:
-                            self.target.speed_turns -= 1
-                    self.advance_turn(); self.check_win_after_move(); self.post_step()
-
-            # draw
-            self.draw_grid()
-            self.draw_obstacles()
-            if self.fire:
-                self.fire.draw(self.screen, self.cfg, self.step_counter)
-            self.draw_powerups()
-            assert self.human and self.hunter and self.target
-            if self.target.alive:
-                self.draw_actor(self.target.pos, self.cfg.colors["target"])  # draw target first so chasers on top
-            if self.hunter.alive:
-                self.draw_actor(self.hunter.pos, self.cfg.colors["hunter"]) 
-            if self.human.alive:
-                self.draw_actor(self.human.pos,  self.cfg.colors["human"])
-
-            self.draw_text(f"Turn: {self.turn_order[self.turn_idx].name}   Steps: {self.step_counter}", 8)
-            self.draw_text("Move: QWE/ASD/ZXC • S=Skip • O=Toggle Obstacles • H=Fullscreen • B=Restart • ESC=Quit", 30)
-            self.draw_text(f"Deaths – H:{self.human.deaths}  Hun:{self.hunter.deaths}  T:{self.target.deaths}", 52)
-            if self.human.dead:
-                self.draw_text(f"H respawns in {self.human.respawn_ticks}", 72)
-            if self.hunter.dead:
-                self.draw_text(f"Hun respawns in {self.hunter.respawn_ticks}", 92)
-            if self.target.dead:
-                self.draw_text(f"T respawns in {self.target.respawn_ticks}", 112)
-            if self.winner:
-                self.draw_text(f"WINNER: {self.winner}", 132)
-
-            pygame.display.flip()
-
+                    key = event.key
+                    if key == pygame.K_ESCAPE:
+                        running = False
+                    elif key == pygame.K_h:
+                        self.fullscreen = not self.fullscreen
+                        self._apply_display_mode()
+                    elif key == pygame.K_SPACE:
+                        playing = not playing
+                    elif key in moves:
+                        i += moves[key]
+                        playing = False
+                    elif key == pygame.K_HOME:
+                        i = 0
+                    elif key == pygame.K_END:
+                        i = n - 1
+                    elif pygame.K_0 <= key <= pygame.K_9:
+                        i = n * (key - pygame.K_0) // 10
+                    sched.invalidate()
+                elif event.type in EXPOSE_EVENTS:
+                    sched.invalidate(full=True)
+
+            if playing and shown == i:
+                i += 1
+            i = max(0, min(n - 1, i))
+            if playing and i == n - 1:
+                playing = False
+            if i != shown:
+                world.load_state(reader.frame(i))
+                shown = i
+                self._view_status = (f"Frame {i + 1}/{n} • ←/→ Step • PgUp/PgDn ±100 • "
+                                     f"Home/End • 0-9 Jump • Space=Play • ESC=Quit")
+                sched.invalidate()
+
+            self.present()
+
+        reader.close()
         pygame.quit(); sys.exit()
@@ -1,4 +1,23 @@
-from game import Game
+import time
+
+T0 = time.perf_counter()
+
+import argparse, sys
+
+from profiler import StartupTimer
 
 if __name__ == "__main__":
-    Game().run()
+    ap = argparse.ArgumentParser(description="Board Rock Chess")
+    ap.add_argument("--view", metavar="FILE", help="play back a state trace (.hht) instead of a round")
+    ap.add_argument("--startup", action="store_true", help="print how long each startup step took")
+    args = ap.parse_args()
+    startup = StartupTimer(T0, sys.stderr if args.startup else None)
+    # pygame comes in with the game module, after the arguments are known
+    with startup.phase("import"):
+        from game import Game
+    with startup.phase("game"):
+        game = Game(startup=startup)
+    if args.view:
+        game.view(args.view)
+    else:
+        game.run()
@@ -0,0 +1,197 @@
+"""Pluggable move policies for the three seats.
+
+A `Policy` picks the cell an actor moves to (one of its legal neighbours, or
+its own cell to stay put) from the engine's state. Plug one into a seat with
+`engine.policies[seat] = policy`; seats are actor names ("HUMAN", "HUNTER",
+"TARGET"). A HUMAN policy answers the human's sub-turns whenever `step` is
+called without an action, and CPU seats without one keep their built-in AI.
+Moves that are not legal are replaced by staying put.
+
+Policies are named by `load_policy` specs: a built-in name from `BUILTIN`, or
+"module:attr" for a Policy subclass (or any factory) in an importable module.
+`version` identifies a policy's behaviour; bump it whenever that changes, as
+tournament results are cached per version (see tournament.py).
+
+Time budgets are cooperative: under `Budgeted`, a policy learns its per-move
+budget in `budget_ms` before `reset`, and a long search should poll
+`out_of_time()`. Nothing is interrupted, so a search never stops halfway
+through updating its own caches. The built-in searches plan for
+SEARCH_SHARE of the budget, leaving the rest for the move around them and
+for polling slack, and poll `out_of_time()` too.
+"""
+from __future__ import annotations
+import importlib, random, time
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Tuple
+
+from utils import Vec, PathFinder, cheb, legal_neighbors, rng_stream
+from actors import chase_step
+from search import EvaderSearch
+
+if TYPE_CHECKING:
+    from engine import Engine
+    from actors import Actor
+
+SEATS = ("HUMAN", "HUNTER", "TARGET")
+CHASERS = ("HUMAN", "HUNTER")
+# share of a move budget a built-in search aims to use
+SEARCH_SHARE = 0.5
+
+
+class Policy(ABC):
+    name = "policy"
+    version = "1"
+    seats: Tuple[str, ...] = SEATS
+    # per-move CPU time allowed, and the time.thread_time() it runs out at
+    # during a decide; both None when unbudgeted
+    budget_ms: Optional[float] = None
+    deadline: Optional[float] = None
+
+    @property
+    def id(self) -> str:
+        return f"{self.name}@{self.version}"
+
+    def reset(self, world: 'Engine', seat: str) -> None:
+        """Called when a round starts, before the first decide."""
+
+    @abstractmethod
+    def decide(self, world: 'Engine', actor: 'Actor') -> Vec:
+        ...
+
+    def out_of_time(self) -> bool:
+        return self.deadline is not None and time.thread_time() > self.deadline
+
+    def search_ms(self, world: 'Engine') -> float:
+        """Time for a built-in search: the configured budget, capped by a share of the move budget."""
+        if self.budget_ms is None:
+            return world.cfg.ai_budget_ms
+        return min(world.cfg.ai_budget_ms, self.budget_ms * SEARCH_SHARE)
+
+
+class Greedy(Policy):
+    """Chaser: step to the neighbour closest to the target (the batch.py stand-in)."""
+    name = "greedy"
+    seats = CHASERS
+
+    def decide(self, world, actor):
+        cfg = world.cfg
+        return chase_step(actor.pos, world.target.pos, cfg.grid_w, cfg.grid_h, world.obstacles,
+                          world.obstacles_enabled)
+
+
+class Pathfinder(Policy):
+    """Chaser: shortest paths around obstacles, as the built-in hunter."""
+    name = "pathfinder"
+    seats = CHASERS
+
+    def reset(self, world, seat):
+        self.paths = PathFinder(self.search_ms(world), node_budget=world.cfg.ai_node_budget,
+                                stop=self.out_of_time)
+
+    def decide(self, world, actor):
+        cfg = world.cfg
+        nxt = self.paths.next_step(actor.pos, world.target.pos, cfg.grid_w, cfg.grid_h, world.obstacles,
+                                   world.obstacles_enabled, world.obstacles_rev)
+        if nxt is None:
+            return chase_step(actor.pos, world.target.pos, cfg.grid_w, cfg.grid_h, world.obstacles,
+                              world.obstacles_enabled)
+        return nxt
+
+
+class Evader(Policy):
+    """Target: the built-in lookahead search (see search.py)."""
+    name = "evader"
+    seats = ("TARGET",)
+
+    def reset(self, world, seat):
+        self.search = EvaderSearch(self.search_ms(world), node_budget=world.cfg.ai_node_budget,
+                                   stop=self.out_of_time)
+
+    def decide(self, world, actor):
+        cfg = world.cfg
+        human, hunter = world.human, world.hunter
+        return self.search.best_move(actor.pos, human.pos if human.alive else None,
+                                     hunter.pos if hunter.alive else None, cfg.grid_w, cfg.grid_h,
+                                     world.obstacles, world.obstacles_enabled, world.fire_timers(),
+                                     world.powerups)
+
+
+class GreedyEvader(Policy):
+    """Target: one ply, maximising the distance to the nearer live chaser."""
+    name = "greedy_evader"
+    seats = ("TARGET",)
+
+    def decide(self, world, actor):
+        cfg = world.cfg
+        chasers = [a.pos for a in (world.human, world.hunter) if a.alive]
+        options = legal_neighbors(actor.pos, cfg.grid_w, cfg.grid_h, world.obstacles, world.obstacles_enabled)
+        if not options or not chasers:
+            return actor.pos
+        return max(options, key=lambda q: min(cheb(q, c) for c in chasers))
+
+
+class RandomWalk(Policy):
+    """Any seat: a uniformly random legal neighbour, from a stream of the round seed."""
+    name = "random"
+
+    def reset(self, world, seat):
+        self.rng: random.Random = rng_stream(world.seed, f"policy:{seat}")
+
+    def decide(self, world, actor):
+        cfg = world.cfg
+        options = legal_neighbors(actor.pos, cfg.grid_w, cfg.grid_h, world.obstacles, world.obstacles_enabled)
+        return self.rng.choice(options) if options else actor.pos
+
+
+BUILTIN: Dict[str, Callable[[], Policy]] = {
+    cls.name: cls for cls in (Greedy, Pathfinder, Evader, GreedyEvader, RandomWalk)
+}
+
+
+def load_policy(spec: str) -> Policy:
+    """A built-in name or "module:attr" (a Policy subclass or factory)."""
+    factory = BUILTIN.get(spec)
+    if factory is None:
+        module, _, attr = spec.partition(":")
+        if not attr:
+            raise ValueError(f"unknown policy {spec!r} (built-ins: {', '.join(BUILTIN)}; or module:attr)")
+        factory = getattr(importlib.import_module(module), attr)
+    policy = factory()
+    if not isinstance(policy, Policy):
+        raise TypeError(f"{spec!r} did not produce a Policy")
+    return policy
+
+
+class Budgeted(Policy):
+    """
+    Gives a policy `budget_ms` of CPU time (its own thread's, so a busy
+    worker pool or the event log writer does not eat into it) per decide.
+    A move over budget is replaced by staying put and counted in `timeouts`.
+    """
+
+    def __init__(self, inner: Policy, budget_ms: float) -> None:
+        self.inner = inner
+        self.budget = budget_ms / 1000
+        self.name, self.version, self.seats = inner.name, inner.version, inner.seats
+        self.timeouts = 0
+        self.moves = 0
+        self.slowest = 0.0
+
+    def reset(self, world, seat):
+        self.inner.budget_ms = self.budget * 1000
+        self.inner.reset(world, seat)
+
+    def decide(self, world, actor):
+        self.moves += 1
+        t0 = time.thread_time()
+        self.inner.deadline = t0 + self.budget
+        try:
+            p = self.inner.decide(world, actor)
+        finally:
+            self.inner.deadline = None
+        dt = time.thread_time() - t0
+        self.slowest = max(self.slowest, dt)
+        if dt > self.budget:
+            self.timeouts += 1
+            return actor.pos
+        return p
@@ -1,7 +1,5 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING
-
-import pygame
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional
 
 from utils import Vec
 
@@ -17,22 +15,19 @@ class PowerUp:
         self.pos = pos
         self.active = True
         self.lifetime = lifetime
+        # step it disappears on; set by PowerUpRegistry.add
+        self.expires_at = lifetime
 
     def apply(self, actor: 'Actor', game: 'Game') -> None:
         """Apply the effect to the actor; by default simply deactivates."""
         self.active = False
 
-    def tick(self) -> None:
-        """Advance lifetime and deactivate when expired."""
-        self.lifetime -= 1
-        if self.lifetime <= 0:
-            self.active = False
-
-    def draw(self, screen, cfg) -> None:
+    def draw(self, screen, cfg, origin: Vec = (0, 0)) -> None:
         """Default drawing: small white circle."""
+        import pygame
         cell = cfg.cell
-        cx = self.pos[0] * cell + cell // 2
-        cy = self.pos[1] * cell + cell // 2
+        cx = (self.pos[0] - origin[0]) * cell + cell // 2
+        cy = (self.pos[1] - origin[1]) * cell + cell // 2
         r = max(3, cell // 3)
         pygame.draw.circle(screen, (250, 250, 250), (cx, cy), r)
 
@@ -44,10 +39,11 @@ class SpeedPowerUp(PowerUp):
         super().apply(actor, game)
         actor.speed_turns = game.cfg.powerup_length
 
-    def draw(self, screen, cfg) -> None:
+    def draw(self, screen, cfg, origin: Vec = (0, 0)) -> None:
+        import pygame
         cell = cfg.cell
-        cx = self.pos[0] * cell + cell // 2
-        cy = self.pos[1] * cell + cell // 2
+        cx = (self.pos[0] - origin[0]) * cell + cell // 2
+        cy = (self.pos[1] - origin[1]) * cell + cell // 2
         r = max(3, cell // 3)
         points = [(cx - r, cy - r), (cx - r, cy + r), (cx + r, cy)]
         pygame.draw.polygon(screen, self.color, points)
@@ -70,10 +66,11 @@ class TimeStopPowerUp(PowerUp):
             if game.hunter:
                 game.hunter.skip_turns = max(game.hunter.skip_turns, dur)
 
-    def draw(self, screen, cfg) -> None:
+    def draw(self, screen, cfg, origin: Vec = (0, 0)) -> None:
+        import pygame
         cell = cfg.cell
-        cx = self.pos[0] * cell + cell // 2
-        cy = self.pos[1] * cell + cell // 2
+        cx = (self.pos[0] - origin[0]) * cell + cell // 2
+        cy = (self.pos[1] - origin[1]) * cell + cell // 2
         r = max(3, cell // 3)
         # body
         pygame.draw.circle(screen, self.color, (cx, cy), r)
@@ -85,3 +82,53 @@ class TimeStopPowerUp(PowerUp):
         pygame.draw.circle(screen, self.color, (cx - r, cy + r), leg_r)
         pygame.draw.circle(screen, self.color, (cx + r // 2, cy - r), leg_r)
         pygame.draw.circle(screen, self.color, (cx + r // 2, cy + r), leg_r)
+
+
+class PowerUpRegistry:
+    """
+    Power-ups on the board, keyed by cell, with expiry buckets keyed by the
+    step each one disappears on. Pickup (`at` + `remove`), `add` and
+    `expire` are O(1) per power-up; picked-up ones are skipped when their
+    bucket comes due. Iterates in spawn order.
+    """
+
+    def __init__(self) -> None:
+        self.now = 0
+        self._by_pos: Dict[Vec, PowerUp] = {}
+        self._buckets: Dict[int, List[PowerUp]] = {}
+
+    def clear(self, now: int = 0) -> None:
+        self.now = now
+        self._by_pos.clear()
+        self._buckets.clear()
+
+    def add(self, pu: PowerUp) -> None:
+        """Place `pu` for `pu.lifetime` steps from now."""
+        pu.expires_at = self.now + max(1, pu.lifetime)
+        self._by_pos[pu.pos] = pu
+        self._buckets.setdefault(pu.expires_at, []).append(pu)
+
+    def at(self, pos: Vec) -> Optional[PowerUp]:
+        return self._by_pos.get(pos)
+
+    def remove(self, pu: PowerUp) -> None:
+        if self._by_pos.get(pu.pos) is pu:
+            del self._by_pos[pu.pos]
+
+    def expire(self, now: int) -> List[PowerUp]:
+        """Advance to step `now`, dropping every power-up due by then; returns the ones removed."""
+        expired: List[PowerUp] = []
+        for t in range(self.now + 1, now + 1):
+            for pu in self._buckets.pop(t, ()):
+                pu.active = False
+                if self._by_pos.get(pu.pos) is pu:
+                    del self._by_pos[pu.pos]
+                    expired.append(pu)
+        self.now = max(self.now, now)
+        return expired
+
+    def __iter__(self) -> Iterator[PowerUp]:
+        return iter(self._by_pos.values())
+
+    def __len__(self) -> int:
+        return len(self._by_pos)
@@ -0,0 +1,226 @@
+"""Per-phase timings for the game loop and the engine.
+
+`Profiler` keeps the last `window` samples of every named phase for rolling
+percentiles, a histogram of frame times, how many frames went over the frame
+budget, the net growth in allocated memory blocks per frame, and garbage
+collector pauses (phase "gc"). Code times a phase with
+
+    with profiler.phase("draw.hud"):
+        ...
+
+Engine and Game take an optional profiler and time nothing without one. The
+report is plain JSON, written by the game to `metrics_path` while it runs, or
+produced headless for CPU-vs-CPU rounds:
+
+    python profiler.py --rounds 20 > metrics.json
+
+`StartupTimer` times the one-off steps of a launch (imports, display, font,
+first frame) the same way; `python main.py --startup` prints them.
+"""
+from __future__ import annotations
+import gc, json, os, sys, time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from typing import Any, Deque, Dict, Iterator, List, Optional, TextIO, Tuple
+
+# frame-time histogram: bucket upper edges in ms, the last bucket is open-ended
+BUCKETS_MS = (2, 4, 8, 16, 33, 66)
+# returned by callers that have no profiler, so `with` works either way
+NO_PHASE = nullcontext()
+
+
+class Phase:
+    """Rolling samples (seconds) of one phase; a reusable context manager."""
+    __slots__ = ('samples', 'total', 'count', '_start')
+
+    def __init__(self, window: int) -> None:
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.total = 0.0
+        self.count = 0
+        self._start = 0.0
+
+    def __enter__(self) -> 'Phase':
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.add(time.perf_counter() - self._start)
+
+    def add(self, seconds: float) -> None:
+        self.samples.append(seconds)
+        self.total += seconds
+        self.count += 1
+
+
+def _pct(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class Profiler:
+    def __init__(self, window: int = 600, budget_ms: float = 1000 / 60) -> None:
+        self.window = window
+        self.budget_ms = budget_ms
+        self.phases: Dict[str, Phase] = {}
+        self.frames = 0
+        self.over_budget = 0
+        self.histogram = [0] * (len(BUCKETS_MS) + 1)
+        self.alloc_blocks: Deque[int] = deque(maxlen=window)
+        self.gc_collections = [0, 0, 0]
+        self._frame_start = 0.0
+        self._blocks = 0
+        self._gc_start = 0.0
+        # StartupTimer.report() of the launch, included in the report when set
+        self.startup: Optional[Dict[str, Any]] = None
+        gc.callbacks.append(self._on_gc)
+
+    def close(self) -> None:
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+
+    def phase(self, name: str) -> Phase:
+        p = self.phases.get(name)
+        if p is None:
+            p = self.phases[name] = Phase(self.window)
+        return p
+
+    # ------------ frames ------------
+    def begin_frame(self) -> None:
+        self._blocks = sys.getallocatedblocks()
+        self._frame_start = time.perf_counter()
+
+    def end_frame(self) -> None:
+        dt = time.perf_counter() - self._frame_start
+        self.phase("frame").add(dt)
+        ms = dt * 1000
+        self.histogram[bisect_left(BUCKETS_MS, ms)] += 1
+        if ms > self.budget_ms:
+            self.over_budget += 1
+        self.alloc_blocks.append(sys.getallocatedblocks() - self._blocks)
+        self.frames += 1
+
+    def _on_gc(self, event: str, info: Dict[str, Any]) -> None:
+        if event == "start":
+            self._gc_start = time.perf_counter()
+        else:
+            self.phase("gc").add(time.perf_counter() - self._gc_start)
+            self.gc_collections[info["generation"]] += 1
+
+    # ------------ reporting ------------
+    def stats(self, name: str) -> Dict[str, float]:
+        """Rolling p50/p95/p99/max in ms over the window, plus lifetime count and mean."""
+        p = self.phases[name]
+        ordered = sorted(p.samples)
+        if not ordered:
+            return {"count": 0}
+        return {
+            "count": p.count,
+            "mean_ms": p.total / p.count * 1000,
+            "p50_ms": _pct(ordered, 0.50) * 1000,
+            "p95_ms": _pct(ordered, 0.95) * 1000,
+            "p99_ms": _pct(ordered, 0.99) * 1000,
+            "max_ms": ordered[-1] * 1000,
+        }
+
+    def report(self) -> Dict[str, Any]:
+        edges = [f"<{b}ms" for b in BUCKETS_MS] + [f">={BUCKETS_MS[-1]}ms"]
+        allocs = sorted(self.alloc_blocks)
+        report = {
+            "frames": self.frames,
+            "budget_ms": self.budget_ms,
+            "over_budget": self.over_budget,
+            "frame_histogram": dict(zip(edges, self.histogram)),
+            "alloc_blocks_per_frame": {"p50": _pct(allocs, 0.5), "max": allocs[-1]} if allocs else {},
+            "gc_collections": list(self.gc_collections),
+            "phases": {name: self.stats(name) for name in sorted(self.phases)},
+        }
+        if self.startup:
+            report["startup"] = self.startup
+        return report
+
+    def dump(self, path: str) -> None:
+        """Write the report to `path` (replaced atomically, so readers never see half a file)."""
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.report(), f, indent=1)
+        os.replace(tmp, path)
+
+    def lines(self) -> List[str]:
+        """Short text rows for the in-game overlay."""
+        out = [f"{'phase':<18}{'p50':>7}{'p95':>7}{'max':>7}  ms"]
+        for name in sorted(self.phases):
+            s = self.stats(name)
+            if s["count"]:
+                out.append(f"{name:<18}{s['p50_ms']:7.2f}{s['p95_ms']:7.2f}{s['max_ms']:7.2f}")
+        hist = " ".join(f"{e}:{n}" for e, n in zip((*BUCKETS_MS, "+"), self.histogram))
+        out.append(f"frames {self.frames} over {self.budget_ms:.0f}ms: {self.over_budget}  [{hist}]")
+        allocs = self.alloc_blocks
+        if allocs:
+            out.append(f"alloc blocks/frame last {allocs[-1]:+d}  gc {'/'.join(map(str, self.gc_collections))}")
+        return out
+
+
+class StartupTimer:
+    """
+    Durations of the named steps of one launch, in order, and the time from
+    `t0` (e.g. when main.py started) to `done`. Prints its lines to `stream`
+    when done, if one is given.
+    """
+
+    def __init__(self, t0: Optional[float] = None, stream: Optional[TextIO] = None) -> None:
+        self.t0 = time.perf_counter() if t0 is None else t0
+        self.stream = stream
+        self.steps: List[Tuple[str, float]] = []
+        self.total = 0.0
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps.append((name, time.perf_counter() - start))
+
+    def done(self) -> None:
+        self.total = time.perf_counter() - self.t0
+        if self.stream:
+            print("\n".join(self.lines()), file=self.stream)
+
+    def report(self) -> Dict[str, Any]:
+        return {"total_ms": self.total * 1000, "phases_ms": {name: dt * 1000 for name, dt in self.steps}}
+
+    def lines(self) -> List[str]:
+        out = [f"startup {self.total * 1000:7.1f} ms"]
+        out += [f"  {name:<12} {dt * 1000:7.1f} ms" for name, dt in self.steps]
+        return out
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import argparse
+    from config import Config
+    from batch import human_action
+    from engine import Engine
+
+    ap = argparse.ArgumentParser(description="Profile engine phases over headless CPU-vs-CPU rounds")
+    ap.add_argument("--rounds", type=int, default=10)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--max-steps", type=int, default=5000)
+    ap.add_argument("--config", default="config.json")
+    args = ap.parse_args(argv)
+
+    world = Engine(Config.load(args.config))
+    world.profiler = prof = Profiler(window=100_000)
+    for seed in range(args.seed, args.seed + args.rounds):
+        world.init_world(seed)
+        while world.winner is None and world.step_counter < args.max_steps:
+            # one sub-turn counts as a frame here
+            prof.begin_frame()
+            world.step(human_action(world) if world.awaiting_human() else None)
+            prof.end_frame()
+    prof.close()
+    json.dump(prof.report(), sys.stdout, indent=1)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+from __future__ import annotations
+from typing import Dict, Hashable, List, Optional, Tuple
+
+Rect = Tuple[int, int, int, int]
+
+
+class RenderScheduler:
+    """
+    Decides when Game redraws and which parts of the screen it presents.
+
+    Callers `invalidate()` on anything that may change the picture (input,
+    a resolved sub-turn, window exposure). A rendered frame is described as
+    {item key: screen rect}; keys encode everything that affects an item's
+    pixels, so items whose key appeared or vanished since the last frame are
+    exactly the areas that need presenting.
+    """
+    def __init__(self) -> None:
+        self._items: Dict[Hashable, Rect] = {}
+        self._dirty = True      # picture may differ from what is on screen
+        self._full = True       # next present must cover the whole screen
+        self.frames = 0         # frames actually rendered
+
+    def invalidate(self, full: bool = False) -> None:
+        self._dirty = True
+        self._full = self._full or full
+
+    @property
+    def due(self) -> bool:
+        return self._dirty
+
+    def dirty_rects(self, items: Dict[Hashable, Rect]) -> Optional[List[Rect]]:
+        """Record a rendered frame; returns the rects to present (None = whole screen)."""
+        prev, self._items = self._items, items
+        self._dirty = False
+        self.frames += 1
+        if self._full:
+            self._full = False
+            return None
+        rects = [r for k, r in prev.items() if k not in items]
+        rects += [r for k, r in items.items() if k not in prev]
+        return rects
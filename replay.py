@@ -0,0 +1,380 @@
+"""Replays: compact input recordings and seekable state traces.
+
+An input replay (.hhr) is the round seed, config hash, the CPU node budget
+and one byte per human input. Layout (little-endian):
+
+    header   b"HHTR", version u8, seed u64, config hash u64, node budget u32
+    inputs   one byte each: an index into engine.ACTIONS, or engine.TOGGLE
+    result   optional: 0xFF, winner u8 (0 none, 1 HUMAN, 2 HUNTER), steps u32
+
+Inputs are fed back at the human's decision points, so a replay reproduces
+the round exactly when the CPU actors were budgeted in nodes
+(`ai_node_budget` > 0). The budget is recorded in the header and re-used
+when re-simulating, whatever the config says; with a millisecond budget (a
+recorded 0) the CPU may decide differently on another machine. Verify
+replays headless:
+
+    python replay.py verify replays/*.hhr --config config.json
+
+A state trace (.hht) stores every frame of a round as WorldState data, so a
+viewer can jump anywhere without re-simulating: a zlib keyframe every K
+frames, a delta (changed cells and actor fields) for each frame in between,
+and a keyframe index at the end. `TraceReader` memory-maps the file and
+decodes at most one keyframe plus K-1 deltas per seek. Traces written by the
+game, or converted from an input replay:
+
+    python replay.py trace replays/123.hhr
+    python main.py --view replays/123.hht
+"""
+from __future__ import annotations
+import argparse, hashlib, json, mmap, os, struct, sys, zlib
+from array import array
+from dataclasses import dataclass, asdict, replace
+from typing import Callable, List, Optional, Tuple
+
+from config import Config
+from engine import Engine, ACTIONS, TOGGLE
+from state import WorldState, WINNERS
+
+MAGIC = b"HHTR"
+VERSION = 4
+_HEADER = struct.Struct("<4sBQQI")
+_RESULT = struct.Struct("<BBI")
+RESULT_MARK = 0xFF
+# fields that only affect presentation or outputs, left out of the config hash
+DISPLAY_FIELDS = ("cell", "margin", "fps", "colors", "replay_dir", "profile_overlay", "metrics_path",
+                  "event_log")
+# fields recorded in the replay header and applied when re-simulating, so
+# they are left out of the hash as well
+HEADER_FIELDS = ("ai_node_budget",)
+
+
+class ReplayError(ValueError):
+    pass
+
+
+def config_hash(cfg: Config) -> int:
+    """
+    64-bit hash of every config field that affects the simulation. Fields
+    left at their defaults are skipped, so adding an option does not
+    invalidate existing replays.
+    """
+    default = asdict(Config())
+    skip = DISPLAY_FIELDS + HEADER_FIELDS
+    data = {k: v for k, v in asdict(cfg).items() if k not in skip and v != default[k]}
+    digest = hashlib.sha256(json.dumps(data, sort_keys=True).encode()).digest()
+    return int.from_bytes(digest[:8], "little")
+
+
+@dataclass
+class Replay:
+    seed: int
+    config_hash: int
+    inputs: bytes
+    winner: Optional[str] = None    # None: round not finished when saved
+    steps: int = 0
+    node_budget: int = 0            # the recording's ai_node_budget
+
+    @classmethod
+    def from_engine(cls, engine: Engine) -> 'Replay':
+        return cls(engine.seed, config_hash(engine.cfg), bytes(engine.inputs),
+                   engine.winner, engine.step_counter, engine.cfg.ai_node_budget)
+
+    def config(self, cfg: Config) -> Config:
+        """`cfg` with the recorded header fields, to re-simulate with."""
+        return replace(cfg, ai_node_budget=self.node_budget)
+
+    def to_bytes(self) -> bytes:
+        out = _HEADER.pack(MAGIC, VERSION, self.seed, self.config_hash, self.node_budget) + self.inputs
+        if self.winner is not None:
+            out += _RESULT.pack(RESULT_MARK, WINNERS.index(self.winner), self.steps)
+        return out
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'Replay':
+        if len(data) < _HEADER.size:
+            raise ReplayError("truncated header")
+        magic, version, seed, chash, nodes = _HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ReplayError(f"not a v{VERSION} replay")
+        body = data[_HEADER.size:]
+        winner, steps = None, 0
+        end = body.find(RESULT_MARK)
+        if end >= 0:
+            if len(body) - end != _RESULT.size:
+                raise ReplayError("malformed result record")
+            _, w, steps = _RESULT.unpack_from(body, end)
+            winner = WINNERS[w]
+            body = body[:end]
+        if any(b > TOGGLE for b in body):
+            raise ReplayError("unknown input code")
+        return cls(seed, chash, bytes(body), winner, steps, nodes)
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path: str) -> 'Replay':
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+# ------------ state traces ------------
+TRACE_MAGIC = b"HHTV"
+INDEX_MAGIC = b"HHTI"
+TRACE_VERSION = 1
+_TRACE_HEADER = struct.Struct("<4sBHHI")    # magic, version, w, h, keyframe interval
+_RECORD = struct.Struct("<BI")              # kind, payload length
+_FRAME = struct.Struct("<qiB")              # step, turn_idx, winner
+_FOOTER = struct.Struct("<II4s")            # keyframes, frames, INDEX_MAGIC
+KEYFRAME, DELTA = 1, 2
+
+
+def _grids(s: WorldState) -> tuple:
+    return (s.obstacles, s.pu_type, s.fire, s.pu_expiry, s.actors)
+
+
+def _diff(old, new) -> array:
+    """Flat (index, value) pairs where `new` differs from `old`."""
+    out = array('i')
+    if old != new:
+        for i, (a, b) in enumerate(zip(old, new)):
+            if a != b:
+                out.append(i)
+                out.append(b)
+    return out
+
+
+class TraceWriter:
+    """Streams a round's states to `path` (see the module docstring)."""
+    def __init__(self, path: str, w: int, h: int, keyframe_every: int = 256) -> None:
+        self.path = path
+        self.keyframe_every = keyframe_every
+        self.frames = 0
+        self._index = array('Q')
+        self._prev: Optional[WorldState] = None
+        self._f = open(path, "wb")
+        self._f.write(_TRACE_HEADER.pack(TRACE_MAGIC, TRACE_VERSION, w, h, keyframe_every))
+
+    def append(self, s: WorldState) -> None:
+        frame = _FRAME.pack(s.step, s.turn_idx, s.winner)
+        if self.frames % self.keyframe_every == 0:
+            self._index.append(self._f.tell())
+            kind, payload = KEYFRAME, frame + zlib.compress(b"".join(bytes(g) for g in _grids(s)), 1)
+        else:
+            assert self._prev is not None
+            parts = [frame]
+            for old, new in zip(_grids(self._prev), _grids(s)):
+                d = _diff(old, new)
+                parts.append(struct.pack("<I", len(d) // 2))
+                parts.append(d.tobytes())
+            kind, payload = DELTA, b"".join(parts)
+        self._f.write(_RECORD.pack(kind, len(payload)))
+        self._f.write(payload)
+        self._prev = s.clone()
+        self.frames += 1
+
+    def close(self) -> None:
+        if self._f.closed:
+            return
+        self._f.write(self._index.tobytes())
+        self._f.write(_FOOTER.pack(len(self._index), self.frames, INDEX_MAGIC))
+        self._f.close()
+
+    def __enter__(self) -> 'TraceWriter':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class TraceReader:
+    """
+    Random access to the frames of a trace. Stepping forward within a
+    keyframe block continues from the last decoded frame; anything else
+    starts from the nearest keyframe. A trace without its index (the
+    writer never closed) is scanned once on open.
+    """
+    def __init__(self, path: str) -> None:
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        mm = self._mm
+        if len(mm) < _TRACE_HEADER.size:
+            raise ReplayError("truncated trace header")
+        magic, version, self.w, self.h, self.keyframe_every = _TRACE_HEADER.unpack_from(mm)
+        if magic != TRACE_MAGIC or version != TRACE_VERSION:
+            raise ReplayError(f"not a v{TRACE_VERSION} trace")
+        self._index = array('Q')
+        if len(mm) >= _TRACE_HEADER.size + _FOOTER.size and mm[-4:] == INDEX_MAGIC:
+            keys, self.frames, _ = _FOOTER.unpack_from(mm, len(mm) - _FOOTER.size)
+            end = len(mm) - _FOOTER.size
+            self._index.frombytes(mm[end - 8 * keys:end])
+        else:
+            self._scan()
+        # last decoded frame: (frame number, state, offset of the next record)
+        self._cache: Optional[Tuple[int, WorldState, int]] = None
+
+    def _scan(self) -> None:
+        mm, pos, frames = self._mm, _TRACE_HEADER.size, 0
+        while pos + _RECORD.size <= len(mm):
+            kind, n = _RECORD.unpack_from(mm, pos)
+            if pos + _RECORD.size + n > len(mm):
+                break  # cut off mid-record
+            if kind == KEYFRAME:
+                self._index.append(pos)
+            pos += _RECORD.size + n
+            frames += 1
+        self.frames = frames
+
+    def __len__(self) -> int:
+        return self.frames
+
+    def close(self) -> None:
+        self._cache = None
+        self._mm.close()
+        self._file.close()
+
+    def frame(self, i: int) -> WorldState:
+        if not 0 <= i < self.frames:
+            raise IndexError(i)
+        k = self.keyframe_every
+        cache = self._cache
+        if cache is not None and cache[0] <= i and cache[0] // k == i // k:
+            j, state, pos = cache
+            state = state.clone()
+        else:
+            j = i - i % k
+            state, pos = self._keyframe(self._index[i // k])
+        while j < i:
+            pos = self._apply_delta(state, pos)
+            j += 1
+        self._cache = (i, state, pos)
+        return state.clone()
+
+    def _keyframe(self, pos: int) -> Tuple[WorldState, int]:
+        kind, n = _RECORD.unpack_from(self._mm, pos)
+        assert kind == KEYFRAME
+        body = pos + _RECORD.size
+        s = WorldState(self.w, self.h, 0, 0)
+        s.step, s.turn_idx, s.winner = _FRAME.unpack_from(self._mm, body)
+        raw = zlib.decompress(self._mm[body + _FRAME.size:body + n])
+        cells = self.w * self.h
+        s.obstacles[:] = raw[:cells]
+        s.pu_type[:] = raw[cells:2*cells]
+        s.fire = array('i', raw[2*cells:6*cells])
+        s.pu_expiry = array('i', raw[6*cells:10*cells])
+        s.actors = array('i', raw[10*cells:])
+        return s, body + n
+
+    def _apply_delta(self, s: WorldState, pos: int) -> int:
+        mm = self._mm
+        kind, n = _RECORD.unpack_from(mm, pos)
+        assert kind == DELTA
+        p = pos + _RECORD.size
+        s.step, s.turn_idx, s.winner = _FRAME.unpack_from(mm, p)
+        p += _FRAME.size
+        for grid in _grids(s):
+            (count,) = struct.unpack_from("<I", mm, p)
+            p += 4
+            pairs = array('i', mm[p:p + 8 * count])
+            p += 8 * count
+            for t in range(0, 2 * count, 2):
+                grid[pairs[t]] = pairs[t + 1]
+        return pos + _RECORD.size + n
+
+
+def simulate(replay: Replay, cfg: Config,
+             on_frame: Optional[Callable[[Engine], None]] = None) -> Engine:
+    """
+    Re-run the round headless (with the recorded node budget); raises
+    ReplayError if an input no longer fits. `on_frame` sees the world
+    initially and after every change.
+    """
+    world = Engine(replay.config(cfg))
+    world.init_world(replay.seed)
+    notify = on_frame or (lambda _: None)
+    notify(world)
+
+    def run_cpu() -> None:
+        while world.winner is None and not world.awaiting_human():
+            world.step()
+            notify(world)
+
+    for i, code in enumerate(replay.inputs):
+        run_cpu()
+        if world.winner is not None:
+            raise ReplayError(f"round ended before input {i}")
+        if code == TOGGLE:
+            world.toggle_obstacles()
+        elif not world.step(ACTIONS[code]):
+            raise ReplayError(f"input {i} is blocked at step {world.step_counter}")
+        notify(world)
+    if replay.winner is not None:
+        run_cpu()
+    return world
+
+
+def write_trace(replay: Replay, cfg: Config, path: str, keyframe_every: int = 256) -> int:
+    """Re-simulate an input replay into a state trace; returns the frame count."""
+    with TraceWriter(path, cfg.grid_w, cfg.grid_h, keyframe_every) as out:
+        simulate(replay, cfg, lambda world: out.append(world.snapshot()))
+        return out.frames
+
+
+def verify(replay: Replay, cfg: Config) -> Tuple[bool, str]:
+    if replay.config_hash != config_hash(cfg):
+        return False, "config differs from the recording"
+    try:
+        world = simulate(replay, cfg)
+    except ReplayError as e:
+        return False, str(e)
+    if replay.winner is None:
+        return True, f"unfinished round re-simulated to step {world.step_counter}"
+    if (world.winner, world.step_counter) != (replay.winner, replay.steps):
+        return False, (f"recorded {replay.winner} at step {replay.steps}, "
+                       f"got {world.winner} at step {world.step_counter}")
+    return True, f"{world.winner} at step {world.step_counter}"
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("command", choices=("info", "verify", "trace"),
+                    help="trace: write FILE.hht next to each input replay")
+    ap.add_argument("files", nargs="+")
+    ap.add_argument("--config", default="config.json")
+    args = ap.parse_args(argv)
+
+    cfg = Config.load(args.config)
+    failed = 0
+    for path in args.files:
+        try:
+            rep = Replay.load(path)
+        except (OSError, ReplayError) as e:
+            print(f"{path}: {e}")
+            failed += 1
+            continue
+        if args.command != "info" and not rep.node_budget:
+            print(f"{path}: note: recorded without ai_node_budget, CPU moves depend on machine speed",
+                  file=sys.stderr)
+        if args.command == "trace":
+            out = os.path.splitext(path)[0] + ".hht"
+            try:
+                frames = write_trace(rep, cfg, out)
+            except ReplayError as e:
+                print(f"{path}: FAIL {e}")
+                failed += 1
+                continue
+            print(f"{path}: {frames} frames -> {out}")
+        elif args.command == "info":
+            print(f"{path}: seed={rep.seed} config={rep.config_hash:016x} inputs={len(rep.inputs)} "
+                  f"nodes={rep.node_budget} winner={rep.winner} steps={rep.steps}")
+        else:
+            ok, msg = verify(rep, cfg)
+            failed += not ok
+            print(f"{path}: {'OK' if ok else 'FAIL'} {msg}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
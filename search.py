@@ -0,0 +1,218 @@
+from __future__ import annotations
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+import time
+from itertools import islice
+
+from utils import Vec, cheb, legal_neighbors
+from powerups import PowerUp, SpeedPowerUp
+from state import HUMAN, HUNTER, TARGET  # actor slots in a search position
+# who moves on each sub-turn, starting from the target's move
+# (turn_order is Human → Hunter → Human → Hunter → Target)
+SEQUENCE = (TARGET, HUMAN, HUNTER, HUMAN, HUNTER)
+
+CAPTURED = 100_000       # target caught (offset by ply so later captures score higher)
+TARGET_BURNED = 20_000   # target steps into fire; it respawns, but as a sitting duck
+POWERUP_BONUS = 30
+
+# transposition table entry flags
+EXACT, LOWER, UPPER = 0, 1, 2
+
+_MASK64 = (1 << 64) - 1
+
+
+def _mix64(x: int) -> int:
+    # splitmix64 finaliser: cheap, well-distributed Zobrist keys without a table
+    x = (x + 0x9E3779B97F4A7C15) & _MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return x ^ (x >> 31)
+
+
+class _Timeout(Exception):
+    pass
+
+
+class EvaderSearch:
+    """
+    Depth-limited minimax for the target over the real sub-turn order, with
+    alpha-beta pruning, Zobrist-hashed transposition table and iterative
+    deepening under a millisecond budget, or under a node budget when
+    `node_budget` is set (slower machines then search just as deep, which
+    keeps replays reproducible).
+
+    Fires are lethal while they burn (their remaining lifetime is known);
+    a chaser that burns sits out the rest of the line. Stepping on a power-up
+    scores a bonus for the target (a speed power-up for a chaser is a
+    penalty). Effects themselves (double steps, frozen turns) are not modelled.
+    """
+    def __init__(self, budget_ms: float = 2.0, tt_cap: int = 200_000, max_depth: int = 15,
+                 node_budget: int = 0, stop: Optional[Callable[[], bool]] = None):
+        self.budget_ms = budget_ms
+        self.node_budget = node_budget
+        self.stop = stop    # polled with the budget; True ends the search like a timeout
+        self.tt_cap = tt_cap
+        self.max_depth = max_depth
+        self.tt: Dict[int, Tuple[int, int, int, Optional[Vec]]] = {}
+        self._zobrist: Dict[Tuple[int, Optional[Vec]], int] = {}
+        # stats of the last search
+        self.nodes = 0
+        self.depth = 0
+
+    # ------------ hashing ------------
+    def _z(self, who: int, p: Optional[Vec]) -> int:
+        k = self._zobrist.get((who, p))
+        if k is None:
+            cell = (p[0] & 0xFFFFFF) << 24 | (p[1] & 0xFFFFFF) if p else 0xFFFFFFFFFFFF  # dead
+            raw = who << 48 | cell
+            k = self._zobrist[(who, p)] = _mix64(raw)
+        return k
+
+    def _key(self, pos: List[Optional[Vec]], ply: int, collected: int) -> int:
+        # ply is part of the key because fires burn out on a schedule
+        return (self._z(HUMAN, pos[HUMAN]) ^ self._z(HUNTER, pos[HUNTER]) ^ self._z(TARGET, pos[TARGET])
+                ^ _mix64((1 << 62) | ply) ^ _mix64((1 << 61) | collected))
+
+    # ------------ search ------------
+    def best_move(self, target: Vec, human: Optional[Vec], hunter: Optional[Vec], w: int, h: int,
+                  obstacles: Set[Vec], obstacles_enabled: bool,
+                  fires: Optional[Dict[Vec, int]] = None,
+                  powerups: Iterable[PowerUp] = ()) -> Vec:
+        """
+        Target's move. `human`/`hunter` are None while dead; `fires` maps
+        burning cells to the sub-turns they have left.
+        """
+        self.w, self.h = w, h
+        self.obstacles, self.obstacles_enabled = obstacles, obstacles_enabled
+        self.fires = fires or {}
+        self.powerups = {pu.pos: (i, isinstance(pu, SpeedPowerUp)) for i, pu in enumerate(islice(powerups, 60))}
+        self.tt.clear()  # keys are relative to this move's ply 0
+        self.nodes = 0
+        self.depth = 0
+        self._deadline = time.perf_counter() + self.budget_ms / 1000.0
+
+        pos: List[Optional[Vec]] = [human, hunter, target]
+        moves = self._moves(TARGET, pos)
+        best = moves[0]
+        if len(moves) == 1:
+            return best
+        for depth in range(1, self.max_depth + 1):
+            try:
+                value, move = self._search(pos, 0, depth, -10**9, 10**9, 0)
+            except _Timeout:
+                break
+            if move is not None:
+                best = move
+            self.depth = depth
+            if abs(value) >= CAPTURED - self.max_depth:
+                break  # outcome forced either way; deeper search will not change it
+        return best
+
+    def _moves(self, who: int, pos: List[Optional[Vec]]) -> List[Vec]:
+        p = pos[who]
+        assert p is not None
+        opts = legal_neighbors(p, self.w, self.h, self.obstacles, self.obstacles_enabled)
+        target = pos[TARGET]
+        assert target is not None
+        if who == TARGET:
+            if not opts:
+                return [p]
+            chasers = [c for c in (pos[HUMAN], pos[HUNTER]) if c is not None]
+            if chasers:
+                opts.sort(key=lambda q: -min(cheb(q, c) for c in chasers))
+            return opts
+        opts.append(p)  # chasers may stay put
+        opts.sort(key=lambda q: cheb(q, target))
+        return opts
+
+    def _evaluate(self, pos: List[Optional[Vec]]) -> int:
+        target = pos[TARGET]
+        assert target is not None
+        dists = [cheb(target, c) for c in (pos[HUMAN], pos[HUNTER]) if c is not None]
+        if not dists:
+            return 10 * max(self.w, self.h)
+        mobility = len(legal_neighbors(target, self.w, self.h, self.obstacles, self.obstacles_enabled))
+        return 10 * min(dists) + sum(dists) + mobility
+
+    def _search(self, pos: List[Optional[Vec]], ply: int, depth: int, alpha: int, beta: int,
+                collected: int) -> Tuple[int, Optional[Vec]]:
+        self.nodes += 1
+        if not self.nodes & 31 and ((self.nodes >= self.node_budget if self.node_budget
+                                     else time.perf_counter() > self._deadline)
+                                    or (self.stop is not None and self.stop())):
+            raise _Timeout
+        if depth == 0:
+            return self._evaluate(pos), None
+
+        key = self._key(pos, ply, collected)
+        entry = self.tt.get(key)
+        tt_move: Optional[Vec] = None
+        if entry is not None:
+            e_depth, e_value, e_flag, tt_move = entry
+            if e_depth >= depth and (e_flag == EXACT or (e_flag == LOWER and e_value >= beta)
+                                     or (e_flag == UPPER and e_value <= alpha)):
+                return e_value, tt_move
+
+        who = SEQUENCE[ply % len(SEQUENCE)]
+        if pos[who] is None:
+            # dead chaser: its sub-turn passes
+            return self._search(pos, ply + 1, depth - 1, alpha, beta, collected)[0], None
+
+        maximizing = who == TARGET
+        moves = self._moves(who, pos)
+        if tt_move in moves:
+            moves.remove(tt_move)
+            moves.insert(0, tt_move)
+
+        alpha0, beta0 = alpha, beta
+        best_value = -10**9 if maximizing else 10**9
+        best_move: Optional[Vec] = None
+        old = pos[who]
+        for q in moves:
+            value = self._after_move(pos, who, q, ply, depth, alpha, beta, collected)
+            pos[who] = old
+            if maximizing:
+                if value > best_value:
+                    best_value, best_move = value, q
+                alpha = max(alpha, value)
+            else:
+                if value < best_value:
+                    best_value, best_move = value, q
+                beta = min(beta, value)
+            if alpha >= beta:
+                break
+
+        if best_value <= alpha0:
+            flag = UPPER
+        elif best_value >= beta0:
+            flag = LOWER
+        else:
+            flag = EXACT
+        if len(self.tt) >= self.tt_cap:
+            self.tt.clear()
+        self.tt[key] = (depth, best_value, flag, best_move)
+        return best_value, best_move
+
+    def _after_move(self, pos: List[Optional[Vec]], who: int, q: Vec, ply: int, depth: int,
+                    alpha: int, beta: int, collected: int) -> int:
+        """Value of moving `who` to `q`; restores nothing (the caller resets pos[who])."""
+        target = pos[TARGET]
+        burning = self.fires.get(q, 0) > ply
+        if who == TARGET:
+            if q == pos[HUMAN] or q == pos[HUNTER]:
+                return -CAPTURED + ply
+            if burning:
+                return -TARGET_BURNED + ply
+        elif q == target:
+            return -CAPTURED + ply
+
+        bonus = 0
+        pu = self.powerups.get(q)
+        if pu is not None and not collected >> pu[0] & 1:
+            collected |= 1 << pu[0]
+            if who == TARGET:
+                bonus = POWERUP_BONUS
+            elif pu[1]:
+                bonus = -POWERUP_BONUS
+
+        pos[who] = None if burning else q
+        return bonus + self._search(pos, ply + 1, depth - 1, alpha - bonus, beta - bonus, collected)[0]
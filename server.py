@@ -0,0 +1,395 @@
+"""Game rooms served over TCP with asyncio: remote human seats, delta sync.
+
+One process hosts any number of rooms. Each room is an Engine whose human
+seat is played by one connection; other connections to the room watch. The
+CPU actors run in the server, between the player's inputs. After every
+sub-turn the room sends what changed instead of the board. All messages are
+little-endian.
+
+Client to server (fixed size):
+
+    JOIN    u8 1, room u32, role u8 (0 play the human seat, 1 watch)
+    INPUT   u8 2, code u8: an index into engine.ACTIONS, engine.TOGGLE, or RESTART
+
+Server to client: type u8, payload length u32, payload.
+
+    KEYFRAME  room u32, w u16, h u16, step u32, turn_idx u8, winner u8,
+              respawn_delay u16, powerup_length u16, zlib(obstacles grid),
+              3 actor records, fire count u16, fires (x u16, y u16, expires u32),
+              power-up count u16, power-ups (x u16, y u16, type u8, expires u32)
+    DELTA     step u32, turn_idx u8, winner u8, then five u16 counts and their
+              records: changed actors (slot u8, the state.py actor fields as
+              i16), fires started, fires gone (x u16, y u16), power-ups
+              placed, power-ups gone (x u16, y u16)
+    ERROR     utf-8 text; the server closes the connection after it
+
+A keyframe is sent on joining and whenever the board is rebuilt (toggle,
+restart). A fire that starts burns the trees under its 2×2 block, as in
+FireSystem, so burned trees are not sent. Every INPUT from the player gets
+at least one DELTA back, even when the move was blocked and nothing changed.
+`RoomClient` keeps a WorldState in step with a room:
+
+    python server.py serve --port 8765
+    python server.py load --rooms 300 --seconds 10
+"""
+from __future__ import annotations
+import argparse, asyncio, json, random, struct, sys, time, zlib
+from array import array
+from typing import Dict, List, Optional, Set, Tuple
+
+from config import Config
+from engine import Engine, ACTIONS, TOGGLE
+from powerups import SpeedPowerUp
+from state import (WorldState, FIELDS, HUMAN, DEAD, SKIP_TURNS, FREE, TREE, SPEED_UP, TIME_STOP,
+                   actor_fields)
+from utils import Vec
+
+# client -> server
+JOIN, INPUT = 1, 2
+PLAY, WATCH = 0, 1
+# input code that starts a new round in the room
+RESTART = TOGGLE + 1
+_JOIN = struct.Struct("<BIB")
+_INPUT = struct.Struct("<BB")
+# server -> client
+KEYFRAME, DELTA, ERROR = 1, 2, 3
+_MSG = struct.Struct("<BI")
+_KEY_HEAD = struct.Struct("<IHHIBBHH")
+_DELTA_HEAD = struct.Struct("<IBB5H")
+_ACTOR = struct.Struct(f"<B{FIELDS}h")
+_FIRE = struct.Struct("<HHI")
+_CELL = struct.Struct("<HH")
+_POWERUP = struct.Struct("<HHBI")
+_COUNT = struct.Struct("<H")
+
+# a client with this much unsent data is dropped rather than slowing its room
+MAX_BACKLOG = 1 << 20
+# CPU sub-turns resolved after one input at most (the human may be dead for a while)
+MAX_CPU_STEPS = 10_000
+
+
+def _msg(kind: int, payload: bytes) -> bytes:
+    return _MSG.pack(kind, len(payload)) + payload
+
+
+class Room:
+    """One Engine and the connections attached to it."""
+
+    def __init__(self, room_id: int, cfg: Config, seed: Optional[int] = None) -> None:
+        self.id = room_id
+        self.engine = Engine(cfg)
+        self.engine.init_world(seed)
+        self.player: Optional[asyncio.StreamWriter] = None
+        self.clients: Set[asyncio.StreamWriter] = set()
+        self.steps = 0
+        # what the clients were last told, to diff against
+        self._actors: List[Tuple[int, ...]] = []
+        self._fires: Dict[Vec, int] = {}
+        self._powerups: Dict[Vec, Tuple[int, int]] = {}
+        self._cpu()
+
+    # ------------ state as sent ------------
+    def _current(self) -> Tuple[List[Tuple[int, ...]], Dict[Vec, int], Dict[Vec, Tuple[int, int]]]:
+        e = self.engine
+        actors = [actor_fields(a) for a in (e.human, e.hunter, e.target)]
+        fires = {a: f.expires_at for a, f in e.fire.fires.items()} if e.fire else {}
+        powerups = {pu.pos: (SPEED_UP if isinstance(pu, SpeedPowerUp) else TIME_STOP, pu.expires_at)
+                    for pu in e.powerups}
+        return actors, fires, powerups
+
+    def keyframe(self) -> bytes:
+        e, cfg = self.engine, self.engine.cfg
+        actors, fires, powerups = self._current()
+        out = [_KEY_HEAD.pack(self.id, cfg.grid_w, cfg.grid_h, e.step_counter, e.turn_idx,
+                              (None, "HUMAN", "HUNTER").index(e.winner), cfg.respawn_delay, cfg.powerup_length)]
+        grid = zlib.compress(e.snapshot().obstacles, 1)
+        out.append(struct.pack("<I", len(grid)) + grid)
+        out += [_ACTOR.pack(slot, *f) for slot, f in enumerate(actors)]
+        out.append(_COUNT.pack(len(fires)))
+        out += [_FIRE.pack(x, y, exp) for (x, y), exp in fires.items()]
+        out.append(_COUNT.pack(len(powerups)))
+        out += [_POWERUP.pack(x, y, kind, exp) for (x, y), (kind, exp) in powerups.items()]
+        self._actors, self._fires, self._powerups = actors, fires, powerups
+        return _msg(KEYFRAME, b"".join(out))
+
+    def delta(self) -> bytes:
+        e = self.engine
+        actors, fires, powerups = self._current()
+        moved = [_ACTOR.pack(slot, *f) for slot, f in enumerate(actors) if f != self._actors[slot]]
+        started = [_FIRE.pack(x, y, exp) for (x, y), exp in fires.items() if self._fires.get((x, y)) != exp]
+        gone = [_CELL.pack(*p) for p in self._fires if p not in fires]
+        placed = [_POWERUP.pack(x, y, *v) for (x, y), v in powerups.items() if self._powerups.get((x, y)) != v]
+        taken = [_CELL.pack(*p) for p in self._powerups if p not in powerups]
+        self._actors, self._fires, self._powerups = actors, fires, powerups
+        head = _DELTA_HEAD.pack(e.step_counter, e.turn_idx, (None, "HUMAN", "HUNTER").index(e.winner),
+                                len(moved), len(started), len(gone), len(placed), len(taken))
+        return _msg(DELTA, b"".join([head, *moved, *started, *gone, *placed, *taken]))
+
+    # ------------ play ------------
+    def _cpu(self) -> List[bytes]:
+        """Resolve sub-turns until the human's input is needed; one delta each."""
+        e = self.engine
+        out = []
+        for _ in range(MAX_CPU_STEPS):
+            if e.winner is not None or e.awaiting_human():
+                break
+            e.step()
+            self.steps += 1
+            out.append(self.delta())
+        return out
+
+    def handle(self, code: int) -> bytes:
+        """Apply one input from the player; returns the messages for every client."""
+        e = self.engine
+        if code == RESTART:
+            e.init_world()
+            self._cpu()
+            return self.keyframe()
+        if code == TOGGLE:
+            e.toggle_obstacles()
+            return self.keyframe()
+        out: List[bytes] = []
+        if code < len(ACTIONS) and e.awaiting_human() and e.step(ACTIONS[code]):
+            self.steps += 1
+            out.append(self.delta())
+            out += self._cpu()
+        return b"".join(out) or self.delta()
+
+    def broadcast(self, data: bytes) -> None:
+        for w in list(self.clients):
+            if w.transport.get_write_buffer_size() > MAX_BACKLOG:
+                self.clients.discard(w)
+                w.close()
+            else:
+                w.write(data)
+
+
+class Server:
+    """Rooms by id, created on the first JOIN and dropped with their last client."""
+
+    def __init__(self, cfg: Config) -> None:
+        self.cfg = cfg
+        self.rooms: Dict[int, Room] = {}
+        self._listener: Optional[asyncio.AbstractServer] = None
+        self._handlers: Set[asyncio.Task] = set()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765) -> asyncio.AbstractServer:
+        self._listener = await asyncio.start_server(self.handle, host, port)
+        return self._listener
+
+    async def stop(self) -> None:
+        """Stop listening, disconnect everyone and wait for the connections to wind down."""
+        if self._listener:
+            self._listener.close()
+        for room in list(self.rooms.values()):
+            for w in list(room.clients):
+                w.close()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        room: Optional[Room] = None
+        task = asyncio.current_task()
+        assert task
+        self._handlers.add(task)
+        try:
+            kind, room_id, role = _JOIN.unpack(await reader.readexactly(_JOIN.size))
+            if kind != JOIN:
+                writer.write(_msg(ERROR, b"expected JOIN"))
+                return
+            room = self.rooms.get(room_id)
+            if room is None:
+                room = self.rooms[room_id] = Room(room_id, self.cfg)
+            if role == PLAY:
+                if room.player is not None:
+                    writer.write(_msg(ERROR, b"the human seat is taken"))
+                    return
+                room.player = writer
+            room.clients.add(writer)
+            # between inputs the clients are up to date, so a keyframe of now is safe to send
+            writer.write(room.keyframe())
+            while True:
+                kind, code = _INPUT.unpack(await reader.readexactly(_INPUT.size))
+                if kind == INPUT and writer is room.player:
+                    room.broadcast(room.handle(code))
+                    await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if room is not None:
+                room.clients.discard(writer)
+                if room.player is writer:
+                    room.player = None
+                if not room.clients and self.rooms.get(room.id) is room:
+                    del self.rooms[room.id]
+            writer.close()
+            self._handlers.discard(task)
+
+
+class RoomClient:
+    """A connection to one room, keeping `state` (a WorldState) in step with it."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader, self.writer = reader, writer
+        self.room = 0
+        self.state = WorldState(1, 1, 0, 0)
+
+    @classmethod
+    async def connect(cls, host: str, port: int, room: int, role: int = PLAY) -> 'RoomClient':
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(_JOIN.pack(JOIN, room, role))
+        client = cls(reader, writer)
+        await client.recv()
+        return client
+
+    @property
+    def my_turn(self) -> bool:
+        """The room is waiting for the human seat's input (Engine.awaiting_human)."""
+        s = self.state
+        b = HUMAN * FIELDS
+        return not s.winner and s.current == HUMAN and not s.actors[b + DEAD] and not s.actors[b + SKIP_TURNS]
+
+    async def send(self, code: int) -> None:
+        self.writer.write(_INPUT.pack(INPUT, code))
+        await self.writer.drain()
+
+    async def recv(self) -> int:
+        """Read and apply one message; returns its type."""
+        kind, size = _MSG.unpack(await self.reader.readexactly(_MSG.size))
+        payload = await self.reader.readexactly(size)
+        if kind == KEYFRAME:
+            self._keyframe(payload)
+        elif kind == DELTA:
+            self._delta(payload)
+        elif kind == ERROR:
+            raise ConnectionError(payload.decode())
+        return kind
+
+    def close(self) -> None:
+        self.writer.close()
+
+    def _keyframe(self, data: bytes) -> None:
+        room, w, h, step, turn_idx, winner, respawn_delay, powerup_length = _KEY_HEAD.unpack_from(data)
+        self.room = room
+        s = self.state = WorldState(w, h, respawn_delay, powerup_length)
+        s.step, s.turn_idx, s.winner = step, turn_idx, winner
+        pos = _KEY_HEAD.size
+        (n,) = struct.unpack_from("<I", data, pos)
+        s.obstacles[:] = zlib.decompress(data[pos + 4:pos + 4 + n])
+        pos += 4 + n
+        for _ in range(3):
+            slot, *fields = _ACTOR.unpack_from(data, pos)
+            s.actors[slot * FIELDS:(slot + 1) * FIELDS] = array('i', fields)
+            pos += _ACTOR.size
+        (n,) = _COUNT.unpack_from(data, pos)
+        pos += _COUNT.size
+        for x, y, exp in _FIRE.iter_unpack(data[pos:pos + n * _FIRE.size]):
+            s.fire[y * w + x] = exp
+        pos += n * _FIRE.size
+        (n,) = _COUNT.unpack_from(data, pos)
+        pos += _COUNT.size
+        for x, y, kind, exp in _POWERUP.iter_unpack(data[pos:pos + n * _POWERUP.size]):
+            s.pu_type[y * w + x], s.pu_expiry[y * w + x] = kind, exp
+
+    def _delta(self, data: bytes) -> None:
+        s, w = self.state, self.state.w
+        s.step, s.turn_idx, s.winner, moved, started, gone, placed, taken = _DELTA_HEAD.unpack_from(data)
+        pos = _DELTA_HEAD.size
+        for _ in range(moved):
+            slot, *fields = _ACTOR.unpack_from(data, pos)
+            s.actors[slot * FIELDS:(slot + 1) * FIELDS] = array('i', fields)
+            pos += _ACTOR.size
+        fires = list(_FIRE.iter_unpack(data[pos:pos + started * _FIRE.size]))
+        pos += started * _FIRE.size
+        for x, y in _CELL.iter_unpack(data[pos:pos + gone * _CELL.size]):
+            s.fire[y * w + x] = 0
+        pos += gone * _CELL.size
+        for x, y, exp in fires:
+            s.fire[y * w + x] = exp
+            # a new fire burns the trees under it
+            for i in (y * w + x, y * w + x + 1, (y + 1) * w + x, (y + 1) * w + x + 1):
+                if s.obstacles[i] == TREE:
+                    s.obstacles[i] = FREE
+        powerups = list(_POWERUP.iter_unpack(data[pos:pos + placed * _POWERUP.size]))
+        pos += placed * _POWERUP.size
+        for x, y in _CELL.iter_unpack(data[pos:pos + taken * _CELL.size]):
+            s.pu_type[y * w + x] = s.pu_expiry[y * w + x] = 0
+        for x, y, kind, exp in powerups:
+            s.pu_type[y * w + x], s.pu_expiry[y * w + x] = kind, exp
+
+
+async def load_test(cfg: Config, rooms: int, seconds: float, host: str = "127.0.0.1", port: int = 0) -> dict:
+    """
+    `rooms` rooms, each played by a client sending random moves as soon as
+    it is its turn (RESTART after a round ends). With port 0 the server runs
+    in this process too; otherwise an external server at host:port is used.
+    """
+    server = None
+    if not port:
+        server = Server(cfg)
+        port = (await server.start(host, 0)).sockets[0].getsockname()[1]
+    clients = [await RoomClient.connect(host, port, room) for room in range(rooms)]
+    latencies: List[float] = []
+    counts = {"inputs": 0, "sub_turns": 0, "rounds": 0}
+    deadline = time.perf_counter() + seconds
+
+    async def play(c: RoomClient, rng: random.Random) -> None:
+        while time.perf_counter() < deadline:
+            code = RESTART if c.state.winner else rng.randrange(len(ACTIONS))
+            counts["rounds"] += code == RESTART
+            t = time.perf_counter()
+            step = c.state.step
+            await c.send(code)
+            while True:
+                await c.recv()
+                if c.state.winner or c.my_turn:
+                    break
+            latencies.append(time.perf_counter() - t)
+            counts["inputs"] += 1
+            if code != RESTART:
+                counts["sub_turns"] += c.state.step - step
+
+    start = time.perf_counter()
+    await asyncio.gather(*(play(c, random.Random(i)) for i, c in enumerate(clients)))
+    elapsed = time.perf_counter() - start
+    for c in clients:
+        c.close()
+    if server:
+        await server.stop()
+    latencies.sort()
+    return {
+        "rooms": rooms,
+        "seconds": elapsed,
+        "inputs_per_s": counts["inputs"] / elapsed,
+        "sub_turns_per_s": counts["sub_turns"] / elapsed,
+        "rounds": counts["rounds"],
+        "input_latency_ms": {"p50": latencies[len(latencies) // 2] * 1000,
+                             "p99": latencies[int(len(latencies) * 0.99)] * 1000} if latencies else {},
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("command", choices=("serve", "load"),
+                    help="load: play random moves in many rooms and report throughput as JSON")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=0, help="serve: default 8765; load: 0 runs a server in-process")
+    ap.add_argument("--config", default="config.json")
+    ap.add_argument("--rooms", type=int, default=100)
+    ap.add_argument("--seconds", type=float, default=10.0)
+    args = ap.parse_args(argv)
+
+    cfg = Config.load(args.config)
+    if args.command == "serve":
+        async def serve() -> None:
+            server = await Server(cfg).start(args.host, args.port or 8765)
+            print(f"listening on {args.host}:{args.port or 8765}", file=sys.stderr)
+            async with server:
+                await server.serve_forever()
+        asyncio.run(serve())
+    else:
+        json.dump(asyncio.run(load_test(cfg, args.rooms, args.seconds, args.host, args.port)), sys.stdout, indent=1)
+        print()
+
+
+if __name__ == "__main__":
+    main()
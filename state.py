@@ -0,0 +1,277 @@
+from __future__ import annotations
+from array import array
+from typing import List, Optional, Tuple, TYPE_CHECKING
+
+from utils import Vec, DIRS_8
+from connectivity import Components
+from freecells import column_ring_offsets
+from powerups import SpeedPowerUp
+
+if TYPE_CHECKING:
+    from engine import Engine
+
+# actor slots
+HUMAN, HUNTER, TARGET = 0, 1, 2
+TURN_ORDER = (HUMAN, HUNTER, HUMAN, HUNTER, TARGET)
+WINNERS = (None, "HUMAN", "HUNTER")
+
+# per-actor fields, packed as actors[slot * FIELDS + field]; LAST_X/LAST_Y are -1 when unset
+X, Y, DEAD, RESPAWN, DEATHS, SPEED, SKIP_TURNS, LAST_X, LAST_Y = range(9)
+FIELDS = 9
+
+# obstacle grid values
+FREE, TREE, ROCK = 0, 1, 2
+# power-up grid values
+NO_POWERUP, SPEED_UP, TIME_STOP = 0, 1, 2
+
+# stay put (CPU) / skip the turn (human)
+STAY: Vec = (0, 0)
+
+
+def actor_fields(a) -> Tuple[int, ...]:
+    """An Engine actor as its FIELDS packed values."""
+    last = a.last_death_pos or (-1, -1)
+    return (a.pos[0], a.pos[1], int(a.dead), a.respawn_ticks, a.deaths,
+            a.speed_turns, a.skip_turns, last[0], last[1])
+
+
+class WorldState:
+    """
+    Packed, cloneable copy of an Engine's world for search and rollouts.
+
+    Grids are flat (index y*w + x): obstacles and power-up types in
+    bytearrays, fire and power-up expiry steps in int arrays, and fires are
+    stored at their 2×2 anchor cell. A fire burns while its expiry is above
+    `step`, and a power-up is on the board the same way, so nothing needs
+    ticking. The three actors are packed into a single int array. Respawns
+    label the open regions of the obstacle grid on first need (`_regions`,
+    shared by clones until the grid changes).
+
+    `apply` resolves one sub-turn with the same rules as Engine.step minus
+    the random parts (fire and power-up spawns); `undo` reverts the last
+    `apply`. `clone` copies a handful of flat buffers.
+    """
+    __slots__ = ('w', 'h', 'respawn_delay', 'powerup_length', 'step', 'turn_idx', 'winner',
+                 'obstacles', 'fire', 'pu_type', 'pu_expiry', 'actors', '_undo',
+                 '_regions')
+
+    def __init__(self, w: int, h: int, respawn_delay: int, powerup_length: int):
+        self.w, self.h = w, h
+        self.respawn_delay = respawn_delay
+        self.powerup_length = powerup_length
+        self.step = 0
+        self.turn_idx = 0
+        self.winner = 0          # index into WINNERS
+        n = w * h
+        self.obstacles = bytearray(n)
+        self.fire = array('i', bytes(4 * n))
+        self.pu_type = bytearray(n)
+        self.pu_expiry = array('i', bytes(4 * n))
+        self.actors = array('i', bytes(4 * 3 * FIELDS))
+        self._undo: List[tuple] = []
+        # (obstacle grid it was built from, its regions)
+        self._regions: Optional[Tuple[bytes, Components]] = None
+
+    @classmethod
+    def from_engine(cls, engine: 'Engine') -> 'WorldState':
+        cfg = engine.cfg
+        s = cls(cfg.grid_w, cfg.grid_h, cfg.respawn_delay, cfg.powerup_length)
+        w = s.w
+        s.step = engine.step_counter
+        s.turn_idx = engine.turn_idx
+        s.winner = WINNERS.index(engine.winner)
+        if engine.obstacles_enabled:
+            for (x, y) in engine.obstacles:
+                s.obstacles[y*w + x] = TREE if engine.obstacles_styles.get((x, y)) == 'tree' else ROCK
+        if engine.fire:
+            for f in engine.fire.fires.values():
+                s.fire[f.top_left[1]*w + f.top_left[0]] = f.expires_at
+        for pu in engine.powerups:
+            if pu.active:
+                i = pu.pos[1]*w + pu.pos[0]
+                s.pu_type[i] = SPEED_UP if isinstance(pu, SpeedPowerUp) else TIME_STOP
+                s.pu_expiry[i] = pu.expires_at
+        for slot, a in enumerate((engine.human, engine.hunter, engine.target)):
+            assert a
+            s.actors[slot*FIELDS:(slot+1)*FIELDS] = array('i', actor_fields(a))
+        return s
+
+    def clone(self) -> 'WorldState':
+        s = WorldState.__new__(WorldState)
+        s.w, s.h = self.w, self.h
+        s.respawn_delay, s.powerup_length = self.respawn_delay, self.powerup_length
+        s.step, s.turn_idx, s.winner = self.step, self.turn_idx, self.winner
+        s.obstacles = self.obstacles[:]
+        s.fire = self.fire[:]
+        s.pu_type = self.pu_type[:]
+        s.pu_expiry = self.pu_expiry[:]
+        s.actors = self.actors[:]
+        s._undo = []
+        s._regions = self._regions
+        return s
+
+    # ------------ queries ------------
+    @property
+    def current(self) -> int:
+        return TURN_ORDER[self.turn_idx]
+
+    def pos(self, slot: int) -> Vec:
+        b = slot * FIELDS
+        return (self.actors[b + X], self.actors[b + Y])
+
+    def alive(self, slot: int) -> bool:
+        return not self.actors[slot * FIELDS + DEAD]
+
+    def burning(self, x: int, y: int) -> bool:
+        # a cell is covered by the fires anchored at itself and its up/left neighbours
+        fire, w, step = self.fire, self.w, self.step
+        i = y*w + x
+        if fire[i] > step:
+            return True
+        if x > 0 and fire[i - 1] > step:
+            return True
+        if y > 0 and (fire[i - w] > step or (x > 0 and fire[i - w - 1] > step)):
+            return True
+        return False
+
+    def passable(self, x: int, y: int) -> bool:
+        return 0 <= x < self.w and 0 <= y < self.h and not self.obstacles[y*self.w + x]
+
+    def legal_moves(self) -> List[Vec]:
+        """Deltas the current actor can take (STAY included)."""
+        x, y = self.pos(self.current)
+        return [STAY] + [d for d in DIRS_8 if self.passable(x + d[0], y + d[1])]
+
+    # ------------ transitions ------------
+    def apply(self, delta: Vec = STAY, delta2: Optional[Vec] = None) -> bool:
+        """
+        Resolve the current sub-turn. `delta` is the move (STAY skips for the
+        human); under a speed power-up the actor moves again by `delta2`
+        (default: `delta`). A blocked human move is rejected (returns False)
+        as in Engine; a blocked CPU move stays put.
+        """
+        if self.winner:
+            return False
+        act = self.actors
+        slot = TURN_ORDER[self.turn_idx]
+        b = slot * FIELDS
+        collected: List[Tuple[int, int]] = []
+        record = (act[:], self.step, self.turn_idx, self.winner, collected)
+        if act[b + SKIP_TURNS] > 0:
+            act[b + SKIP_TURNS] -= 1
+            if act[b + SPEED] > 0:
+                act[b + SPEED] -= 1
+            self._undo.append(record)
+            self._advance(False)
+            return True
+        if act[b + DEAD]:
+            self._undo.append(record)
+            self._advance(slot != HUMAN)
+            return True
+
+        x, y = act[b + X] + delta[0], act[b + Y] + delta[1]
+        if not self.passable(x, y):
+            if slot == HUMAN:
+                return False
+            x, y = act[b + X], act[b + Y]
+        self._undo.append(record)
+        self._move(slot, x, y, collected)
+        if not act[b + DEAD] and act[b + SPEED] > 0 and (slot != HUMAN or delta != STAY):
+            d = delta if delta2 is None else delta2
+            x, y = act[b + X] + d[0], act[b + Y] + d[1]
+            if self.passable(x, y):
+                self._move(slot, x, y, collected)
+            elif slot != HUMAN:
+                self._move(slot, act[b + X], act[b + Y], collected)
+        if act[b + SPEED] > 0:
+            act[b + SPEED] -= 1
+        self._advance(True)
+        return True
+
+    def undo(self) -> None:
+        actors, self.step, self.turn_idx, self.winner, collected = self._undo.pop()
+        self.actors[:] = actors
+        for i, kind in reversed(collected):
+            self.pu_type[i] = kind
+
+    def _move(self, slot: int, x: int, y: int, collected: List[Tuple[int, int]]) -> None:
+        act = self.actors
+        b = slot * FIELDS
+        act[b + X], act[b + Y] = x, y
+        i = y*self.w + x
+        kind = self.pu_type[i]
+        if kind and self.pu_expiry[i] > self.step:
+            collected.append((i, kind))
+            self.pu_type[i] = NO_POWERUP
+            dur = self.powerup_length
+            if kind == SPEED_UP:
+                act[b + SPEED] = dur
+            else:
+                # time stop freezes the other chaser, or both if the target picks it
+                frozen = {HUMAN: (HUNTER,), HUNTER: (HUMAN,)}.get(slot, (HUMAN, HUNTER))
+                for o in frozen:
+                    act[o*FIELDS + SKIP_TURNS] = max(act[o*FIELDS + SKIP_TURNS], dur)
+        if self.burning(x, y):
+            self._kill(slot)
+
+    def _kill(self, slot: int) -> None:
+        act = self.actors
+        b = slot * FIELDS
+        if act[b + DEAD]:
+            return
+        act[b + DEATHS] += 1
+        act[b + DEAD] = 1
+        act[b + RESPAWN] = self.respawn_delay
+        act[b + LAST_X], act[b + LAST_Y] = act[b + X], act[b + Y]
+
+    def _advance(self, check_win: bool) -> None:
+        act = self.actors
+        self.turn_idx = (self.turn_idx + 1) % len(TURN_ORDER)
+        self.step += 1
+        if check_win:
+            target = self.pos(TARGET)
+            if self.alive(HUMAN) and self.pos(HUMAN) == target:
+                self.winner = 1
+            elif self.alive(HUNTER) and self.pos(HUNTER) == target:
+                self.winner = 2
+        # the deterministic part of Engine.post_step: fire kills, then respawns
+        for slot in (HUMAN, HUNTER, TARGET):
+            b = slot * FIELDS
+            if not act[b + DEAD] and self.burning(act[b + X], act[b + Y]):
+                self._kill(slot)
+        for slot in (HUMAN, HUNTER, TARGET):
+            b = slot * FIELDS
+            if act[b + DEAD] and act[b + RESPAWN] > 0:
+                act[b + RESPAWN] -= 1
+                if act[b + RESPAWN] <= 0:
+                    where = (act[b + LAST_X], act[b + LAST_Y]) if act[b + LAST_X] >= 0 else self.pos(slot)
+                    act[b + X], act[b + Y] = self._safe_spawn(where)
+                    act[b + DEAD] = 0
+                    act[b + RESPAWN] = 0
+
+    def _components(self) -> Components:
+        grid = bytes(self.obstacles)
+        if self._regions is None or self._regions[0] != grid:
+            w = self.w
+            cells = [(i % w, i // w) for i, v in enumerate(grid) if v]
+            self._regions = (grid, Components(w, self.h, cells))
+        return self._regions[1]
+
+    def _safe_spawn(self, around: Vec) -> Vec:
+        # Engine.find_safe_spawn: nearest ring first, each in dx, then dy order
+        live = {self.pos(s) for s in (HUMAN, HUNTER, TARGET) if self.alive(s)}
+        w, h = self.w, self.h
+        cx, cy = around
+        target = self.pos(TARGET)
+        regions = None
+        for r in range(max(cx, w - 1 - cx, cy, h - 1 - cy) + 1):
+            for dx, dy in column_ring_offsets(r):
+                x, y = cx + dx, cy + dy
+                if not self.passable(x, y) or self.burning(x, y) or (x, y) in live:
+                    continue
+                if regions is None:
+                    regions = self._components()
+                if not regions.same((x, y), target):
+                    continue
+                return (x, y)
+        return (w // 2, h // 2)
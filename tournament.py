@@ -0,0 +1,228 @@
+"""Round-robin tournament of chaser policies with Elo ratings.
+
+Every ordered pair of entrants plays `--rounds` rounds: the first in the
+HUMAN seat, the second in the HUNTER seat, both against the same TARGET
+policy. Whoever catches the target wins the round; a round that reaches
+`--max-steps` is a draw. E.g.
+
+    python tournament.py greedy pathfinder mybots:Lurker --rounds 200 --cache results.jsonl
+
+Entrants are policy specs (see policies.py). Each move gets `--budget-ms` of
+CPU time, enforced by policies.Budgeted; a move over budget is replaced by
+staying put.
+Results are appended to the `--cache` file keyed by the three policy
+versions, the seed and the setup (config, step cap, budget), so re-running a
+tournament only plays the rounds it has not seen. Rounds with a timed-out
+move are not cached, since they depend on the machine's load; they count in
+the run that played them and are replayed next time. Ratings are then updated
+in a fixed order (pairing, seed), so they do not depend on which worker
+finished first.
+"""
+from __future__ import annotations
+import argparse, hashlib, itertools, json, os, sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, asdict, field
+from typing import Dict, List, Optional, Tuple
+
+from config import Config
+from engine import Engine
+from policies import Budgeted, load_policy
+from batch import apply_overrides, batch_config
+
+ELO_START = 1500.0
+ELO_K = 16.0
+
+
+@dataclass
+class MatchResult:
+    human: str                  # policy ids (name@version)
+    hunter: str
+    target: str
+    seed: int
+    setup: str
+    winner: Optional[str]       # "HUMAN", "HUNTER" or None (draw)
+    steps: int
+    timeouts: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def key(self) -> Tuple[str, str, str, int, str]:
+        return (self.human, self.hunter, self.target, self.seed, self.setup)
+
+
+def setup_key(cfg: Config, max_steps: int, budget_ms: float) -> str:
+    """Fingerprint of everything besides the policies and seed that decides a round."""
+    data = {k: v for k, v in asdict(cfg).items() if k != "colors"}
+    blob = json.dumps([data, max_steps, budget_ms], sort_keys=True)
+    return hashlib.sha1(blob.encode()).hexdigest()[:12]
+
+
+def play_match(cfg: Config, seed: int, specs: Tuple[str, str, str], max_steps: int, budget_ms: float,
+               setup: str = "") -> MatchResult:
+    world = Engine(cfg)
+    seats = {seat: Budgeted(load_policy(spec), budget_ms) for seat, spec in zip(("HUMAN", "HUNTER", "TARGET"), specs)}
+    world.policies.update(seats)
+    world.init_world(seed)
+    while world.winner is None and world.step_counter < max_steps:
+        world.step()
+    return MatchResult(seats["HUMAN"].id, seats["HUNTER"].id, seats["TARGET"].id, seed, setup,
+                       world.winner, world.step_counter,
+                       {seat: p.timeouts for seat, p in seats.items() if p.timeouts})
+
+
+def _play_chunk(config_path: str, params: Dict[str, object], specs: Tuple[str, str, str], seeds: List[int],
+                max_steps: int, budget_ms: float) -> List[MatchResult]:
+    # runs in a worker process
+    cfg = batch_config(config_path, params)
+    setup = setup_key(cfg, max_steps, budget_ms)
+    return [play_match(cfg, s, specs, max_steps, budget_ms, setup) for s in seeds]
+
+
+class ResultCache:
+    """
+    MatchResults by key, loaded from and appended to a JSON-lines file.
+    Results with timeouts are kept for this run only and never written.
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path
+        self.results: Dict[tuple, MatchResult] = {}
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        res = MatchResult(**json.loads(line))
+                        if not res.timeouts:
+                            self.results[res.key] = res
+
+    def get(self, key: tuple) -> Optional[MatchResult]:
+        return self.results.get(key)
+
+    def add(self, res: MatchResult) -> None:
+        self.results[res.key] = res
+        if self.path and not res.timeouts:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(asdict(res)) + "\n")
+
+
+class Elo:
+    def __init__(self, k: float = ELO_K, start: float = ELO_START) -> None:
+        self.k, self.start = k, start
+        self.ratings: Dict[str, float] = {}
+
+    def rating(self, player: str) -> float:
+        return self.ratings.get(player, self.start)
+
+    def expected(self, a: str, b: str) -> float:
+        return 1 / (1 + 10 ** ((self.rating(b) - self.rating(a)) / 400))
+
+    def update(self, a: str, b: str, score_a: float) -> None:
+        """Record a game of `a` against `b`; score_a is 1 (win), 0.5 (draw) or 0."""
+        delta = self.k * (score_a - self.expected(a, b))
+        self.ratings[a] = self.rating(a) + delta
+        self.ratings[b] = self.rating(b) - delta
+
+
+@dataclass
+class Standing:
+    policy: str
+    rating: float
+    wins: int = 0
+    losses: int = 0
+    draws: int = 0
+    timeouts: int = 0
+
+
+def run_tournament(entrants: List[str], rounds: int, *, target: str = "evader", config_path: str = "config.json",
+                   params: Optional[Dict[str, object]] = None, seed: int = 0, max_steps: int = 5000,
+                   budget_ms: float = 50.0, workers: Optional[int] = None, cache: Optional[ResultCache] = None,
+                   chunk: int = 8) -> Tuple[List[Standing], int]:
+    """
+    Play the round robin (skipping cached rounds) and rate the entrants.
+    Returns the standings, best first, and the number of rounds played.
+    """
+    params = params or {}
+    cache = cache or ResultCache()
+    # searches budgeted in nodes (batch.NODE_BUDGET by default), so the same
+    # seed plays the same round and cached results stay valid
+    cfg = batch_config(config_path, params)
+    setup = setup_key(cfg, max_steps, budget_ms)
+    ids = {}
+    for spec in set(entrants) | {target}:
+        policy = load_policy(spec)
+        seats = ("TARGET",) if spec == target else ("HUMAN", "HUNTER")
+        if spec in entrants and spec == target:
+            raise ValueError(f"{spec!r} cannot be both an entrant and the target")
+        if not (set(seats) <= set(policy.seats)):
+            raise ValueError(f"{spec!r} cannot play {'/'.join(seats)} (it plays {'/'.join(policy.seats)})")
+        ids[spec] = policy.id
+    pairings = list(itertools.permutations(entrants, 2))
+    seeds = range(seed, seed + rounds)
+
+    todo: Dict[Tuple[str, str], List[int]] = {}
+    for a, b in pairings:
+        todo[a, b] = [s for s in seeds if cache.get((ids[a], ids[b], ids[target], s, setup)) is None]
+    played = 0
+    if any(todo.values()):
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            futures = [pool.submit(_play_chunk, config_path, params, (a, b, target), missing[i:i + chunk],
+                                   max_steps, budget_ms)
+                       for (a, b), missing in todo.items() for i in range(0, len(missing), chunk)]
+            for fut in as_completed(futures):
+                for res in fut.result():
+                    cache.add(res)
+                    played += 1
+
+    elo = Elo()
+    table = {spec: Standing(ids[spec], elo.start) for spec in entrants}
+    for a, b in pairings:
+        for s in seeds:
+            res = cache.get((ids[a], ids[b], ids[target], s, setup))
+            assert res is not None
+            score = {"HUMAN": 1.0, "HUNTER": 0.0}.get(res.winner or "", 0.5)
+            elo.update(ids[a], ids[b], score)
+            for spec, sc, seat in ((a, score, "HUMAN"), (b, 1 - score, "HUNTER")):
+                st = table[spec]
+                if sc == 1:
+                    st.wins += 1
+                elif sc == 0:
+                    st.losses += 1
+                else:
+                    st.draws += 1
+                st.timeouts += res.timeouts.get(seat, 0)
+    for st in table.values():
+        st.rating = elo.rating(st.policy)
+    return sorted(table.values(), key=lambda st: -st.rating), played
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("entrants", nargs="+", help="policy specs: built-in names or module:attr")
+    ap.add_argument("--rounds", type=int, default=50, help="rounds per ordered pairing")
+    ap.add_argument("--target", default="evader", help="policy of the TARGET seat")
+    ap.add_argument("--set", action="append", default=[], metavar="KEY=VALUE", help="config override")
+    ap.add_argument("--config", default="config.json")
+    ap.add_argument("--seed", type=int, default=0, help="seed of the first round")
+    ap.add_argument("--max-steps", type=int, default=5000, help="sub-turn cap per round (a draw)")
+    ap.add_argument("--budget-ms", type=float, default=50.0, help="CPU time per move before it is forfeited")
+    ap.add_argument("--workers", type=int, default=None, help="default: all cores")
+    ap.add_argument("--cache", default=None, metavar="PATH", help="JSON-lines result cache to reuse and extend")
+    args = ap.parse_args(argv)
+
+    if len(set(args.entrants)) < 2:
+        raise SystemExit("a tournament needs at least two different entrants")
+    params = {}
+    for item in args.set:
+        key, _, val = item.partition("=")
+        params[key.strip()] = getattr(apply_overrides(Config(), {key.strip(): val.strip()}), key.strip())
+    standings, played = run_tournament(
+        list(dict.fromkeys(args.entrants)), args.rounds, target=args.target, config_path=args.config,
+        params=params, seed=args.seed, max_steps=args.max_steps, budget_ms=args.budget_ms,
+        workers=args.workers, cache=ResultCache(args.cache))
+    print(f"{'policy':<24} {'elo':>7} {'won':>6} {'lost':>6} {'drawn':>6} {'timeouts':>9}")
+    for st in standings:
+        print(f"{st.policy:<24} {st.rating:7.1f} {st.wins:6d} {st.losses:6d} {st.draws:6d} {st.timeouts:9d}")
+    print(f"{played} rounds played, the rest from the cache", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
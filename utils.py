@@ -1,6 +1,8 @@
 from __future__ import annotations
-from typing import Tuple, Set, List, Dict
-import random
+from typing import Callable, Tuple, Set, List, Dict, Iterable, Iterator, Optional
+from collections import OrderedDict
+from functools import lru_cache
+import heapq, math, random, time
 
 Vec = Tuple[int, int]
 DIRS_8: List[Vec] = [
@@ -28,87 +30,223 @@ def legal_neighbors(p: Vec, w: int, h: int, obstacles: Set[Vec], obstacles_enabl
 
 # --- Starts & obstacles ---
 
-def random_in_quadrant(q: int, w: int, h: int) -> Vec:
+def rng_stream(seed: int, name: str) -> random.Random:
+    """Reproducible random stream `name` derived from a round seed."""
+    return random.Random(f"{seed}:{name}")
+
+def view_origin(center: Vec, view_w: int, view_h: int, w: int, h: int) -> Vec:
+    """Top-left cell of a view_w×view_h window centred on `center`, kept on the board."""
+    return (max(0, min(w - view_w, center[0] - view_w // 2)),
+            max(0, min(h - view_h, center[1] - view_h // 2)))
+
+def random_in_quadrant(q: int, w: int, h: int, rng: Optional[random.Random] = None) -> Vec:
     # Quadrants: 0=TL, 1=TR, 2=BL, 3=BR
+    rng = rng or random  # the module works as a default stream
     wq, hq = w // 2, h // 2
     x0 = 0 if q in (0,2) else wq
     y0 = 0 if q in (0,1) else hq
     margin = 3
-    x = random.randint(x0 + margin, x0 + wq - 1 - margin)
-    y = random.randint(y0 + margin, y0 + hq - 1 - margin)
+    x = rng.randint(x0 + margin, x0 + wq - 1 - margin)
+    y = rng.randint(y0 + margin, y0 + hq - 1 - margin)
     return (x, y)
 
-def pick_start_positions(w: int, h: int, min_start_dist: int) -> Tuple[Vec, Vec, Vec]:
-    # human & hunter opposite quadrants
+@lru_cache(maxsize=None)
+def ring_offsets(r: int) -> Tuple[Vec, ...]:
+    """Offsets at Chebyshev distance exactly r, row by row ((0, 0) for r=0)."""
+    if r == 0:
+        return ((0, 0),)
+    return tuple((dx, dy) for dy in range(-r, r + 1)
+                 for dx in ((range(-r, r + 1)) if abs(dy) == r else (-r, r)))
+
+def ring(center: Vec, r: int, w: int, h: int) -> List[Vec]:
+    """In-bounds cells at Chebyshev distance exactly r from `center`."""
+    cx, cy = center
+    return [(cx + dx, cy + dy) for dx, dy in ring_offsets(r)
+            if 0 <= cx + dx < w and 0 <= cy + dy < h]
+
+# human/hunter draws before settling for the farthest pair seen
+START_TRIES = 64
+
+def pick_start_positions(w: int, h: int, min_start_dist: int,
+                         rng: Optional[random.Random] = None) -> Tuple[Vec, Vec, Vec]:
+    rng = rng or random
+    # human & hunter opposite quadrants; if min_start_dist is out of reach
+    # for this board, the farthest of START_TRIES draws is used
     opposite = {0:3, 1:2, 2:1, 3:0}
-    while True:
-        qh = random.choice([0,1,2,3])
+    best = (-1, (0, 0), (0, 0))
+    for _ in range(START_TRIES):
+        qh = rng.choice([0,1,2,3])
         qH = opposite[qh]
-        human  = random_in_quadrant(qh, w, h)
-        hunter = random_in_quadrant(qH, w, h)
-        if cheb(human, hunter) >= min_start_dist:
+        human  = random_in_quadrant(qh, w, h, rng)
+        hunter = random_in_quadrant(qH, w, h, rng)
+        d = cheb(human, hunter)
+        if d > best[0]:
+            best = (d, human, hunter)
+        if d >= min_start_dist:
             break
+    _, human, hunter = best
 
-    # target near center, far from both
-    cx, cy = w // 2, h // 2
+    # target near center, far from both: grow the square ring by ring and
+    # pick among everything accepted so far
+    center = (w // 2, h // 2)
     min_dist = max(6, min_start_dist // 2)
-    target = None
-    for radius in range(4, min(w, h) // 2):
-        candidates: List[Vec] = []
-        for x in range(cx - radius, cx + radius + 1):
-            for y in range(cy - radius, cy + radius + 1):
-                p = (x, y)
-                if not in_bounds(p, w, h):
-                    continue
-                if p == human or p == hunter:
-                    continue
-                if cheb(p, (cx, cy)) <= radius and cheb(p, human) >= min_dist and cheb(p, hunter) >= min_dist:
-                    candidates.append(p)
-        if candidates:
-            target = random.choice(candidates)
-            break
-    if target is None:
-        # fallback to center or nearest ring
-        center = (cx, cy)
-        if center != human and center != hunter and in_bounds(center, w, h):
-            target = center
-        else:
-            for r in range(1, max(w, h)):
-                ring: List[Vec] = []
-                for x in range(cx - r, cx + r + 1):
-                    for y in range(cy - r, cy + r + 1):
-                        p = (x, y)
-                        if not in_bounds(p, w, h):
-                            continue
-                        if p == human or p == hunter:
-                            continue
-                        if cheb(p, (cx, cy)) == r:
-                            ring.append(p)
-                if ring:
-                    target = random.choice(ring)
-                    break
-    return human, hunter, target  # type: ignore
-
-
-def generate_obstacles(w: int, h: int, density: float, exclude: Set[Vec], tree_ratio: float = 0.5) -> Tuple[Set[Vec], Dict[Vec, str]]:
+
+    def far(p: Vec) -> bool:
+        return p != human and p != hunter and cheb(p, human) >= min_dist and cheb(p, hunter) >= min_dist
+
+    candidates: List[Vec] = []
+    for radius in range(0, min(w, h) // 2):
+        candidates += [p for p in ring(center, radius, w, h) if far(p)]
+        if candidates and radius >= 4:
+            return human, hunter, rng.choice(candidates)
+    # fallback to center or nearest ring
+    if center != human and center != hunter and in_bounds(center, w, h):
+        return human, hunter, center
+    for r in range(1, max(w, h)):
+        cells = [p for p in ring(center, r, w, h) if p != human and p != hunter]
+        if cells:
+            return human, hunter, rng.choice(cells)
+    raise ValueError(f"no room for three actors on a {w}x{h} board")
+
+
+def bernoulli_indices(n: int, p: float, rng: random.Random) -> Iterator[int]:
+    """
+    Indices in [0, n) each included with probability p, drawn as geometric
+    gaps between hits: one random number per hit instead of one per index.
+    """
+    if p <= 0:
+        return
+    if p >= 1:
+        yield from range(n)
+        return
+    log_q = math.log(1.0 - p)
+    i = -1
+    while True:
+        i += 1 + int(math.log(1.0 - rng.random()) / log_q)
+        if i >= n:
+            return
+        yield i
+
+def clear_ring(exclude: Iterable[Vec]) -> Set[Vec]:
+    """`exclude` plus the 1-cell ring around each, kept free of obstacles."""
+    return {(x + dx, y + dy) for (x, y) in exclude for dx in (-1, 0, 1) for dy in (-1, 0, 1)}
+
+def generate_obstacles(w: int, h: int, density: float, exclude: Set[Vec], tree_ratio: float = 0.5,
+                       rng: Optional[random.Random] = None) -> Tuple[Set[Vec], Dict[Vec, str]]:
+    rng = rng or random
     obstacles: Set[Vec] = set()
     styles: Dict[Vec, str] = {}
-    for y in range(h):
-        for x in range(w):
-            p = (x, y)
-            if p in exclude:
-                continue
-            if random.random() < density:
-                obstacles.add(p)
-                styles[p] = 'tree' if random.random() < tree_ratio else 'rock'
-    # keep a 1-cell ring around excluded positions clear
-    ring_clear: Set[Vec] = set()
-    for e in exclude:
-        for dx in (-1, 0, 1):
-            for dy in (-1, 0, 1):
-                q = (e[0] + dx, e[1] + dy)
-                if in_bounds(q, w, h):
-                    ring_clear.add(q)
-    filtered = {p for p in obstacles if p not in ring_clear}
-    styles = {p: styles[p] for p in filtered if p in styles}
-    return filtered, styles
+    clear = clear_ring(exclude)
+    for i in bernoulli_indices(w * h, density, rng):
+        # style drawn for every hit so the stream does not depend on `exclude`
+        style = 'tree' if rng.random() < tree_ratio else 'rock'
+        p = (i % w, i // w)
+        if p not in clear:
+            obstacles.add(p)
+            styles[p] = style
+    return obstacles, styles
+
+
+# --- Pathfinding ---
+
+class DistanceMap:
+    """
+    Exact 8-connected step distances to `goal`, filled in lazily by a reverse
+    A* search (goal → start). The search can be paused when a time budget runs
+    out and resumed later, even towards a different start cell: closed cells
+    keep their exact distance and the next cell on a shortest path to `goal`.
+    """
+    def __init__(self, goal: Vec, w: int, h: int, obstacles: Set[Vec], obstacles_enabled: bool):
+        self.goal = goal
+        self.w, self.h = w, h
+        self.obstacles = obstacles
+        self.obstacles_enabled = obstacles_enabled
+        self.g: Dict[Vec, int] = {goal: 0}
+        self.parent: Dict[Vec, Vec] = {}
+        self.closed: Set[Vec] = set()
+        self._open: List[Tuple[int, int, Vec]] = [(0, 0, goal)]
+        self._aim: Optional[Vec] = None
+
+    def _reaim(self, start: Vec) -> None:
+        # Open cells hold correct tentative distances whatever the heuristic,
+        # so re-keying the heap on a new start keeps the search exact.
+        self._aim = start
+        live = {p for _, _, p in self._open if p not in self.closed}
+        self._open = [(self.g[p] + cheb(p, start), -self.g[p], p) for p in live]
+        heapq.heapify(self._open)
+
+    def step_from(self, start: Vec, deadline: float, max_expand: int = 0,
+                  stop: Optional[Callable[[], bool]] = None) -> Optional[Vec]:
+        """
+        Next cell from `start` towards the goal; None if unreachable or out of
+        budget. A positive `max_expand` replaces the deadline with a count of
+        expanded cells, which makes the result independent of machine speed.
+        `stop` is polled as well, so a caller's own budget can end the search.
+        """
+        if start == self.goal:
+            return start
+        if start in self.closed:
+            return self.parent[start]
+        if start != self._aim:
+            self._reaim(start)
+        w, h = self.w, self.h
+        obstacles = self.obstacles if self.obstacles_enabled else ()
+        g, parent, closed, heap = self.g, self.parent, self.closed, self._open
+        expanded = 0
+        while heap:
+            _, neg_g, p = heapq.heappop(heap)
+            if p in closed or -neg_g != g[p]:
+                continue  # stale entry
+            closed.add(p)
+            gq = g[p] + 1
+            for dx, dy in DIRS_8:
+                q = (p[0] + dx, p[1] + dy)
+                if not (0 <= q[0] < w and 0 <= q[1] < h) or q in obstacles or q in closed:
+                    continue
+                if gq < g.get(q, gq + 1):
+                    g[q] = gq
+                    parent[q] = p
+                    # ties broken towards deeper cells so open ground stays cheap
+                    heapq.heappush(heap, (gq + cheb(q, start), -gq, q))
+            # expand before returning so the open set still bounds every unclosed cell
+            if p == start:
+                return parent[p]
+            expanded += 1
+            if max_expand and expanded >= max_expand:
+                return None
+            if not expanded & 63 and ((not max_expand and time.perf_counter() > deadline)
+                                      or (stop is not None and stop())):
+                return None
+        return None
+
+
+class PathFinder:
+    """
+    Small LRU of DistanceMaps keyed by goal. Maps stay valid while the
+    obstacle layout is unchanged (same `rev`); a new rev drops them all,
+    and rev=None means the caller cannot vouch for the layout, so nothing
+    is reused.
+    """
+    def __init__(self, budget_ms: float = 2.0, max_maps: int = 4, node_budget: int = 0,
+                 stop: Optional[Callable[[], bool]] = None):
+        self.budget_ms = budget_ms
+        self.node_budget = node_budget  # >0: cells expanded per call instead of budget_ms
+        self.stop = stop                # polled during searches too (e.g. Policy.out_of_time)
+        self.max_maps = max_maps
+        self._maps: OrderedDict[Vec, DistanceMap] = OrderedDict()
+        self._key: Optional[tuple] = None
+
+    def next_step(self, pos: Vec, goal: Vec, w: int, h: int, obstacles: Set[Vec],
+                  obstacles_enabled: bool, rev: Optional[int] = None) -> Optional[Vec]:
+        key = (w, h, obstacles_enabled, rev, id(obstacles))
+        if rev is None or key != self._key:
+            self._maps.clear()
+            self._key = key
+        m = self._maps.get(goal)
+        if m is None:
+            m = self._maps[goal] = DistanceMap(goal, w, h, obstacles, obstacles_enabled)
+            if len(self._maps) > self.max_maps:
+                self._maps.popitem(last=False)
+        else:
+            self._maps.move_to_end(goal)
+        return m.step_from(pos, time.perf_counter() + self.budget_ms / 1000.0, self.node_budget, self.stop)
@@ -0,0 +1,563 @@
+"""Vectorized world engine: B independent boards advanced in lockstep with NumPy.
+
+Every board follows Engine's rules, with the original game's CPU policies
+(the greedy `chase_step` chaser and the one-ply `TargetCPU.decide_greedy`
+evader) and an optional greedy stand-in for the human seat. One `step()`
+resolves the next sub-turn of every unfinished board with whole-batch array
+operations; per-board Python only runs to repair the rare new layout that
+seals an actor off from the target (connectivity.repair, as in Engine).
+
+    venv = VecEngine(cfg, batch=4096, seed=1)
+    while not venv.step().all():
+        pass
+    venv.winner            # per board: 0 = running, 1 = HUMAN, 2 = HUNTER
+
+Layout (b = board):
+  obstacles[b, y, x]      FREE / TREE / ROCK (state.py codes)
+  tree_cover[b, y, x]     trees within TREE_REACH of the 2×2 block anchored at
+                          (x, y): where a fire may start
+  fire_xy / fire_exp      (B, fire_max) slots: 2×2 fire anchor and expiry step
+  fire_cover[b, y, x]     live fires covering the cell (FreeCells' fire count)
+  pockets[b]              some open cells cannot reach the others; obstacles only
+                          ever burn away, so a board without pockets keeps none
+  pu_xy / pu_type / pu_exp (B, powerup_max) slots, likewise
+  pos[b, slot]            (x, y) of HUMAN / HUNTER / TARGET
+A fire or power-up slot is live while its expiry is above the board's
+step_counter, so nothing needs ticking.
+"""
+from __future__ import annotations
+from array import array
+from typing import Optional, Tuple
+import numpy as np
+
+from config import Config
+from utils import DIRS_8
+from engine import ACTIONS, SKIP
+from fire import TREE_REACH
+from connectivity import repair
+from freecells import column_ring_offsets
+from state import (WorldState, HUMAN, HUNTER, TARGET, TURN_ORDER, FIELDS,
+                   FREE, TREE, ROCK, SPEED_UP, TIME_STOP)
+
+# neighbour deltas in legal_neighbors order, then "stay" (chase_step appends pos last)
+MOVES = np.array(DIRS_8 + [(0, 0)], dtype=np.int32)
+STAY_IDX = len(DIRS_8)
+ACTION_DELTAS = np.array(ACTIONS, dtype=np.int32)
+SKIP_ACTION = ACTIONS.index(SKIP)
+_TURN = np.array(TURN_ORDER, dtype=np.int64)
+
+# random placement attempts per board and sub-turn (as in FireSystem / Engine)
+FIRE_TRIES = 30
+POWERUP_TRIES = 20
+# rings around a death cell tried first on respawn, and around the centre
+# for the target's start, before the whole board
+SPAWN_RINGS = 3
+TARGET_RINGS = 8
+
+
+def _ring_table(r: int) -> np.ndarray:
+    # offsets of rings 0..r in the order find_safe_spawn tries them
+    return np.array([o for k in range(r + 1) for o in column_ring_offsets(k)], dtype=np.int32)
+
+
+def _cheb(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    d = np.abs(a - b)
+    return np.maximum(d[..., 0], d[..., 1])
+
+
+class VecEngine:
+    """
+    B boards of the same size stepped together.
+
+    `step(actions)` takes one human action per board as an index into
+    engine.ACTIONS (-1, or no array at all, lets the greedy chaser play the
+    human seat); it is only read on boards where the human is to move. A
+    blocked human move counts as SKIP, because a lockstep batch cannot hold
+    one board back the way Engine rejects the move. Finished boards stay
+    frozen until `reset()`.
+    """
+    def __init__(self, cfg: Optional[Config] = None, batch: int = 1024, seed: Optional[int] = None):
+        self.cfg = cfg or Config.load()
+        self.B, self.w, self.h = batch, self.cfg.grid_w, self.cfg.grid_h
+        self.rng = np.random.default_rng(seed)
+        B, H, W = self.B, self.h, self.w
+        F, P = self.cfg.fire_max, self.cfg.powerup_max
+
+        self.obstacles = np.zeros((B, H, W), np.int8)
+        self.tree_cover = np.zeros((B, H, W), np.int16)
+        self.fire_xy = np.zeros((B, F, 2), np.int32)
+        self.fire_exp = np.zeros((B, F), np.int64)
+        self.fire_cover = np.zeros((B, H, W), np.int8)
+        self.pockets = np.zeros(B, bool)
+        self.pu_xy = np.zeros((B, P, 2), np.int32)
+        self.pu_type = np.zeros((B, P), np.int8)
+        self.pu_exp = np.zeros((B, P), np.int64)
+
+        self.pos = np.zeros((B, 3, 2), np.int32)
+        self.last_pos = np.zeros((B, 3, 2), np.int32)
+        self.dead = np.zeros((B, 3), bool)
+        self.respawn = np.zeros((B, 3), np.int32)
+        self.deaths = np.zeros((B, 3), np.int32)
+        self.speed = np.zeros((B, 3), np.int32)
+        self.skip = np.zeros((B, 3), np.int32)
+
+        self.step_counter = np.zeros(B, np.int64)
+        self.turn_idx = np.zeros(B, np.int64)
+        self.winner = np.zeros(B, np.int8)
+        self.fires_spawned = np.zeros(B, np.int32)
+        self.powerups_collected = np.zeros((B, 3), np.int32)
+        self._spawn_order = (_ring_table(SPAWN_RINGS), _ring_table(max(W, H) - 1))
+        centre = np.array([W // 2, H // 2], np.int32) + _ring_table(min(W, H) // 2 - 1)
+        self._centre = (centre, _cheb(centre, centre[0]))
+        self._near_centre = int((self._centre[1] <= TARGET_RINGS).sum())
+        self.reset()
+
+    # ------------ lifecycle ------------
+    def reset(self, mask: Optional[np.ndarray] = None) -> None:
+        """Start new rounds on all boards, or on those where `mask` is set."""
+        b = np.arange(self.B) if mask is None else np.flatnonzero(mask)
+        if not b.size:
+            return
+        starts = self._start_positions(b.size)
+        self.pos[b] = starts
+        if self.cfg.obstacles_enabled_default:
+            self.obstacles[b] = self._obstacles(starts)
+            self._connect_actors(b)
+        else:
+            self.obstacles[b] = FREE
+        self.tree_cover[b] = self._tree_cover(self.obstacles[b])
+        self.fire_exp[b] = 0
+        self.fire_cover[b] = 0
+        self.pu_type[b] = 0
+        self.pu_exp[b] = 0
+        self.last_pos[b] = starts
+        for arr in (self.dead, self.respawn, self.deaths, self.speed, self.skip,
+                    self.step_counter, self.turn_idx, self.winner,
+                    self.fires_spawned, self.powerups_collected):
+            arr[b] = 0
+
+    def _in_quadrant(self, q: np.ndarray) -> np.ndarray:
+        # utils.random_in_quadrant: 0=TL, 1=TR, 2=BL, 3=BR with a 3-cell margin
+        wq, hq, margin = self.w // 2, self.h // 2, 3
+        x0, y0 = (q % 2) * wq, (q // 2) * hq
+        x = self.rng.integers(x0 + margin, x0 + wq - 1 - margin, endpoint=True)
+        y = self.rng.integers(y0 + margin, y0 + hq - 1 - margin, endpoint=True)
+        return np.stack([x, y], -1).astype(np.int32)
+
+    def _start_positions(self, n: int) -> np.ndarray:
+        """utils.pick_start_positions for n boards at once; returns (n, 3, 2)."""
+        w, h, cfg = self.w, self.h, self.cfg
+        human = np.zeros((n, 2), np.int32)
+        hunter = np.zeros((n, 2), np.int32)
+        todo = np.arange(n)
+        for _ in range(100):
+            qh = self.rng.integers(0, 4, todo.size)
+            human[todo] = self._in_quadrant(qh)
+            hunter[todo] = self._in_quadrant(3 - qh)
+            todo = todo[_cheb(human[todo], hunter[todo]) < cfg.min_start_dist]
+            if not todo.size:
+                break
+
+        # target: uniform among cells far enough from both chasers inside the
+        # smallest centre square (radius >= 4) that has any; most boards find
+        # one in the first rings, the rest look at the whole square
+        min_dist = max(6, cfg.min_start_dist // 2)
+        cells, rings = self._centre
+        target = np.zeros((n, 2), np.int32)
+        todo = np.arange(n)
+        for k in (self._near_centre, rings.size):
+            c, r = cells[:k], rings[:k]
+            far = (_cheb(c, human[todo, None]) >= min_dist) & (_cheb(c, hunter[todo, None]) >= min_dist)
+            radius = np.maximum(np.where(far, r, w + h).min(1), 4)
+            found = radius <= r[-1]
+            pick = far[found] & (r <= radius[found, None])
+            keys = self.rng.random(pick.shape, np.float32)
+            target[todo[found]] = c[np.where(pick, keys, -1).argmax(1)]
+            todo = todo[~found]
+            if not todo.size:
+                break
+        if todo.size:
+            # fallback: the centre, else a random neighbour of it
+            c, r = cells[:9], rings[:9]
+            free = (c != human[todo, None]).any(-1) & (c != hunter[todo, None]).any(-1)
+            keys = self.rng.random(free.shape, np.float32) + 2 * (r == 0)
+            target[todo] = c[np.where(free, keys, -1).argmax(1)]
+        return np.stack([human, hunter, target], 1)
+
+    def _obstacles(self, starts: np.ndarray) -> np.ndarray:
+        """utils.generate_obstacles for n boards; keeps 3×3 around each start clear."""
+        n, (h, w), cfg = len(starts), (self.h, self.w), self.cfg
+        # one draw per cell: below density * tree_ratio a tree, below density a rock
+        u = self.rng.random((n, h, w), np.float32)
+        grid = (u < cfg.obstacle_density).astype(np.int8) * ROCK
+        grid[u < cfg.obstacle_density * cfg.tree_ratio] = TREE
+        xy = starts[:, :, None] + self._spawn_order[0][:9]
+        x, y = xy[..., 0], xy[..., 1]
+        ok = (x >= 0) & (x < w) & (y >= 0) & (y < h)
+        grid[np.broadcast_to(np.arange(n)[:, None, None], ok.shape)[ok], y[ok], x[ok]] = FREE
+        return grid
+
+    def _connect_actors(self, b: np.ndarray) -> None:
+        """Engine._connect_actors: clear the fewest obstacles that let the human
+        and the hunter of each board reach its target."""
+        rows = np.arange(b.size)
+        pos = self.pos[b]
+        regions, count = self._regions(self.obstacles[b] == FREE)
+        goal = regions[rows, pos[:, TARGET, 1], pos[:, TARGET, 0]]
+        cut = [regions[rows, pos[:, s, 1], pos[:, s, 0]] != goal for s in (HUMAN, HUNTER)]
+        # boards needing repair are among these; they may keep pockets elsewhere
+        self.pockets[b] = count > 1
+        for i in np.flatnonzero(cut[0] | cut[1]):
+            grid = self.obstacles[b[i]]
+            ys, xs = np.nonzero(grid)
+            blocked = set(zip(xs.tolist(), ys.tolist()))
+            starts = [tuple(pos[i, s].tolist()) for s, c in zip((HUMAN, HUNTER), cut) if c[i]]
+            for x, y in repair(self.w, self.h, blocked, {}, tuple(pos[i, TARGET].tolist()), starts):
+                grid[y, x] = FREE
+
+    def _regions(self, open_: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Region label of every open cell of each (n, H, W) board, batched
+        connectivity.Components: rows are cut into runs of open cells, and
+        runs touching a run of the next row (diagonals included) are joined.
+        Labels are only meaningful on open cells. Also returns the number of
+        regions of each board.
+        """
+        n, h, w = open_.shape
+        # a closed border keeps runs and neighbours from wrapping across rows and boards
+        pw = w + 2
+        pad = np.zeros((n, h + 2, pw), bool)
+        pad[:, 1:-1, 1:-1] = open_
+        cell = pad.reshape(-1)
+        start = cell.copy()
+        start[1:] &= ~cell[:-1]
+        run = np.cumsum(start, dtype=np.int32) - 1
+        # two runs of adjacent rows touch iff one of them starts next to (or
+        # above/below) a cell of the other, so only run starts need looking at;
+        # the diagonals only matter when the cell straight above/below is closed
+        s = np.flatnonzero(start)
+        a, b = [], []
+        for q in (s - pw, s + pw):
+            straight = cell[q]
+            for d, hit in ((0, straight), (-1, cell[q - 1] & ~straight), (1, cell[q + 1] & ~straight)):
+                i = np.flatnonzero(hit)
+                a.append(i.astype(np.int32))
+                b.append(run[q[i] + d])
+        a, b = np.concatenate(a), np.concatenate(b)
+        # union-find on whole arrays: hook the larger root onto the smaller,
+        # then flatten, until every touching pair shares a root
+        root = np.arange(s.size, dtype=np.int32)
+        while True:
+            ra, rb = root[a], root[b]
+            apart = ra != rb
+            if not apart.any():
+                break
+            a, b, ra, rb = a[apart], b[apart], ra[apart], rb[apart]
+            np.minimum.at(root, np.maximum(ra, rb), np.minimum(ra, rb))
+            while True:
+                up = root[root]
+                if (up == root).all():
+                    break
+                root = up
+        own = root == np.arange(s.size)
+        count = np.bincount(s[own] // pad[0].size, minlength=n)
+        return root[run].reshape(pad.shape)[:, 1:-1, 1:-1], count
+
+    def _tree_cover(self, grid: np.ndarray) -> np.ndarray:
+        # separable box count of trees within TREE_REACH of a 2×2 block, i.e.
+        # FireSystem's cover summed over the block (nonzero iff an anchor is eligible)
+        r = TREE_REACH
+        out = (grid == TREE).astype(np.int16)
+        for axis in (2, 1):
+            n = out.shape[axis]
+            pre = np.concatenate([np.zeros_like(out.take([0], axis)), out.cumsum(axis, dtype=np.int16)], axis)
+            i = np.arange(n)
+            out = pre.take(np.minimum(n, i + r + 2), axis) - pre.take(np.maximum(0, i - r), axis)
+        return out
+
+    # ------------ queries ------------
+    def _flat(self, b: np.ndarray, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        # index into the raveled (B, H, W) grids; one gather beats a 3-array fancy index
+        return (b * self.h + y) * self.w + x
+
+    def passable(self, b: np.ndarray, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """In bounds and free of obstacles (broadcasting b, x, y)."""
+        inside = (x >= 0) & (x < self.w) & (y >= 0) & (y < self.h)
+        cell = self.obstacles.reshape(-1)[self._flat(b, np.clip(x, 0, self.w - 1), np.clip(y, 0, self.h - 1))]
+        return inside & (cell == FREE)
+
+    def burning(self, b: np.ndarray, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Cells covered by a live fire (broadcasting b, x, y; all in bounds)."""
+        return self.fire_cover.reshape(-1)[self._flat(b, x, y)] > 0
+
+    def board(self, i: int) -> WorldState:
+        """Board i as a WorldState (e.g. to search or render one board)."""
+        cfg = self.cfg
+        s = WorldState(self.w, self.h, cfg.respawn_delay, cfg.powerup_length)
+        s.step, s.turn_idx, s.winner = int(self.step_counter[i]), int(self.turn_idx[i]), int(self.winner[i])
+        s.obstacles[:] = self.obstacles[i].tobytes()
+        for (x, y), exp in zip(self.fire_xy[i].tolist(), self.fire_exp[i].tolist()):
+            if exp > s.step:
+                s.fire[y*self.w + x] = exp
+        for (x, y), kind, exp in zip(self.pu_xy[i].tolist(), self.pu_type[i].tolist(), self.pu_exp[i].tolist()):
+            if kind and exp > s.step:
+                s.pu_type[y*self.w + x] = kind
+                s.pu_expiry[y*self.w + x] = exp
+        for slot in (HUMAN, HUNTER, TARGET):
+            s.actors[slot*FIELDS:(slot+1)*FIELDS] = array('i', (
+                *self.pos[i, slot].tolist(), int(self.dead[i, slot]), int(self.respawn[i, slot]),
+                int(self.deaths[i, slot]), int(self.speed[i, slot]), int(self.skip[i, slot]),
+                *(self.last_pos[i, slot].tolist() if self.deaths[i, slot] else (-1, -1))))
+        return s
+
+    # ------------ turn logic ------------
+    def step(self, actions: Optional[np.ndarray] = None) -> np.ndarray:
+        """Resolve one sub-turn on every unfinished board; returns winner != 0."""
+        live = np.flatnonzero(self.winner == 0)
+        if not live.size:
+            return self.winner != 0
+        who = _TURN[self.turn_idx[live]]
+        skipping = self.skip[live, who] > 0
+        dead = self.dead[live, who]
+
+        b, s = live[skipping], who[skipping]
+        self.skip[b, s] -= 1
+        self.speed[b, s] -= self.speed[b, s] > 0
+
+        moving = ~skipping & ~dead
+        b, s = live[moving], who[moving]
+        if b.size:
+            act = np.full(b.size, -1) if actions is None else np.asarray(actions)[b]
+            act = np.where(s == HUMAN, act, -1)
+            start = self.pos[b, s].copy()
+            self._move(b, s, self._decide(b, s, act))
+            # speed power-up: a second step (for the human only after a real move)
+            again = (~self.dead[b, s] & (self.speed[b, s] > 0)
+                     & ((s != HUMAN) | (self.pos[b, s] != start).any(1)))
+            b2, s2 = b[again], s[again]
+            dest = self._decide(b2, s2, act[again])
+            delta = self.pos[b2, s2] - start[again]
+            repeat = self.pos[b2, s2] + delta
+            human = s2 == HUMAN
+            dest[human] = repeat[human]
+            ok = ~human | self.passable(b2, repeat[:, 0], repeat[:, 1])
+            self._move(b2[ok], s2[ok], dest[ok])
+            self.speed[b, s] -= self.speed[b, s] > 0
+
+        self.turn_idx[live] = (self.turn_idx[live] + 1) % len(TURN_ORDER)
+        self.step_counter[live] += 1
+        # Engine skips the win check on skipped turns and the dead human's turn
+        self._check_win(live[~skipping & ~(dead & (who == HUMAN))])
+        self._post_step(live)
+        return self.winner != 0
+
+    def _decide(self, b: np.ndarray, s: np.ndarray, act: np.ndarray) -> np.ndarray:
+        """Destination of actor s on each board b: human action or CPU policy."""
+        p = self.pos[b, s]
+        cand = p[:, None, :] + MOVES                                  # (n, 9, 2)
+        ok = self.passable(b[:, None], cand[..., 0], cand[..., 1])
+        ok[:, STAY_IDX] = True
+        pos = self.pos[b]
+        # chasers: first option closest to the target (chase_step)
+        dist = _cheb(cand, pos[:, None, TARGET])
+        chase = np.where(ok, dist, np.iinfo(np.int32).max).argmin(1)
+        # target: first neighbour maximising the distance to the nearer chaser
+        esc = np.minimum(_cheb(cand, pos[:, None, HUMAN]), _cheb(cand, pos[:, None, HUNTER]))
+        esc = np.where(ok, esc, -1)[:, :STAY_IDX]
+        evade = np.where(ok[:, :STAY_IDX].any(1), esc.argmax(1), STAY_IDX)
+        idx = np.where(s == TARGET, evade, chase)
+        dest = cand[np.arange(b.size), idx]
+
+        human = act >= 0
+        if human.any():
+            q = p[human] + ACTION_DELTAS[act[human]]
+            legal = self.passable(b[human], q[:, 0], q[:, 1])
+            dest[human] = np.where(legal[:, None], q, p[human])
+        return dest
+
+    def _move(self, b: np.ndarray, s: np.ndarray, dest: np.ndarray) -> None:
+        """Engine.move_actor for one actor per board: collect power-ups, burn in fire."""
+        self.pos[b, s] = dest
+        if self.cfg.powerup_max and b.size:
+            hit = ((self.pu_type[b] != 0) & (self.pu_exp[b] > self.step_counter[b][:, None])
+                   & (self.pu_xy[b] == dest[:, None]).all(-1))
+            got = hit.any(1)
+            if got.any():
+                bi, si = b[got], s[got]
+                k = hit[got].argmax(1)
+                kind = self.pu_type[bi, k]
+                self.pu_type[bi, k] = 0
+                self.powerups_collected[bi, si] += 1
+                dur = self.cfg.powerup_length
+                sp = kind == SPEED_UP
+                self.speed[bi[sp], si[sp]] = dur
+                # time stop freezes the other chaser, or both if the target picks it
+                bt, st = bi[kind == TIME_STOP], si[kind == TIME_STOP]
+                for o in (HUMAN, HUNTER):
+                    f = bt[st != o]
+                    self.skip[f, o] = np.maximum(self.skip[f, o], dur)
+        burn = self.burning(b, dest[:, 0], dest[:, 1])
+        self._kill(b[burn], s[burn])
+
+    def _kill(self, b: np.ndarray, s: np.ndarray) -> None:
+        m = ~self.dead[b, s]
+        b, s = b[m], s[m]
+        self.deaths[b, s] += 1
+        self.dead[b, s] = True
+        self.respawn[b, s] = self.cfg.respawn_delay
+        self.last_pos[b, s] = self.pos[b, s]
+
+    def _check_win(self, b: np.ndarray) -> None:
+        t = self.pos[b, TARGET]
+        human = ~self.dead[b, HUMAN] & (self.pos[b, HUMAN] == t).all(1)
+        hunter = ~human & ~self.dead[b, HUNTER] & (self.pos[b, HUNTER] == t).all(1)
+        self.winner[b[human]] = 1
+        self.winner[b[hunter]] = 2
+
+    def _post_step(self, b: np.ndarray) -> None:
+        # Engine.post_step order: fires, fire kills, power-ups, respawns
+        self._expire_fires(b)
+        self._spawn_fires(b)
+        for slot in (HUMAN, HUNTER, TARGET):
+            s = np.full(b.size, slot)
+            p = self.pos[b, slot]
+            burn = ~self.dead[b, slot] & self.burning(b, p[:, 0], p[:, 1])
+            self._kill(b[burn], s[burn])
+        self._spawn_powerups(b)
+        self._respawn(b)
+
+    def _cover(self, b: np.ndarray, xy: np.ndarray, n: int) -> None:
+        # add n to fire_cover under the 2×2 fires anchored at xy[i] on board b[i];
+        # fires never share a cell, so no cell is indexed twice
+        cover = self.fire_cover.reshape(-1)
+        for dx, dy in ((0, 0), (1, 0), (0, 1), (1, 1)):
+            cover[self._flat(b, xy[:, 0] + dx, xy[:, 1] + dy)] += n
+
+    def _expire_fires(self, b: np.ndarray) -> None:
+        # a fire stops covering its cells on the step it expires at
+        row, slot = np.nonzero(self.fire_exp[b] == self.step_counter[b][:, None])
+        if row.size:
+            self._cover(b[row], self.fire_xy[b[row], slot], -1)
+
+    def _spawn_fires(self, b: np.ndarray) -> None:
+        cfg, w, h = self.cfg, self.w, self.h
+        if not cfg.fire_max or w < 2 or h < 2:
+            return
+        live = self.fire_exp[b] > self.step_counter[b][:, None]
+        b = b[(live.sum(1) < cfg.fire_max) & (self.rng.random(b.size) <= cfg.fire_spawn_chance)]
+        if not b.size:
+            return
+        # rejection-sample anchors near trees that do not overlap a live fire
+        ax = self.rng.integers(0, w - 1, (b.size, FIRE_TRIES))
+        ay = self.rng.integers(0, h - 1, (b.size, FIRE_TRIES))
+        near = self.tree_cover.reshape(-1)[self._flat(b[:, None], ax, ay)] > 0
+        # take the first candidate near trees; retry the few that overlap a fire
+        rows = np.flatnonzero(near.any(1))
+        k = near[rows].argmax(1)
+        chosen = np.full(b.size, -1)
+        while rows.size:
+            fb = b[rows]
+            live = self.fire_exp[fb] > self.step_counter[fb][:, None]
+            overlap = (live & (abs(ax[rows, k, None] - self.fire_xy[fb, :, 0]) <= 1)
+                       & (abs(ay[rows, k, None] - self.fire_xy[fb, :, 1]) <= 1)).any(1)
+            chosen[rows[~overlap]] = k[~overlap]
+            rows, k = rows[overlap], k[overlap]
+            near[rows, k] = False
+            more = near[rows].any(1)
+            rows = rows[more]
+            k = near[rows].argmax(1)
+        has = chosen >= 0
+        b, ax, ay = b[has], ax[has, chosen[has]], ay[has, chosen[has]]
+        slot = (self.fire_exp[b] <= self.step_counter[b][:, None]).argmax(1)
+        self.fire_xy[b, slot] = np.stack([ax, ay], -1)
+        self.fire_exp[b, slot] = self.step_counter[b] + cfg.fire_lifetime
+        self._cover(b, self.fire_xy[b, slot], 1)
+        self.fires_spawned[b] += 1
+        # trees inside the fire burn down (rocks survive), one cell of the
+        # block at a time so each board loses at most one tree per call
+        grid = self.obstacles.reshape(-1)
+        for dx, dy in ((0, 0), (1, 0), (0, 1), (1, 1)):
+            x, y = ax + dx, ay + dy
+            i = self._flat(b, x, y)
+            t = grid[i] == TREE
+            grid[i[t]] = FREE
+            self._remove_trees(b[t], x[t], y[t])
+
+    def _remove_trees(self, b: np.ndarray, x: np.ndarray, y: np.ndarray) -> None:
+        # one tree per board: the anchors whose block has it within reach
+        if not b.size:
+            return
+        off = np.arange(-TREE_REACH - 1, TREE_REACH + 1)
+        xs = x[:, None, None] + off[None, None, :]
+        ys = y[:, None, None] + off[None, :, None]
+        ok = (xs >= 0) & (xs < self.w) & (ys >= 0) & (ys < self.h)
+        self.tree_cover.reshape(-1)[self._flat(b[:, None, None], xs, ys)[ok]] -= 1
+
+    def _spawn_powerups(self, b: np.ndarray) -> None:
+        cfg, w, h = self.cfg, self.w, self.h
+        if not cfg.powerup_max:
+            return
+        on = (self.pu_type[b] != 0) & (self.pu_exp[b] > self.step_counter[b][:, None])
+        pick = (on.sum(1) < cfg.powerup_max) & (self.rng.random(b.size) < cfg.powerup_spawn_chance)
+        b, on = b[pick], on[pick]
+        if not b.size:
+            return
+        x = self.rng.integers(0, w, (b.size, POWERUP_TRIES))
+        y = self.rng.integers(0, h, (b.size, POWERUP_TRIES))
+        bb = np.broadcast_to(b[:, None], x.shape)
+        ok = self.obstacles.reshape(-1)[self._flat(bb, x, y)] == FREE
+        for slot in (HUMAN, HUNTER, TARGET):
+            p = self.pos[b, slot]
+            ok &= (x != p[:, None, 0]) | (y != p[:, None, 1])
+        pxy = self.pu_xy[b][:, None]
+        ok &= ~(on[:, None, :] & (x[..., None] == pxy[..., 0]) & (y[..., None] == pxy[..., 1])).any(-1)
+        ok &= ~self.burning(bb, x, y)
+        has = ok.any(1)
+        k = ok.argmax(1)[has]
+        b, on, x, y = b[has], on[has], x[has, k], y[has, k]
+        slot = (~on).argmax(1)
+        self.pu_xy[b, slot] = np.stack([x, y], -1)
+        self.pu_type[b, slot] = self.rng.integers(SPEED_UP, TIME_STOP, b.size, endpoint=True)
+        self.pu_exp[b, slot] = self.step_counter[b] + cfg.powerup_lifetime
+
+    def _respawn(self, b: np.ndarray) -> None:
+        # slot by slot, so a later respawn avoids an earlier one (as in Engine)
+        for slot in (HUMAN, HUNTER, TARGET):
+            bs = b[self.dead[b, slot] & (self.respawn[b, slot] > 0)]
+            self.respawn[bs, slot] -= 1
+            due = bs[self.respawn[bs, slot] <= 0]
+            if due.size:
+                self.pos[due, slot] = self._safe_spawn(due, self.last_pos[due, slot])
+                self.dead[due, slot] = False
+                self.respawn[due, slot] = 0
+
+    def _safe_spawn(self, b: np.ndarray, around: np.ndarray) -> np.ndarray:
+        """Engine.find_safe_spawn: nearest cell to around[i], ring order (dx, then
+        dy), free of obstacles, fire and live actors that reaches the target."""
+        m, w, h = b.size, self.w, self.h
+        rows = np.arange(m)
+        ok = self.obstacles[b] == FREE
+        # only boards with pockets have open cells that cannot reach the target
+        p = np.flatnonzero(self.pockets[b])
+        if p.size:
+            regions, _ = self._regions(ok[p])
+            target = self.pos[b[p], TARGET]
+            ok[p] &= regions == regions[np.arange(p.size), target[:, 1], target[:, 0]][:, None, None]
+        ok &= self.fire_cover[b] == 0
+        for slot in (HUMAN, HUNTER, TARGET):
+            alive = ~self.dead[b, slot]
+            ok[rows[alive], self.pos[b[alive], slot, 1], self.pos[b[alive], slot, 0]] = False
+        # the first rings almost always have a cell; the rest try the whole board
+        out = np.tile(np.array([w // 2, h // 2], np.int32), (m, 1))
+        todo = rows
+        for offsets in self._spawn_order:
+            cand = around[todo, None] + offsets
+            x, y = cand[..., 0], cand[..., 1]
+            inside = (x >= 0) & (x < w) & (y >= 0) & (y < h)
+            hit = inside & ok[todo[:, None], np.clip(y, 0, h - 1), np.clip(x, 0, w - 1)]
+            found = hit.any(1)
+            out[todo[found]] = cand[found, hit[found].argmax(1)]
+            todo = todo[~found]
+            if not todo.size:
+                break
+        return out